@@ -9,16 +9,36 @@ try:
         call_Bellhop, 
         call_Bellhop_Rays, 
         call_Bellhop_multi_freq,
+        call_Bellhop_multi_freq_async,
+        call_Bellhop_Rays_async,
+        call_Bellhop_batch,
+        call_Bellhop_broadband,
+        call_Bellhop_broadband_async,
+        call_Bellhop_time_wave,
+        call_Bellhop_radials,
+        radials_to_cartesian,
+        call_Bellhop_reciprocal,
+        call_Bellhop_points,
+        prepare_scenario,
+        Scenario,
         calculate_transmission_loss,
         alphadiv,
         beamsnumber,
         find_cvgcRays,
+        filter_rays,
+        simplify_rays,
         AtBinPath,
         get_binary_path,
         check_bellhop_binary
     )
-    from .readwrite import read_shd, write_env, write_bathy, write_ssp
+    from .readwrite import read_shd, ShdField, write_env, write_bathy, write_ssp, write_ssp_matrix, read_rays, iter_rays, read_arrivals
+    from .env import RayStore, ArrivalStore
     from .project import ensure_project_dirs, get_project_root, get_tmp_path
+    from .workspace import Workspace, WorkspaceManager, create_workspace, configure_workspace
+    from .executor import BellhopExecutor, get_executor, configure_executor, shutdown_executor
+    from .runner import run_bellhop, run_bellhop_async, BellhopRunError
+    from .cache import ResultCache, get_result_cache, configure_cache, cache_stats
+    from .synthesis import arrivals_to_pressure, arrivals_to_waveform, source_pulse
     print("✓ Bellhop核心模块加载完成")
 except ImportError as e:
     print(f"Warning: Could not import some core modules: {e}")
@@ -27,20 +47,59 @@ __all__ = [
     'call_Bellhop',
     'call_Bellhop_Rays', 
     'call_Bellhop_multi_freq',
+    'call_Bellhop_multi_freq_async',
+    'call_Bellhop_Rays_async',
+    'call_Bellhop_batch',
+    'call_Bellhop_broadband',
+    'call_Bellhop_broadband_async',
+    'call_Bellhop_time_wave',
+    'call_Bellhop_radials',
+    'radials_to_cartesian',
+    'call_Bellhop_reciprocal',
+    'call_Bellhop_points',
+    'prepare_scenario',
+    'Scenario',
     'calculate_transmission_loss',
     'alphadiv',
     'beamsnumber',
     'find_cvgcRays',
+    'filter_rays',
+    'simplify_rays',
     'AtBinPath',
     'get_binary_path',
     'check_bellhop_binary',
     'read_shd',
+    'ShdField',
     'write_env', 
     'write_bathy',
     'write_ssp',
+    'write_ssp_matrix',
+    'read_rays',
+    'iter_rays',
+    'RayStore',
+    'read_arrivals',
+    'ArrivalStore',
     'ensure_project_dirs',
     'get_project_root',
-    'get_tmp_path'
+    'get_tmp_path',
+    'Workspace',
+    'WorkspaceManager',
+    'create_workspace',
+    'configure_workspace',
+    'BellhopExecutor',
+    'get_executor',
+    'configure_executor',
+    'shutdown_executor',
+    'run_bellhop',
+    'run_bellhop_async',
+    'BellhopRunError',
+    'ResultCache',
+    'get_result_cache',
+    'configure_cache',
+    'cache_stats',
+    'arrivals_to_pressure',
+    'arrivals_to_waveform',
+    'source_pulse'
 ]
 
 __version__ = "1.0.0"
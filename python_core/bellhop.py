@@ -48,19 +48,33 @@ except ImportError:
 
 try:
     # 尝试相对导入 (用于包模式)
-    from .readwrite import write_env, read_shd, get_rays
-    from .env import Pos, Source, Dom, cInt, SSPraw, SSP, HS, BotBndry, TopBndry, Bndry, Box, Beam
+    from .readwrite import write_env, read_shd, get_rays, write_ssp_matrix, EnvTemplate, read_arrivals
+    from .workspace import create_workspace
+    from .executor import get_executor
+    from .runner import run_bellhop, run_bellhop_async, bellhop_executable, BellhopRunError
+    from .cache import get_result_cache, make_key, content_key, sample_field, sample_demodulated
+    from .synthesis import arrivals_to_pressure, arrivals_to_waveform, source_pulse
+    from .env import Pos, Source, Dom, cInt, SSPraw, SSP, HS, BotBndry, TopBndry, Bndry, Box, Beam, RayStore
 except ImportError:
     # 尝试绝对导入 (用于直接脚本模式)
-    from readwrite import write_env, read_shd, get_rays
-    from env import Pos, Source, Dom, cInt, SSPraw, SSP, HS, BotBndry, TopBndry, Bndry, Box, Beam
+    from readwrite import write_env, read_shd, get_rays, write_ssp_matrix, EnvTemplate, read_arrivals
+    from workspace import create_workspace
+    from executor import get_executor
+    from runner import run_bellhop, run_bellhop_async, bellhop_executable, BellhopRunError
+    from cache import get_result_cache, make_key, content_key, sample_field, sample_demodulated
+    from synthesis import arrivals_to_pressure, arrivals_to_waveform, source_pulse
+    from env import Pos, Source, Dom, cInt, SSPraw, SSP, HS, BotBndry, TopBndry, Bndry, Box, Beam, RayStore
 
-from os import system
 import numpy as np
-from multiprocessing import Pool
 from scipy.stats import norm
 import math
 import os  # Add this import
+import asyncio
+import copy
+import functools
+import itertools
+import shutil
+import threading
 import warnings
 
 
@@ -68,13 +82,14 @@ import warnings
 def call_Bellhop_multi_freq(frequencies, source_depth, receiver_depths, receiver_ranges, 
                            bathymetry, sound_speed_profile, sediment, bottom_params,
                            return_pressure=False, performance_mode=False, 
-                           beam_number=None, grazing_high=None, grazing_low=None):
+                           beam_number=None, grazing_high=None, grazing_low=None,
+                           workspace=None, dense_grid=False):
     """
     Multi-frequency Bellhop calculation function
     
     Args:
         frequencies: array of frequencies (Hz)
-        source_depth: source depth (m) 
+        source_depth: source depth array (m); several depths share each bellhop run
         receiver_depths: receiver depth array (m)
         receiver_ranges: receiver range array (m)
         bathymetry: bathymetry data
@@ -86,177 +101,1402 @@ def call_Bellhop_multi_freq(frequencies, source_depth, receiver_depths, receiver
         beam_number: user-specified beam number
         grazing_high: upper grazing angle limit (degrees)
         grazing_low: lower grazing angle limit (degrees)
+        workspace: scratch workspace to write into; a private one is created and removed when None
+        dense_grid: compute on the canonical dense receiver grid (see dense_receiver_grid) so that
+            later requests with other receiver grids in the same environment hit the result cache
     
     Returns:
-        (Pos1, TL_multi, pressure_multi) where TL_multi and pressure_multi have frequency dimension
+        (Pos1, TL_multi, pressure_multi); TL_multi and pressure_multi are always indexed
+        [freq, source depth, depth, range], also for a single frequency or source depth
+        (several source depths are traced in one bellhop run per job)
     """    # 确保频率是数组
     if not isinstance(frequencies, (list, np.ndarray)):
         frequencies = [frequencies]
     frequencies = np.array(frequencies)
     Nfreq = len(frequencies)
     
-    # Source and receiving position setup (similar to WGNPd implementation)
-    filename = 'data/tmp/multi_freq'
-    
-    # **确保目录存在**
-    os.makedirs('data/tmp', exist_ok=True)
-    
-    # Convert units for Bellhop
-    ran = np.array(receiver_ranges) / 1000.0  # Convert to km
-    RD = np.array(receiver_depths)  # Keep in meters
-    Rmax = max(ran)
-    
-    print(f"Using user-defined grid: {len(receiver_ranges)} range points, {len(RD)} depth points")
-    
-    # Calculate sound speed profile related parameters
-    NZmax, Zmax, ssp_idx = calZmax(sound_speed_profile)
-    
-    pos = Pos(Source(source_depth), Dom(ran, RD))
-    
-    # Range of phase velocity
-    cint_obj = cInt(1400, 15000)
+    # 每次求解使用独立的工作空间，避免并发求解互相覆盖文件
+    own_workspace = workspace is None
+    if own_workspace:
+        workspace = create_workspace('multi_freq')
+    try:
+        plan = _plan_multi_freq(workspace.file('multi_freq'), frequencies, source_depth, receiver_depths,
+                                receiver_ranges, bathymetry, sound_speed_profile, bottom_params,
+                                performance_mode, beam_number, grazing_high, grazing_low, dense_grid)
 
-    # The number of media
-    NMedia = 1
-    ssp_raw = []
-    depth = [0]
-    
-    # Sound speed profile setup (same as single frequency)
-    Z_original = sound_speed_profile[ssp_idx].z
-    Cp_original = sound_speed_profile[ssp_idx].c
-    
-    if len(Z_original) < NZmax:
-        Z = np.zeros(NZmax)
-        Cp = np.zeros(NZmax)
-        Z[:len(Z_original)] = Z_original
-        Cp[:len(Cp_original)] = Cp_original
-        
-        for i in range(len(Z_original), NZmax):
-            if len(Z_original) > 1:
-                Z[i] = Z_original[-1] + (i - len(Z_original) + 1) * 10
-                Cp[i] = Cp_original[-1]
+        return _solve_plan(plan, return_pressure, cleanup=not workspace.keep)
+    finally:
+        if own_workspace:
+            workspace.cleanup()
+
+
+class MultiFreqPlan:
+    """多频率计算计划：每个 频率×角度分段 对应一个 bellhop 作业"""
+
+    def __init__(self, frequencies, ran, RD, dense=False, sd=None, irregular=False):
+        self.frequencies = frequencies
+        self.ran = ran  # 请求的接收距离 (km)
+        self.RD = RD    # 请求的接收深度 (m)
+        self.sd = np.atleast_1d(sd if sd is not None else 0.0)  # 声源深度 (m)，同一作业中一起计算
+        self.dense = dense    # 是否在加密网格上计算（结果再取回请求网格）
+        self.irregular = irregular  # 接收点为 (RD[i], ran[i]) 散点而不是 RD × ran 网格
+        self.field_keys = [None] * len(frequencies)  # 每个频率的声场缓存键（除最大接收距离外不含接收网格）
+        self.wavenumbers = None  # 每个频率的参考波数 2πf/c (1/m)，加密网格结果解调插值时使用
+        self.cached = {}      # 频率下标 -> 从缓存取得的 (pos, pressure)
+        self.filenames = []   # 每个作业的文件名（不含扩展名）
+        self.freq_index = []  # 每个作业对应的频率下标
+        self.costs = []       # 每个作业的估计代价（声线数 × 最大距离），用于调度
+
+    def add(self, filename, iF, cost=1.0):
+        self.filenames.append(filename)
+        self.freq_index.append(iF)
+        self.costs.append(cost)
+
+    def jobs(self):
+        """所有作业的文件名；只缓存每个频率叠加后的声场（见 FieldAccumulator.fields），分段结果不单独缓存"""
+        return list(self.filenames)
+
+    def files_for(self, iF):
+        """某个频率的所有角度分段文件"""
+        return [f for f, i in zip(self.filenames, self.freq_index) if i == iF]
+
+
+def _plan_multi_freq(filename, frequencies, source_depth, receiver_depths, receiver_ranges,
+                     bathymetry, sound_speed_profile, bottom_params,
+                     performance_mode=False, beam_number=None, grazing_high=None, grazing_low=None,
+                     dense_grid=False):
+    """
+    写出所有 频率×角度分段 的 .env 文件（.ssp/.bty 只写一次并链接到各作业），返回 MultiFreqPlan
+
+    结果缓存中已有覆盖请求接收网格的声场（相同环境、相同最大接收距离的超集网格或加密网格）的频率不再生成作业
+    """
+    scenario = Scenario(filename, source_depth, receiver_depths, receiver_ranges, bathymetry,
+                        sound_speed_profile, bottom_params, dense_grid, frequencies=frequencies)
+    return scenario.plan(frequencies, performance_mode, beam_number, grazing_high, grazing_low)
+
+
+def _plan_broadband(filename, frequencies, source_depth, receiver_depths, receiver_ranges,
+                    bathymetry, sound_speed_profile, bottom_params,
+                    performance_mode=False, beam_number=None, grazing_high=None, grazing_low=None,
+                    dense_grid=False):
+    """写出宽带计算的到达结构作业，返回 ((文件名, 缓存键), 代价)；到达结构直接在请求网格上计算，忽略 dense_grid"""
+    scenario = Scenario(filename, source_depth, receiver_depths, receiver_ranges, bathymetry,
+                        sound_speed_profile, bottom_params)
+    return scenario.arrivals_job(frequencies, performance_mode, beam_number, grazing_high, grazing_low)
+
+
+def _link_or_copy(src, dst):
+    """硬链接共享文件，文件系统不支持时复制"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+class SharedInputs:
+    """
+    多个 Scenario 之间共享输入文件：内容相同的 .ssp/.bty（按生成参数判断）只写一次，
+    其余场景硬链接到第一次写出的文件
+    """
+
+    def __init__(self):
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def provide(self, path, write, *inputs):
+        """inputs 相同的文件已经写过时链接到 path，否则调用 write() 写出 path"""
+        key = content_key(*inputs)
+        with self._lock:
+            src = self._files.get(key)
+            if src is None:
+                write()
+                self._files[key] = path
             else:
-                Z[i] = i * 10
-                Cp[i] = 1500
-    else:
-        Z = Z_original[:NZmax]
-        Cp = Cp_original[:NZmax]
-    
-    Cs = np.zeros(len(Z))
-    Rho = np.ones(len(Z))
-    Ap = np.zeros(len(Z))
-    As = np.zeros(len(Z))
-    ssp_raw.append(SSPraw(Z, Cp, Cs, Rho, Ap, As))
-    depth.append(Z[-1])
+                _link_or_copy(src, path)
 
-    Opt_top = 'SVW'
-    N = np.zeros(NMedia, np.int8)
-    Sigma = np.zeros(NMedia + 1)
-    sspB = SSP(ssp_raw, depth, NMedia, Opt_top, N, Sigma)
 
-    # Bottom option
-    hs = HS(bottom_params[0].cp, bottom_params[0].cs, bottom_params[0].rho, bottom_params[0].a_p, bottom_params[0].a_s)
-    Opt_bot = 'A~'
-    bottom = BotBndry(Opt_bot, hs)
-    top = TopBndry(Opt_top)
-    bdy = Bndry(top, bottom)
-    
-    # Beam params setup
-    run_type = 'C'
-    box = Box(Zmax, max(bathymetry.r))
-    deltas = 0
-    
-    # 为每个频率创建独立的环境文件
-    Filenames = []
-    for iF in range(Nfreq):
-        freq = frequencies[iF]
-        
-        # 计算当前频率的射线参数
+class Scenario:
+    """
+    预先准备好的声场计算环境（声速剖面、地形、海底参数、收发位置）
+
+    .ssp/.bty 在第一个作业生成时写出一次，之后的作业通过硬链接复用（不支持时复制）；
+    .env 由缓存的模板生成，每个作业只替换频率、声线数和角度。
+    同一环境计算多个频率或多组声线参数时，不再为每个 频率×角度分段 重写相同的文件。
+
+    通常通过 prepare_scenario 创建，使用 run 计算；不再使用时调用 close 清理工作空间
+    """
+
+    def __init__(self, filename, source_depth, receiver_depths, receiver_ranges, bathymetry,
+                 sound_speed_profile, bottom_params, dense_grid=False, workspace=None, shared=None,
+                 irregular=False, frequencies=None):
+        self.filename = filename
+        self.workspace = workspace
+        self.shared = shared  # SharedInputs，与其他场景共享相同的 .ssp/.bty
+        self.source_depth = source_depth
+        self.bathymetry = bathymetry
+        self.sound_speed_profile = sound_speed_profile
+        self.bottom_params = bottom_params
+        # 散点接收（bellhop 不规则网格选项）：接收点为 (receiver_depths[i], receiver_ranges[i])，
+        # 两者长度相同、距离递增
+        self.irregular = irregular
+        dense_grid = dense_grid and not irregular
+        self.dense = dense_grid
+        self.ran = np.array(receiver_ranges) / 1000.0  # 请求的接收距离 (km)
+        self.RD = np.array(receiver_depths)            # 请求的接收深度 (m)
+        self.binary = bellhop_executable(AtBinPath)
+        self._direct_scenario = None
+        if dense_grid:
+            # frequencies 给出时深度和距离间距按最高频率的波长加密（见 dense_receiver_grid）；
+            # 点数超过 DENSE_MAX_POINTS 时不使用加密网格，直接在请求网格上计算
+            grid_depths, grid_ranges = dense_receiver_grid(receiver_depths, receiver_ranges, bathymetry,
+                                                           frequencies=frequencies,
+                                                           sound_speed_profile=sound_speed_profile)
+            if len(grid_depths) * len(grid_ranges) > DENSE_MAX_POINTS:
+                print(f"Warning: dense grid needs {len(grid_depths)} x {len(grid_ranges)} points, "
+                      f"computing on the requested grid")
+                self.dense = False
+            else:
+                receiver_depths, receiver_ranges = grid_depths, grid_ranges
+
+        # Convert units for Bellhop
+        ran = np.array(receiver_ranges) / 1000.0  # Convert to km
+        RD = np.array(receiver_depths)  # Keep in meters
+        self.Rmax = max(ran)
+
+        print(f"Using user-defined grid: {len(receiver_ranges)} range points, {len(RD)} depth points")
+
+        # Calculate sound speed profile related parameters
+        self.NZmax, Zmax, ssp_idx = calZmax(sound_speed_profile)
+
+        self.pos = Pos(Source(source_depth), Dom(ran, RD))
+
+        # Range of phase velocity
+        self.cint = cInt(1400, 15000)
+
+        # The number of media
+        NMedia = 1
+        ssp_raw = []
+        depth = [0]
+
+        # Sound speed profile setup (same as single frequency)
+        Z_original = sound_speed_profile[ssp_idx].z
+        Cp_original = sound_speed_profile[ssp_idx].c
+
+        if len(Z_original) < self.NZmax:
+            Z = np.zeros(self.NZmax)
+            Cp = np.zeros(self.NZmax)
+            Z[:len(Z_original)] = Z_original
+            Cp[:len(Cp_original)] = Cp_original
+
+            for i in range(len(Z_original), self.NZmax):
+                if len(Z_original) > 1:
+                    Z[i] = Z_original[-1] + (i - len(Z_original) + 1) * 10
+                    Cp[i] = Cp_original[-1]
+                else:
+                    Z[i] = i * 10
+                    Cp[i] = 1500
+        else:
+            Z = Z_original[:self.NZmax]
+            Cp = Cp_original[:self.NZmax]
+
+        Cs = np.zeros(len(Z))
+        Rho = np.ones(len(Z))
+        Ap = np.zeros(len(Z))
+        As = np.zeros(len(Z))
+        ssp_raw.append(SSPraw(Z, Cp, Cs, Rho, Ap, As))
+        depth.append(Z[-1])
+
+        Opt_top = 'SVW'
+        N = np.zeros(NMedia, np.int8)
+        Sigma = np.zeros(NMedia + 1)
+        self.sspB = SSP(ssp_raw, depth, NMedia, Opt_top, N, Sigma)
+
+        # Bottom option
+        hs = HS(bottom_params[0].cp, bottom_params[0].cs, bottom_params[0].rho, bottom_params[0].a_p, bottom_params[0].a_s)
+        Opt_bot = 'A~'
+        bottom = BotBndry(Opt_bot, hs)
+        top = TopBndry(Opt_top)
+        self.bdy = Bndry(top, bottom)
+
+        # Beam params setup
+        self.run_type = 'CG  I' if irregular else 'C'
+        self.box = Box(Zmax, max(bathymetry.r))
+        self.deltas = 0
+
+        self.env = EnvTemplate('BELLHOP', 'Pekeris profile', self.sspB, self.bdy, self.pos, self.cint, self.Rmax)
+        self._shared_written = False
+        self._lock = threading.Lock()
+        self._plans = itertools.count()
+
+    def _write_shared(self):
+        """第一次使用时写出共享的 .ssp/.bty"""
+        with self._lock:
+            if not self._shared_written:
+                write_ssp_file = functools.partial(write_ssp, self.filename, self.sound_speed_profile,
+                                                   self.bathymetry, self.NZmax)
+                write_bathy_file = functools.partial(write_bathy, self.filename, self.bathymetry)
+                if self.shared is None:
+                    write_ssp_file()
+                    write_bathy_file()
+                else:
+                    # .ssp 由声速剖面、地形距离点和深度点数决定，.bty 只由地形决定
+                    self.shared.provide(self.filename + '.ssp', write_ssp_file,
+                                        self.sound_speed_profile, self.bathymetry.r, self.NZmax)
+                    self.shared.provide(self.filename + '.bty', write_bathy_file,
+                                        self.bathymetry.r, self.bathymetry.d)
+                self._shared_written = True
+
+    def write_job(self, filename, freq, beam):
+        """写出一个作业的 .env，并链接共享的 .ssp/.bty"""
+        self._write_shared()
+        self.env.write(filename + '.env', freq, beam)
+        _link_or_copy(self.filename + '.ssp', filename + '.ssp')
+        _link_or_copy(self.filename + '.bty', filename + '.bty')
+
+    def plan(self, frequencies, performance_mode=False, beam_number=None, grazing_high=None, grazing_low=None):
+        """为每个 频率×角度分段 生成作业，返回 MultiFreqPlan；命中结果缓存的频率不生成作业"""
+        frequencies = np.array(frequencies)
+        if self.dense and not _resolves_grid(self.pos.r.depth, self.pos.r.range * 1000.0, frequencies,
+                                             self.sound_speed_profile):
+            # 加密网格的间距不小于这些频率的半个波长，插值会混叠，改为在请求网格上直接计算
+            print("Warning: dense grid too coarse for the requested frequencies, computing on the requested grid")
+            return self._direct().plan(frequencies, performance_mode, beam_number, grazing_high, grazing_low)
+        n = next(self._plans)
+        filename = self.filename if n == 0 else self.filename + str(n)
+        plan = MultiFreqPlan(frequencies, self.ran, self.RD, self.dense, self.source_depth, self.irregular)
+        plan.wavenumbers = 2.0 * np.pi * frequencies / _reference_speed(self.sound_speed_profile)
+        cache = get_result_cache()
+        bathymetry = self.bathymetry
+        Rmax = self.Rmax
+
+        # 为每个频率创建独立的环境文件
+        for iF in range(len(frequencies)):
+            freq = frequencies[iF]
+
+            if self.irregular:
+                # 散点接收的缓存键包含接收点，只精确复用
+                plan.field_keys[iF] = make_key('field_points', self.binary, freq, self.source_depth,
+                                               self.sound_speed_profile, bathymetry, self.bottom_params,
+                                               performance_mode, beam_number, grazing_high, grazing_low,
+                                               plan.RD, plan.ran)
+                hit = cache.get_field(plan.field_keys[iF])
+            else:
+                # 声场缓存键不含接收网格，同一环境的不同接收网格请求共享；最大接收距离决定声线数和
+                # 角度分段（beamsnumber/alphadiv），是 .env 的一部分，包含在键中
+                plan.field_keys[iF] = make_key('field_grid', self.binary, freq, self.source_depth,
+                                               self.sound_speed_profile, bathymetry, self.bottom_params,
+                                               performance_mode, beam_number, grazing_high, grazing_low, Rmax)
+                hit = cache.find_field(plan.field_keys[iF], plan.RD, plan.ran * 1000.0, plan.wavenumbers[iF])
+            if hit is not None:
+                plan.cached[iF] = hit
+                continue
+
+            # 计算当前频率的射线参数
+            if beam_number is not None and beam_number > 0:
+                totalBeams = int(beam_number)
+            else:
+                if performance_mode:
+                    totalBeams = min(200, beamsnumber(freq, Rmax, max(bathymetry.d)))
+                else:
+                    totalBeams = beamsnumber(freq, Rmax, max(bathymetry.d))
+
+            # 计算角度范围
+            if grazing_low is not None and grazing_high is not None:
+                Alpha = [float(grazing_low), float(grazing_high)]
+                NAlphaRange = 1
+            else:
+                if performance_mode:
+                    NAlphaRange = 6
+                else:
+                    NAlphaRange = 12
+                Alpha = alphadiv(NAlphaRange, Rmax)
+
+            # 为当前频率创建多个角度分段文件
+            if len(Alpha) == 2 and NAlphaRange == 1:
+                # 用户指定角度范围
+                self._add_job(plan, filename + f'_f{iF}_a0', iF, freq, totalBeams, Alpha)
+            else:
+                # 多个角度分段
+                for iAlphaRange in range(len(Alpha) - 1):
+                    alpha = [Alpha[iAlphaRange], Alpha[iAlphaRange + 1]]
+                    alpha_diff = float(alpha[1] - alpha[0])
+                    nbeams = max(1, int(totalBeams * alpha_diff / 180.0))
+                    self._add_job(plan, filename + f'_f{iF}_a{iAlphaRange}', iF, freq, nbeams, alpha)
+
+        return plan
+
+    def _direct(self):
+        """在请求网格上直接计算的场景（加密网格不足以分辨载波时使用），第一次使用时创建"""
+        if self._direct_scenario is None:
+            self._direct_scenario = Scenario(self.filename + '_direct', self.source_depth, self.RD,
+                                             self.ran * 1000.0, self.bathymetry, self.sound_speed_profile,
+                                             self.bottom_params, shared=self.shared)
+        return self._direct_scenario
+
+    def _add_job(self, plan, filename, iF, freq, nbeams, alpha):
+        alpha = np.array([float(alpha[0]), float(alpha[1])])
+        beam = Beam(RunType=self.run_type, Nbeams=nbeams, alpha=alpha, box=self.box, deltas=self.deltas)
+        self.write_job(filename, freq, beam)
+        plan.add(filename, iF, nbeams * self.Rmax)
+
+    def run(self, frequencies, beams=None, angles=None, return_pressure=False, performance_mode=False):
+        """
+        在准备好的环境中计算声场
+
+        Args:
+            frequencies: 频率或频率列表 (Hz)
+            beams: 声线数量，None 表示按频率自动计算
+            angles: 掠射角范围 (下限, 上限)（度），None 表示自动分段
+            return_pressure: 是否返回复声压
+            performance_mode: 性能模式（减少角度分段数和声线数量）
+
+        Returns:
+            与 call_Bellhop_multi_freq 相同
+        """
+        if not isinstance(frequencies, (list, np.ndarray)):
+            frequencies = [frequencies]
+        grazing_low, grazing_high = angles if angles is not None else (None, None)
+        plan = self.plan(frequencies, performance_mode, beams, grazing_high, grazing_low)
+        cleanup = self.workspace is None or not self.workspace.keep
+        return _solve_plan(plan, return_pressure, cleanup)
+
+    def arrivals_job(self, frequencies, performance_mode=False, beam_number=None, grazing_high=None,
+                     grazing_low=None):
+        """
+        写出一次覆盖整个角度范围的到达结构计算作业，用于宽带合成，返回 ((文件名, 缓存键), 代价)
+
+        声线数按最高频率确定；.env 中写入频带中心频率，只影响体积衰减
+        """
+        frequencies = np.atleast_1d(np.asarray(frequencies, dtype=float))
+        fmax = float(frequencies.max())
+        freq = 0.5 * (float(frequencies.min()) + fmax)
+        n = next(self._plans)
+        filename = (self.filename if n == 0 else self.filename + str(n)) + '_arr'
+
         if beam_number is not None and beam_number > 0:
-            totalBeams = int(beam_number)
+            nbeams = int(beam_number)
         else:
+            nbeams = beamsnumber(fmax, self.Rmax, max(self.bathymetry.d))
             if performance_mode:
-                totalBeams = min(200, beamsnumber(freq, Rmax, max(bathymetry.d)))
-            else:
-                totalBeams = beamsnumber(freq, Rmax, max(bathymetry.d))
-        
-        # 计算角度范围
+                nbeams = min(200, nbeams)
+
         if grazing_low is not None and grazing_high is not None:
-            Alpha = [float(grazing_low), float(grazing_high)]
-            NAlphaRange = 1
+            alpha = np.array([float(grazing_low), float(grazing_high)])
         else:
-            if performance_mode:
-                NAlphaRange = 6
+            alpha = np.array([-90.0, 90.0])  # 与声场计算各角度分段合起来的范围相同
+
+        beam = Beam(RunType=ARRIVALS_RUN_TYPE, Nbeams=nbeams, alpha=alpha, box=self.box, deltas=self.deltas)
+        self.write_job(filename, freq, beam)
+        key = make_key('arrivals', self.binary, 'Pekeris profile', freq, self.sspB, self.bdy, self.pos, beam,
+                       self.cint, self.Rmax, self.sound_speed_profile, self.bathymetry, self.NZmax)
+        return (filename, key), nbeams * self.Rmax
+
+    def arrivals(self, frequencies, beams=None, angles=None, performance_mode=False):
+        """运行一次到达结构计算（命中结果缓存时跳过 bellhop），返回 ArrivalStore；参数与 run 相同"""
+        if not isinstance(frequencies, (list, np.ndarray)):
+            frequencies = [frequencies]
+        grazing_low, grazing_high = angles if angles is not None else (None, None)
+        job, cost = self.arrivals_job(frequencies, performance_mode, beams, grazing_high, grazing_low)
+        arrivals = _solve_arrivals_job(job)
+        if self.workspace is None or not self.workspace.keep:
+            _remove_job_files(job[0])
+        return arrivals
+
+    def run_broadband(self, frequencies, beams=None, angles=None, return_pressure=False, performance_mode=False):
+        """
+        宽带计算：运行一次到达结构计算，再合成所有频率的声压
+
+        参数与 run 相同，返回值与 call_Bellhop_multi_freq 相同（接收网格为请求网格）
+        """
+        if not isinstance(frequencies, (list, np.ndarray)):
+            frequencies = [frequencies]
+        arrivals = self.arrivals(frequencies, beams, angles, performance_mode)
+        return _collect_broadband(frequencies, arrivals, return_pressure)
+
+    def close(self):
+        """清理 prepare_scenario 创建的工作空间"""
+        if self.workspace is not None:
+            self.workspace.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def prepare_scenario(source_depth, receiver_depths, receiver_ranges, bathymetry, sound_speed_profile,
+                     bottom_params, dense_grid=False):
+    """
+    准备可重复使用的计算环境，之后通过 handle.run(freq, beams, angles) 计算多个频率或多组声线参数
+
+    Args:
+        source_depth: 声源深度数组 (m)，多个深度在同一次 bellhop 运行中计算
+        receiver_depths: 接收深度数组 (m)
+        receiver_ranges: 接收距离数组 (m)
+        bathymetry: 地形数据
+        sound_speed_profile: 声速剖面
+        bottom_params: 海底参数
+        dense_grid: 是否在加密网格上计算（见 call_Bellhop_multi_freq）
+
+    Returns:
+        Scenario，使用完毕后调用 close()（或使用 with 语句）清理工作空间
+    """
+    workspace = create_workspace('scenario')
+    try:
+        return Scenario(workspace.file('multi_freq'), source_depth, receiver_depths, receiver_ranges,
+                        bathymetry, sound_speed_profile, bottom_params, dense_grid, workspace)
+    except BaseException:
+        workspace.cleanup()
+        raise
+
+
+# 加密网格总点数上限（深度 × 距离）：按波长加密需要更多点时不使用加密网格，直接在请求的接收点上计算
+DENSE_MAX_POINTS = 201 * 8001
+# 加密网格每个波长至少的点数（大于 2，深度和距离间距严格小于半个波长，插值不混叠）
+DENSE_POINTS_PER_WAVELENGTH = 2.5
+
+# 到达结构计算的 Run Type：'A' 输出 ASCII 格式的 .arr 文件（'a' 为二进制格式，read_arrivals 同样支持）
+ARRIVALS_RUN_TYPE = 'A'
+
+
+def call_Bellhop_broadband(frequencies, source_depth, receiver_depths, receiver_ranges,
+                           bathymetry, sound_speed_profile, sediment, bottom_params,
+                           return_pressure=False, performance_mode=False,
+                           beam_number=None, grazing_high=None, grazing_low=None,
+                           workspace=None):
+    """
+    宽带计算：只运行一次 bellhop 到达结构计算，由到达结构合成所有频率的复声压和传输损失
+
+    频率很多时代替 call_Bellhop_multi_freq 的 频率 × 角度分段 次 bellhop 运行；
+    结果为射线（几何声学）近似，体积衰减按频带中心频率计算
+
+    参数和返回值与 call_Bellhop_multi_freq 相同
+    """
+    if not isinstance(frequencies, (list, np.ndarray)):
+        frequencies = [frequencies]
+    frequencies = np.array(frequencies)
+
+    own_workspace = workspace is None
+    if own_workspace:
+        workspace = create_workspace('broadband')
+    try:
+        scenario = Scenario(workspace.file('broadband'), source_depth, receiver_depths, receiver_ranges,
+                            bathymetry, sound_speed_profile, bottom_params, workspace=workspace)
+        return scenario.run_broadband(frequencies, beam_number, (grazing_low, grazing_high),
+                                      return_pressure, performance_mode)
+    finally:
+        if own_workspace:
+            workspace.cleanup()
+
+
+async def call_Bellhop_broadband_async(frequencies, source_depth, receiver_depths, receiver_ranges,
+                                       bathymetry, sound_speed_profile, sediment, bottom_params,
+                                       return_pressure=False, performance_mode=False,
+                                       beam_number=None, grazing_high=None, grazing_low=None,
+                                       workspace=None):
+    """call_Bellhop_broadband 的 asyncio 版本，参数和返回值相同"""
+    if not isinstance(frequencies, (list, np.ndarray)):
+        frequencies = [frequencies]
+    frequencies = np.array(frequencies)
+    loop = asyncio.get_running_loop()
+
+    own_workspace = workspace is None
+    if own_workspace:
+        workspace = await loop.run_in_executor(None, create_workspace, 'broadband')
+    try:
+        (filename, key), cost = await loop.run_in_executor(None, functools.partial(
+            _plan_broadband, workspace.file('broadband'), frequencies, source_depth, receiver_depths,
+            receiver_ranges, bathymetry, sound_speed_profile, bottom_params,
+            performance_mode, beam_number, grazing_high, grazing_low))
+
+        cache = get_result_cache()
+        if not await loop.run_in_executor(None, cache.get_file, key, '.arr', filename + '.arr'):
+            await run_bellhop_async(filename, bin_path=AtBinPath, output_ext='.arr')
+            await loop.run_in_executor(None, cache.put_file, key, '.arr', filename + '.arr')
+
+        arrivals = await loop.run_in_executor(None, read_arrivals, filename + '.arr')
+        return await loop.run_in_executor(None, _collect_broadband, frequencies, arrivals, return_pressure)
+    finally:
+        if own_workspace:
+            await loop.run_in_executor(None, workspace.cleanup)
+
+
+def call_Bellhop_time_wave(frequency, source_depth, receiver_depths, receiver_ranges,
+                           bathymetry, sound_speed_profile, sediment, bottom_params,
+                           receivers=None, sample_rate=None, source_signal=None, pulse='ricker',
+                           beam_number=None, grazing_high=None, grazing_low=None, workspace=None):
+    """
+    时域波形计算：运行一次到达结构计算，把声源信号按各到达的幅度和时延叠加到接收点（见 arrivals_to_waveform）
+
+    Args:
+        frequency: 声源中心频率 (Hz)，用于确定声线数和生成默认脉冲
+        receivers: 输出波形的接收点 [(深度 m, 距离 m), ...]，取接收网格上最近的点；None 表示所有网格点
+        sample_rate: 采样率 (Hz)，默认 8 倍中心频率
+        source_signal: 声源信号采样（采样率为 sample_rate），None 时按 pulse 生成
+        pulse: 默认脉冲类型 'ricker' 或 'tone'（见 source_pulse）
+        其余参数与 call_Bellhop_multi_freq 相同
+
+    Returns:
+        字典：sample_rate, time_start (s), receiver_depth, receiver_range (m),
+        waveforms（形状 (接收点数, 采样点数)）
+    """
+    own_workspace = workspace is None
+    if own_workspace:
+        workspace = create_workspace('time_wave')
+    try:
+        job, cost, finish = _plan_time_wave(workspace, frequency, source_depth, receiver_depths, receiver_ranges,
+                                            bathymetry, sound_speed_profile, bottom_params, receivers,
+                                            sample_rate, source_signal, pulse, beam_number, grazing_high,
+                                            grazing_low)
+        arrivals = _solve_arrivals_job(job)
+        if not workspace.keep:
+            _remove_job_files(job[0])
+    finally:
+        if own_workspace:
+            workspace.cleanup()
+    return finish(arrivals)
+
+
+def _plan_time_wave(workspace, frequency, source_depth, receiver_depths, receiver_ranges,
+                    bathymetry, sound_speed_profile, bottom_params,
+                    receivers=None, sample_rate=None, source_signal=None, pulse='ricker',
+                    beam_number=None, grazing_high=None, grazing_low=None):
+    """
+    写出时域波形的到达结构作业，返回 ((文件名, 缓存键), 代价, finish)；
+    finish(到达结构) 返回 call_Bellhop_time_wave 的结果
+    """
+    frequency = float(np.atleast_1d(frequency)[0])
+    sample_rate = float(sample_rate) if sample_rate else 8.0 * frequency
+    if source_signal is None:
+        source_signal = source_pulse(frequency, sample_rate, pulse)
+    scenario = Scenario(workspace.file('time_wave'), source_depth, receiver_depths, receiver_ranges,
+                        bathymetry, sound_speed_profile, bottom_params, workspace=workspace)
+    job, cost = scenario.arrivals_job([frequency], False, beam_number, grazing_high, grazing_low)
+
+    def finish(arrivals):
+        # 选取接收网格上最近的点（第一个声源深度）
+        depths = np.asarray(arrivals.pos.r.depth, dtype=float)
+        ranges = np.asarray(arrivals.pos.r.range, dtype=float)
+        if receivers is None:
+            ird, irr = np.divmod(np.arange(len(depths) * len(ranges)), len(ranges))
+        else:
+            points = np.asarray(receivers, dtype=float).reshape(-1, 2)
+            ird = np.abs(points[:, :1] - depths[None, :]).argmin(axis=1)
+            irr = np.abs(points[:, 1:] - ranges[None, :]).argmin(axis=1)
+        index = np.ravel_multi_index((np.zeros_like(ird), ird, irr), arrivals.shape)
+        t_start, waveforms = arrivals_to_waveform(arrivals, index, source_signal, sample_rate)
+        return {
+            'sample_rate': sample_rate,
+            'time_start': t_start,
+            'receiver_depth': depths[ird],
+            'receiver_range': ranges[irr],
+            'waveforms': waveforms
+        }
+    return job, cost, finish
+
+
+def _run_field_jobs(jobs):
+    """
+    在共享执行器上运行 (累加器, 作业下标, 文件名, 代价) 列表中的声场作业，
+    长作业先提交，完成一个叠加一个
+    """
+    jobs = sorted(jobs, key=lambda item: item[3], reverse=True)
+    for n, result in get_executor().as_completed(lambda item: _solve_field_job(item[2]), jobs):
+        jobs[n][0].add(jobs[n][1], result)
+
+
+def _accumulate(plans, cleanup=True):
+    """为每个计划建立累加器，返回 (累加器列表, 全部作业列表)，作业格式见 _run_field_jobs"""
+    accumulators = [FieldAccumulator(plan, cleanup=cleanup) for plan in plans]
+    jobs = [(accumulator, j, job, cost) for plan, accumulator in zip(plans, accumulators)
+            for j, (job, cost) in enumerate(zip(plan.jobs(), plan.costs))]
+    return accumulators, jobs
+
+
+def call_Bellhop_radials(frequencies, source_depth, receiver_depths, receiver_ranges, radials,
+                        return_pressure=False, performance_mode=False,
+                        beam_number=None, grazing_high=None, grazing_low=None,
+                        workspace=None, dense_grid=False):
+    """
+    N×2D 方位扇面计算：每个方位是一个独立的二维声场，所有方位的 频率 × 角度分段 作业
+    在共享执行器上统一调度（代价大的先运行），结果按方位堆叠
+
+    环境完全相同的方位只计算一次；声速剖面或地形相同的方位共享 .ssp/.bty 文件
+
+    Args:
+        radials: 方位列表，每个元素是字典：
+            'bearing': 方位角（度，正北顺时针）
+            'bathymetry', 'sound_speed_profile', 'bottom_params': 该方位的环境（同 call_Bellhop_multi_freq）
+        其余参数与 call_Bellhop_multi_freq 相同
+
+    Returns:
+        (bearings, Pos1, TL[, pressure])，TL 和 pressure 的第一维为方位，
+        其余维度与 call_Bellhop_multi_freq 的返回值相同
+    """
+    own_workspace = workspace is None
+    if own_workspace:
+        workspace = create_workspace('radials')
+    try:
+        jobs, finish = _plan_radials(workspace, frequencies, source_depth, receiver_depths, receiver_ranges,
+                                     radials, return_pressure, performance_mode, beam_number, grazing_high,
+                                     grazing_low, dense_grid)
+        _run_field_jobs(jobs)
+        return finish()
+    finally:
+        if own_workspace:
+            workspace.cleanup()
+
+
+def _plan_radials(workspace, frequencies, source_depth, receiver_depths, receiver_ranges, radials,
+                  return_pressure=False, performance_mode=False,
+                  beam_number=None, grazing_high=None, grazing_low=None, dense_grid=False):
+    """
+    写出方位扇面的所有作业，返回 (作业列表, finish)；作业格式见 _run_field_jobs，
+    全部作业完成后 finish() 返回 call_Bellhop_radials 的结果
+    """
+    if not isinstance(frequencies, (list, np.ndarray)):
+        frequencies = [frequencies]
+    frequencies = np.array(frequencies)
+    bearings = np.array([float(radial['bearing']) for radial in radials])
+
+    # 环境相同的方位只建立一个计划
+    shared = SharedInputs()
+    unique, plans = {}, []
+    source = []  # 每个方位对应的计划下标
+    for radial in radials:
+        env_key = content_key(radial['sound_speed_profile'], radial['bathymetry'], radial['bottom_params'])
+        if env_key not in unique:
+            unique[env_key] = len(plans)
+            scenario = Scenario(workspace.file(f'radial{len(plans)}'), source_depth, receiver_depths,
+                                receiver_ranges, radial['bathymetry'], radial['sound_speed_profile'],
+                                radial['bottom_params'], dense_grid, shared=shared, frequencies=frequencies)
+            plans.append(scenario.plan(frequencies, performance_mode, beam_number, grazing_high, grazing_low))
+        source.append(unique[env_key])
+    accumulators, jobs = _accumulate(plans, cleanup=not workspace.keep)
+
+    def finish():
+        results = [_collect_multi_freq(plan, accumulator, return_pressure)
+                   for plan, accumulator in zip(plans, accumulators)]
+        Pos1 = next((result[0] for result in results if result[0] is not None), None)
+        TL = np.stack([results[u][1] for u in source])
+        if return_pressure:
+            return bearings, Pos1, TL, np.stack([results[u][2] for u in source])
+        return bearings, Pos1, TL
+    return jobs, finish
+
+
+def radials_to_cartesian(bearings, ranges, field, x, y):
+    """
+    把按方位堆叠的场（[方位, ..., 距离]）插值到水平直角坐标网格
+
+    在方位和距离上双线性插值（全部网格点一次计算）；方位覆盖整圈时首尾相接，
+    否则扇面以外以及距离范围以外的点为 NaN
+
+    Args:
+        bearings: 方位角（度，正北顺时针）
+        ranges: 距离 (m)
+        field: 实数数组，第一维为方位，最后一维为距离，例如传输损失
+        x, y: 东向和北向坐标 (m)，相对声源
+
+    Returns:
+        数组 [..., len(y), len(x)]
+    """
+    bearings = np.asarray(bearings, dtype=float) % 360.0
+    ranges = np.asarray(ranges, dtype=float)
+    field = np.asarray(field, dtype=float)
+    order = np.argsort(bearings)
+    bearings, field = bearings[order], field[order]
+    X, Y = np.meshgrid(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    r = np.hypot(X, Y).ravel()
+    theta = np.degrees(np.arctan2(X, Y)).ravel() % 360.0
+
+    # 方位间隔（含首尾相接的间隔）中最大的一个明显大于其余时，视为扇面的缺口，从缺口之后开始排列；
+    # 否则视为整圈，把第一个方位加 360° 接到末尾
+    gaps = np.diff(np.append(bearings, bearings[0] + 360.0))
+    k = int(np.argmax(gaps))
+    periodic = len(bearings) > 2 and gaps[k] <= 1.5 * np.delete(gaps, k).max()
+    if not periodic:
+        bearings, field = np.roll(bearings, -(k + 1)), np.roll(field, -(k + 1), axis=0)
+    bearings = bearings[0] + (bearings - bearings[0]) % 360.0
+    if periodic:
+        bearings = np.append(bearings, bearings[0] + 360.0)
+        field = np.concatenate([field, field[:1]])
+    theta = bearings[0] + (theta - bearings[0]) % 360.0
+    ib = np.clip(np.searchsorted(bearings, theta, side='right') - 1, 0, max(len(bearings) - 2, 0))
+    if len(bearings) > 1:
+        wb = (theta - bearings[ib]) / (bearings[ib + 1] - bearings[ib])
+    else:
+        wb = np.where(np.isclose(theta, bearings[0]), 0.0, np.inf)
+    ir = np.clip(np.searchsorted(ranges, r, side='right') - 1, 0, max(len(ranges) - 2, 0))
+    if len(ranges) > 1:
+        wr = (r - ranges[ir]) / (ranges[ir + 1] - ranges[ir])
+    else:
+        wr = np.zeros_like(r)
+    ib1 = np.minimum(ib + 1, len(bearings) - 1)
+    ir1 = np.minimum(ir + 1, len(ranges) - 1)
+
+    # field 的中间维度移到最前，便于按 (方位, 距离) 下标取值
+    values = np.moveaxis(field, 0, -2)  # [..., 方位, 距离]
+    out = ((1 - wb) * (1 - wr) * values[..., ib, ir] + (1 - wb) * wr * values[..., ib, ir1]
+           + wb * (1 - wr) * values[..., ib1, ir] + wb * wr * values[..., ib1, ir1])
+    outside = (wb < -1e-9) | (wb > 1 + 1e-9) | (wr < -1e-9) | (wr > 1 + 1e-9)
+    out[..., outside] = np.nan
+    return out.reshape(out.shape[:-1] + X.shape)
+
+
+def call_Bellhop_reciprocal(frequencies, source_positions, receivers, bathymetry, sound_speed_profile,
+                            sediment, bottom_params, return_pressure=False, performance_mode=False,
+                            beam_number=None, grazing_high=None, grazing_low=None,
+                            workspace=None, n_depths=None, n_ranges=None):
+    """
+    利用声场互易性计算大量声源位置到少量水听器的传输损失
+
+    交换声源和接收点的角色：以每个水听器为声源，在以水听器为原点的环境中计算一次加密网格声场
+    （声源位置在水听器两侧时分别计算正向和反向环境，同一距离上的水听器作为多个声源深度共用一次运行），
+    再对所有声源位置一次双线性插值；计算量随水听器数而不是声源位置数增长
+
+    Args:
+        frequencies: 频率或频率列表 (Hz)
+        source_positions: 声源位置 [(深度 m, 距离 m), ...]
+        receivers: 水听器位置 [(深度 m, 距离 m), ...]
+        n_depths, n_ranges: 每次运行的加密网格点数（见 dense_receiver_grid），
+            默认使深度和距离间距小于最高频率的半个波长；网格点数超过 DENSE_MAX_POINTS 或间距不足以
+            插值时，该次运行直接在各声源位置上计算（bellhop 不规则网格选项）
+        其余参数与 call_Bellhop_multi_freq 相同
+
+    Returns:
+        (TL[, pressure])，形状 [频率, 水听器, 声源位置]
+    """
+    own_workspace = workspace is None
+    if own_workspace:
+        workspace = create_workspace('reciprocal')
+    try:
+        jobs, finish = _plan_reciprocal(workspace, frequencies, source_positions, receivers, bathymetry,
+                                        sound_speed_profile, bottom_params, return_pressure, performance_mode,
+                                        beam_number, grazing_high, grazing_low, n_depths, n_ranges)
+        _run_field_jobs(jobs)
+        return finish()
+    finally:
+        if own_workspace:
+            workspace.cleanup()
+
+
+def _plan_reciprocal(workspace, frequencies, source_positions, receivers, bathymetry, sound_speed_profile,
+                     bottom_params, return_pressure=False, performance_mode=False,
+                     beam_number=None, grazing_high=None, grazing_low=None, n_depths=None, n_ranges=None):
+    """
+    写出互易计算的所有作业，返回 (作业列表, finish)；作业格式见 _run_field_jobs，
+    全部作业完成后 finish() 返回 call_Bellhop_reciprocal 的结果
+    """
+    if not isinstance(frequencies, (list, np.ndarray)):
+        frequencies = [frequencies]
+    frequencies = np.array(frequencies)
+    sources = np.asarray(source_positions, dtype=float).reshape(-1, 2)
+    receivers = np.asarray(receivers, dtype=float).reshape(-1, 2)
+
+    # 同一距离、同一侧的水听器共用一次运行（水听器深度作为声源深度）
+    shared = SharedInputs()
+    runs = []
+    for r0 in np.unique(receivers[:, 1]):
+        hydrophones = np.flatnonzero(receivers[:, 1] == r0)
+        depths, isd = np.unique(receivers[hydrophones, 0], return_inverse=True)
+        for reverse in (False, True):
+            selected = np.flatnonzero(sources[:, 1] < r0 if reverse else sources[:, 1] >= r0)
+            if len(selected) == 0:
+                continue
+            # 互易场中的接收距离；与水听器重合的位置避开 r=0
+            ranges = np.maximum(np.abs(sources[selected, 1] - r0), 1.0)
+            frame_bathymetry, frame_ssp = _reciprocal_environment(bathymetry, sound_speed_profile,
+                                                                  r0, reverse, ranges.max())
+            grid_depths, grid_ranges = dense_receiver_grid(sources[selected, 0], ranges, frame_bathymetry,
+                                                           n_depths, n_ranges, frequencies, sound_speed_profile)
+            name = workspace.file(f'reciprocal{len(runs)}')
+            if (len(grid_depths) * len(grid_ranges) <= DENSE_MAX_POINTS
+                    and _resolves_grid(grid_depths, grid_ranges, frequencies, sound_speed_profile)):
+                scenario = Scenario(name, depths, grid_depths, grid_ranges, frame_bathymetry, frame_ssp,
+                                    bottom_params, shared=shared)
+                order = None
             else:
-                NAlphaRange = 12
-            Alpha = alphadiv(NAlphaRange, Rmax)
-        
-        # 为当前频率创建多个角度分段文件
-        if len(Alpha) == 2 and NAlphaRange == 1:
-            # 用户指定角度范围
-            alpha = np.array([float(Alpha[0]), float(Alpha[1])])
-            nbeams = totalBeams
-            beam = Beam(RunType=run_type, Nbeams=nbeams, alpha=alpha, box=box, deltas=deltas)
-            filenameI = filename + f'_f{iF}_a0'
-            write_env(filenameI + '.env', 'BELLHOP', 'Pekeris profile', freq, sspB, bdy, pos, beam, cint_obj, Rmax)
-            write_ssp(filenameI, sound_speed_profile, bathymetry, NZmax)
-            write_bathy(filenameI, bathymetry)
-            Filenames.append(filenameI)
+                # 加密网格过大或不足以插值：直接计算各声源位置（接收距离递增）
+                print(f"Warning: reciprocal grid of {len(grid_depths)} x {len(grid_ranges)} points cannot be "
+                      f"used, computing the {len(selected)} source positions directly")
+                order = np.lexsort((sources[selected, 0], ranges))
+                scenario = Scenario(name, depths, sources[selected, 0][order], ranges[order], frame_bathymetry,
+                                    frame_ssp, bottom_params, shared=shared, irregular=True)
+            plan = scenario.plan(frequencies, performance_mode, beam_number, grazing_high, grazing_low)
+            runs.append((plan, hydrophones, isd, selected, ranges, order))
+    accumulators, jobs = _accumulate([run[0] for run in runs], cleanup=not workspace.keep)
+
+    def finish():
+        # 声源位置处的声压即该位置到水听器的声压；插值前去掉沿距离的载波
+        pressure = np.zeros((len(frequencies), len(receivers), len(sources)), dtype=complex)
+        c_ref = _reference_speed(sound_speed_profile)
+        for u, accumulator in enumerate(accumulators):
+            plan, hydrophones, isd, selected, ranges, order = runs[u]
+            for iF, (pos, field) in accumulator.fields().items():
+                if order is None:
+                    values = sample_demodulated(field[0], pos.r.depth, pos.r.range, sources[selected, 0], ranges,
+                                                2.0 * np.pi * frequencies[iF] / c_ref)
+                else:
+                    values = np.empty((field.shape[1], len(selected)), dtype=complex)
+                    values[:, order] = field[0][:, 0, :]
+                pressure[iF, hydrophones[:, None], selected[None, :]] = values[isd]
+
+        TL = calculate_transmission_loss(pressure)
+        if return_pressure:
+            return TL, pressure
+        return TL
+    return jobs, finish
+
+
+def call_Bellhop_points(frequencies, source_depth, receiver_points, bathymetry, sound_speed_profile,
+                        sediment, bottom_params, return_pressure=False, performance_mode=False,
+                        beam_number=None, grazing_high=None, grazing_low=None,
+                        workspace=None, irregular=True, n_depths=None, n_ranges=None):
+    """
+    计算散点接收位置的声场，不计算完整的 深度 × 距离 网格
+
+    默认使用 bellhop 的不规则网格选项（Run Type 第 5 个字符为 'I'），每个接收点单独计算；
+    irregular=False 时在覆盖所有接收点的最小网格上计算：各点深度 × 距离的组合不多时直接使用这些深度和距离
+    （取值精确），否则使用包围范围内的均匀网格，所有点一次双线性插值；均匀网格点数超过 DENSE_MAX_POINTS
+    或间距不足以插值时改用不规则网格选项
+
+    Args:
+        receiver_points: 接收点 [(深度 m, 距离 m), ...]
+        irregular: 是否使用不规则网格选项
+        n_depths, n_ranges: 均匀覆盖网格的深度和距离点数（默认使间距小于最高频率的半个波长）
+        其余参数与 call_Bellhop_multi_freq 相同
+
+    Returns:
+        (Pos1, TL[, pressure])，形状固定为 [频率, 声源深度, 接收点]
+    """
+    own_workspace = workspace is None
+    if own_workspace:
+        workspace = create_workspace('points')
+    try:
+        jobs, finish = _plan_points(workspace, frequencies, source_depth, receiver_points, bathymetry,
+                                    sound_speed_profile, bottom_params, return_pressure, performance_mode,
+                                    beam_number, grazing_high, grazing_low, irregular, n_depths, n_ranges)
+        _run_field_jobs(jobs)
+        return finish()
+    finally:
+        if own_workspace:
+            workspace.cleanup()
+
+
+def _plan_points(workspace, frequencies, source_depth, receiver_points, bathymetry, sound_speed_profile,
+                 bottom_params, return_pressure=False, performance_mode=False,
+                 beam_number=None, grazing_high=None, grazing_low=None,
+                 irregular=True, n_depths=None, n_ranges=None):
+    """
+    写出散点接收的所有作业，返回 (作业列表, finish)；作业格式见 _run_field_jobs，
+    全部作业完成后 finish() 返回 call_Bellhop_points 的结果
+    """
+    if not isinstance(frequencies, (list, np.ndarray)):
+        frequencies = [frequencies]
+    frequencies = np.array(frequencies)
+    points = np.asarray(receiver_points, dtype=float).reshape(-1, 2)
+    # bellhop 要求接收距离递增
+    order = np.lexsort((points[:, 0], points[:, 1]))
+
+    if not irregular:
+        grid = _covering_grid(points, frequencies, sound_speed_profile, n_depths, n_ranges)
+        if grid is None:
+            print("Warning: covering grid is too large or too coarse, computing the receiver points directly")
+            irregular = True
+    if irregular:
+        scenario = Scenario(workspace.file('points'), source_depth, points[order, 0], points[order, 1],
+                            bathymetry, sound_speed_profile, bottom_params, irregular=True)
+    else:
+        scenario = Scenario(workspace.file('points'), source_depth, grid[0], grid[1],
+                            bathymetry, sound_speed_profile, bottom_params)
+    plan = scenario.plan(frequencies, performance_mode, beam_number, grazing_high, grazing_low)
+    (accumulator,), jobs = _accumulate([plan], cleanup=not workspace.keep)
+
+    def finish():
+        fields = accumulator.fields()
+        pressure = np.zeros((len(frequencies), len(plan.sd), len(points)), dtype=complex)
+        Pos1 = None
+        if irregular:
+            for iF, (Pos1, field) in fields.items():
+                pressure[iF][:, order] = field[0][:, 0, :]
+        elif fields:
+            c_ref = _reference_speed(sound_speed_profile)
+            for iF, (Pos1, field) in fields.items():
+                pressure[iF] = sample_demodulated(field[0], Pos1.r.depth, Pos1.r.range, points[:, 0], points[:, 1],
+                                                  2.0 * np.pi * frequencies[iF] / c_ref)
+        if Pos1 is not None:
+            # 返回的位置信息按接收点排列
+            Pos1 = Pos(Source(Pos1.s.depth), Dom(points[:, 1], points[:, 0]))
+
+        TL = calculate_transmission_loss(pressure)
+        if return_pressure:
+            return Pos1, TL, pressure
+        return Pos1, TL
+    return jobs, finish
+
+
+def _covering_grid(points, frequencies, sound_speed_profile, n_depths=None, n_ranges=None, max_ratio=4):
+    """
+    覆盖所有接收点的最小计算网格 (深度, 距离)，单位 m
+
+    各点深度 × 距离的组合不超过点数的 max_ratio 倍时直接使用这些深度和距离；
+    否则在包围范围内取均匀网格（默认间距小于最高频率的半个波长）。
+    均匀网格点数超过 DENSE_MAX_POINTS 或间距不足以插值时返回 None
+    """
+    depths, ranges = np.unique(points[:, 0]), np.unique(points[:, 1])
+    if len(depths) * len(ranges) <= max_ratio * len(points):
+        return depths, ranges
+    if n_depths is None:
+        n_depths = min(int(os.environ.get('BELLHOP_DENSE_NRD', 201)), len(depths))
+        if len(depths) > 1:
+            n_depths = max(n_depths, _wavelength_npoints(depths[-1] - depths[0], frequencies, sound_speed_profile))
+    n_ranges = n_ranges or _wavelength_npoints(ranges[-1] - ranges[0], frequencies, sound_speed_profile)
+    if n_depths * n_ranges > DENSE_MAX_POINTS:
+        return None
+    grid = (np.linspace(depths[0], depths[-1], n_depths), np.linspace(ranges[0], ranges[-1], n_ranges))
+    return grid if _resolves_grid(grid[0], grid[1], frequencies, sound_speed_profile) else None
+
+
+def _reference_speed(sound_speed_profile):
+    """解调载波使用的参考声速 (m/s)：所有剖面声速的中位数"""
+    return float(np.median(np.concatenate([np.asarray(p.c, dtype=float) for p in sound_speed_profile])))
+
+
+def _min_wavelength(frequencies, sound_speed_profile):
+    """最高频率按最小声速的波长 (m)"""
+    c_min = min(float(np.min(p.c)) for p in sound_speed_profile)
+    return c_min / float(np.max(frequencies))
+
+
+def _wavelength_npoints(span, frequencies, sound_speed_profile):
+    """跨度 span (m) 上间距不超过最高频率 1/DENSE_POINTS_PER_WAVELENGTH 个波长所需的点数"""
+    wavelength = _min_wavelength(frequencies, sound_speed_profile)
+    return int(np.ceil(DENSE_POINTS_PER_WAVELENGTH * span / wavelength)) + 1
+
+
+def _resolves_grid(grid_depths, grid_ranges, frequencies, sound_speed_profile):
+    """网格 (m) 的深度和距离间距是否都不超过最高频率 1/DENSE_POINTS_PER_WAVELENGTH 个波长（插值不混叠）"""
+    spacing = max(float(np.max(np.diff(grid))) if len(grid) > 1 else 0.0
+                  for grid in (np.asarray(grid_depths, dtype=float), np.asarray(grid_ranges, dtype=float)))
+    return spacing * DENSE_POINTS_PER_WAVELENGTH <= _min_wavelength(frequencies, sound_speed_profile) * (1.0 + 1e-9)
+
+
+def _reciprocal_environment(bathymetry, sound_speed_profile, r0, reverse, rmax):
+    """
+    以距离 r0 (m) 处为原点的环境：reverse=False 时朝距离增大的方向，True 时朝原点方向（地形翻转）
+
+    地形在原点处线性插值，不足 rmax (m) 时按末端深度延伸；距离相关声速剖面随地形点重排，
+    原点处取相邻两个剖面的线性插值（深度点不同时取最近的剖面）
+    """
+    r = np.asarray(bathymetry.r, dtype=float)
+    d = np.asarray(bathymetry.d, dtype=float)
+    if reverse:
+        ranges, d = r0 / 1000.0 - r[::-1], d[::-1]
+    else:
+        ranges = r - r0 / 1000.0
+    keep = ranges > 0
+    new_r = np.concatenate([[0.0], ranges[keep]])
+    new_d = np.concatenate([[np.interp(0.0, ranges, d)], d[keep]])
+    if new_r[-1] < rmax / 1000.0:
+        new_r = np.append(new_r, rmax / 1000.0)
+        new_d = np.append(new_d, new_d[-1])
+    frame_bathymetry = copy.copy(bathymetry)
+    frame_bathymetry.r, frame_bathymetry.d = new_r, new_d
+
+    if len(sound_speed_profile) == 1:
+        return frame_bathymetry, sound_speed_profile
+    # 剖面 k 位于第 k 个地形点；新的每个地形点取对应的剖面
+    nprof = len(sound_speed_profile)
+    origin = (r0 / 1000.0 - new_r) if reverse else (r0 / 1000.0 + new_r)
+    frame_ssp = []
+    for ro in origin:
+        k = int(np.clip(np.searchsorted(r[:nprof], ro), 1, nprof - 1))
+        left, right = sound_speed_profile[k - 1], sound_speed_profile[k]
+        w = float(np.clip((ro - r[k - 1]) / (r[k] - r[k - 1]), 0.0, 1.0))
+        if w in (0.0, 1.0) or not np.array_equal(left.z, right.z):
+            frame_ssp.append(left if w < 0.5 else right)
         else:
-            # 多个角度分段
-            for iAlphaRange in range(len(Alpha) - 1):
-                alpha = np.array([float(Alpha[iAlphaRange]), float(Alpha[iAlphaRange + 1])])
-                alpha_diff = float(alpha[1] - alpha[0])
-                nbeams = int(totalBeams * alpha_diff / 180.0)
-                nbeams = max(1, nbeams)
-                beam = Beam(RunType=run_type, Nbeams=nbeams, alpha=alpha, box=box, deltas=deltas)
-                filenameI = filename + f'_f{iF}_a{iAlphaRange}'
-                write_env(filenameI + '.env', 'BELLHOP', 'Pekeris profile', freq, sspB, bdy, pos, beam, cint_obj, Rmax)
-                write_ssp(filenameI, sound_speed_profile, bathymetry, NZmax)
-                write_bathy(filenameI, bathymetry)
-                Filenames.append(filenameI)
-    
-    # 并行执行所有频率和角度的计算
-    pool = Pool(min(len(Filenames), 8))  # 限制并行进程数
-    pool.map(call_Bellhop_p, Filenames)
-    pool.close()
-    pool.join()
-    
-    # 读取和组合结果
+            profile = copy.copy(left)
+            profile.c = (1 - w) * np.asarray(left.c, dtype=float) + w * np.asarray(right.c, dtype=float)
+            frame_ssp.append(profile)
+    return frame_bathymetry, frame_ssp
+
+
+def _solve_plan(plan, return_pressure=False, cleanup=True):
+    """运行计划中的作业，完成一个叠加一个，返回传输损失（及声压）"""
+    # 并行执行所有频率和角度的计算（命中结果缓存的作业不启动 bellhop），
+    # 每个作业完成后立即叠加到累加器，其余作业继续运行
+    accumulator = FieldAccumulator(plan, cleanup=cleanup)
+    for j, result in get_executor().as_completed(_solve_field_job, plan.jobs()):  # 共享执行器，全局并发上限
+        accumulator.add(j, result)
+
+    return _collect_multi_freq(plan, accumulator, return_pressure)
+
+
+def _read_field_job(filename):
+    """读取作业的 .shd 结果，返回 (pos, pressure)；读取失败返回 None"""
+    try:
+        [x, x, x, x, pos, pressure] = read_shd(filename + '.shd')
+    except Exception as e:
+        print(f"Warning: Failed to read {filename}.shd: {e}")
+        return None
+    return pos, pressure
+
+
+def _solve_field_job(filename):
+    """
+    运行一个 频率×角度分段 作业，返回 (pos, pressure)
+
+    在执行器的工作线程中运行，输出由该线程解析，数组直接返回给调用方（同一进程，无需序列化）；
+    结果缓存按频率保存叠加后的声场，命中的频率在生成计划时就不产生作业
+    """
+    run_bellhop(filename, bin_path=AtBinPath, output_ext='.shd')
+    return _read_field_job(filename)
+
+
+async def _solve_field_job_async(filename):
+    """_solve_field_job 的 asyncio 版本"""
+    loop = asyncio.get_running_loop()
+    await run_bellhop_async(filename, bin_path=AtBinPath, output_ext='.shd')
+    return await loop.run_in_executor(None, _read_field_job, filename)
+
+
+def _solve_rays_job(job):
+    """运行射线追踪作业并读取 .ray 文件；命中结果缓存时直接返回缓存的射线，不运行 bellhop 也不解析 .ray"""
+    filename, key = job
+    cache = get_result_cache()
+    rays = cache.get_rays(key)
+    if rays is None:
+        run_bellhop(filename, bin_path=AtBinPath, output_ext='.ray')
+        rays = get_rays(filename + '.ray')
+        cache.put_rays(key, rays)
+    return rays
+
+
+def _solve_arrivals_job(job):
+    """运行到达结构计算作业并读取 .arr 文件；命中结果缓存时跳过 bellhop"""
+    filename, key = job
+    cache = get_result_cache()
+    if not cache.get_file(key, '.arr', filename + '.arr'):
+        run_bellhop(filename, bin_path=AtBinPath, output_ext='.arr')
+        cache.put_file(key, '.arr', filename + '.arr')
+    return read_arrivals(filename + '.arr')
+
+
+def _collect_broadband(frequencies, arrivals, return_pressure=False):
+    """由到达结构合成各频率的声压，返回格式与 _collect_multi_freq 相同"""
+    pressure = arrivals_to_pressure(arrivals, frequencies)  # [频率, 声源深度, 接收深度, 接收距离]
+    TL_multi = calculate_transmission_loss(pressure)
     if return_pressure:
-        Pressure = np.zeros([1, Nfreq, len(RD), len(ran)], dtype=complex)
-    TL_multi = np.zeros([Nfreq, len(RD), len(ran)])
-    
+        return arrivals.pos, TL_multi, pressure
+    return arrivals.pos, TL_multi
+
+
+def _collect_multi_freq(plan, accumulator, return_pressure=False):
+    """
+    由累加器中各频率叠加后的声压计算传输损失
+
+    TL 和声压的形状固定为 [频率, 声源深度, 接收深度, 接收距离]，单频率、单声源深度时也不去掉对应的维；
+    输出 JSON 时才由 format_output_data 去掉长度为 1 的频率和声源深度维
+    """
+    Nfreq = len(plan.frequencies)
+    Nsd = len(plan.sd)
+    RD, ran = plan.RD, plan.ran
+    fields = accumulator.fields()  # 缺少频率时抛出 BellhopRunError
+
+    Pressure = np.zeros([Nfreq, Nsd, len(RD), len(ran)], dtype=complex)
     Pos1 = None
     for iF in range(Nfreq):
-        pressure_sum = None
-        
-        # 读取当前频率的所有角度分段结果
-        freq_filenames = [f for f in Filenames if f.endswith(f'_f{iF}_a0') or f'_f{iF}_a' in f]
-        freq_filenames = [f for f in Filenames if f'_f{iF}_a' in f]
-        
-        for filenameI in freq_filenames:
-            try:
-                [x, x, x, x, Pos1, pressure] = read_shd(filenameI + '.shd')
-                if pressure_sum is None:
-                    pressure_sum = pressure.copy()
-                else:
-                    pressure_sum = pressure_sum + pressure
-            except Exception as e:
-                print(f"Warning: Failed to read {filenameI}.shd: {e}")
-                continue
-        
-        if pressure_sum is not None:
-            # 计算传输损失
-            TL_multi[iF, :, :] = calculate_transmission_loss(pressure_sum)
-            
-            if return_pressure:                Pressure[0, iF, :, :] = pressure_sum[0, 0, :, :]
-    
+        Pos1, pressure_sum = fields[iF]
+        Pressure[iF] = pressure_sum[0]  # .shd 的方位维只有一个
+    TL_multi = calculate_transmission_loss(Pressure)
+
     if return_pressure:
-        Pressure = np.squeeze(Pressure)
         return Pos1, TL_multi, Pressure
-    else:
-        return Pos1, TL_multi
+    return Pos1, TL_multi
+
+
+# 作业的临时文件，分段结果叠加后即可删除
+JOB_FILE_EXTS = ('.env', '.ssp', '.bty', '.shd', '.arr', '.prt')
+
+
+def _remove_job_files(filename):
+    """删除一个作业的临时文件"""
+    for ext in JOB_FILE_EXTS:
+        try:
+            os.remove(filename + ext)
+        except OSError:
+            pass
+
+
+class FieldAccumulator:
+    """
+    按频率叠加角度分段声压的累加器
+
+    每个作业完成后立即原位叠加（每个频率一个 complex128 数组，收到第一个分段时分配），
+    随后删除该分段的临时文件；分段声压不再被引用，峰值内存为累加器加上正在处理的分段
+    """
+
+    def __init__(self, plan, cleanup=True):
+        self.plan = plan
+        self.cleanup = cleanup
+        self.sums = {}    # 频率下标 -> 叠加后的声压
+        self.pos = {}     # 频率下标 -> pos
+        self.counts = {}  # 频率下标 -> 已叠加的分段数
+
+    def add(self, j, result):
+        """叠加第 j 个作业的结果 (pos, pressure)；None 表示该分段读取失败"""
+        if result is not None:
+            pos, pressure = result
+            iF = self.plan.freq_index[j]
+            total = self.sums.get(iF)
+            if total is None:
+                total = self.sums[iF] = np.zeros(pressure.shape, dtype=complex)  # .shd 数据为 complex64，叠加使用双精度
+            np.add(total, pressure, out=total)
+            self.pos[iF] = pos
+            self.counts[iF] = self.counts.get(iF, 0) + 1
+        if self.cleanup:
+            _remove_job_files(self.plan.filenames[j])
+
+    def fields(self):
+        """
+        返回 {频率下标: (pos, pressure)}（请求的接收网格）
+
+        所有角度分段都成功的频率写入按接收网格复用的声场缓存（散点接收只按接收点精确缓存）；
+        加密网格上的结果取回请求网格。有频率的所有角度分段都失败时抛出 BellhopRunError
+        """
+        plan = self.plan
+        fields = dict(plan.cached)
+        cache = get_result_cache()
+        for iF, pressure_sum in self.sums.items():
+            pos = self.pos[iF]
+            if self.counts[iF] == plan.freq_index.count(iF):
+                if plan.irregular:
+                    cache.put_field(plan.field_keys[iF], pos, pressure_sum)
+                else:
+                    cache.put_grid_field(plan.field_keys[iF], pos, pressure_sum, dense=plan.dense)
+            if plan.dense:
+                pos, pressure_sum = sample_field(pos, pressure_sum, plan.RD, plan.ran * 1000.0, plan.wavenumbers[iF])
+            fields[iF] = (pos, pressure_sum)
+
+        missing = [iF for iF in range(len(plan.frequencies)) if iF not in fields]
+        if missing:
+            failed = ', '.join(f'{plan.frequencies[iF]:g}' for iF in missing)
+            raise BellhopRunError(plan.files_for(missing[0])[0], 'no_output',
+                                  detail=f'no field produced for frequencies {failed} Hz')
+        return fields
+
+
+def dense_receiver_grid(receiver_depths, receiver_ranges, bathymetry, n_depths=None, n_ranges=None,
+                        frequencies=None, sound_speed_profile=None):
+    """
+    规范化的加密接收网格：深度从 0 到最大水深，距离从 rmax/n_ranges（避开 r=0）到地形范围，均匀分布，
+    同一环境的请求得到相同的网格；请求的接收点从网格中切片或去掉载波后插值得到
+
+    Args:
+        receiver_depths: 请求的接收深度 (m)
+        receiver_ranges: 请求的接收距离 (m)
+        bathymetry: 地形（r 单位 km，d 单位 m）
+        n_depths, n_ranges: 均匀网格点数，默认 BELLHOP_DENSE_NRD (201) / BELLHOP_DENSE_NRR (1001)
+        frequencies, sound_speed_profile: 给出时默认点数至少使深度和距离间距不超过最高频率
+            1/DENSE_POINTS_PER_WAVELENGTH 个波长（可能超过 DENSE_MAX_POINTS，由调用方决定是否使用）
+
+    Returns:
+        (depths, ranges)，单位 m
+    """
+    zmax = max(float(np.max(receiver_depths)), float(np.max(bathymetry.d)))
+    rmax = max(float(np.max(receiver_ranges)), float(np.max(bathymetry.r)) * 1000.0)
+    if n_depths is None:
+        n_depths = int(os.environ.get('BELLHOP_DENSE_NRD', 201))
+        if frequencies is not None:
+            n_depths = max(n_depths, _wavelength_npoints(zmax, frequencies, sound_speed_profile))
+    if n_ranges is None:
+        n_ranges = int(os.environ.get('BELLHOP_DENSE_NRR', 1001))
+        if frequencies is not None:
+            n_ranges = max(n_ranges, _wavelength_npoints(rmax, frequencies, sound_speed_profile))
+    rmin = min(float(np.min(receiver_ranges)), rmax / n_ranges)
+    return np.linspace(0.0, zmax, n_depths), np.linspace(rmin, rmax, n_ranges)
+
+
+async def call_Bellhop_multi_freq_async(frequencies, source_depth, receiver_depths, receiver_ranges,
+                                        bathymetry, sound_speed_profile, sediment, bottom_params,
+                                        return_pressure=False, performance_mode=False,
+                                        beam_number=None, grazing_high=None, grazing_low=None,
+                                        workspace=None, dense_grid=False):
+    """
+    call_Bellhop_multi_freq 的 asyncio 版本，参数和返回值相同
+
+    bellhop 通过 asyncio.create_subprocess_exec 运行，文件写入和 .shd 解析放到线程中执行，
+    不阻塞事件循环；并发子进程数受全局上限约束
+    """
+    if not isinstance(frequencies, (list, np.ndarray)):
+        frequencies = [frequencies]
+    frequencies = np.array(frequencies)
+    loop = asyncio.get_running_loop()
+
+    own_workspace = workspace is None
+    if own_workspace:
+        workspace = await loop.run_in_executor(None, create_workspace, 'multi_freq')
+    try:
+        plan = await loop.run_in_executor(None, functools.partial(
+            _plan_multi_freq, workspace.file('multi_freq'), frequencies, source_depth, receiver_depths,
+            receiver_ranges, bathymetry, sound_speed_profile, bottom_params,
+            performance_mode, beam_number, grazing_high, grazing_low, dense_grid))
+
+        accumulator = FieldAccumulator(plan, cleanup=not workspace.keep)
+        await _fold_as_completed([_solve_field_job_async(job) for job in plan.jobs()], accumulator.add)
+
+        return await loop.run_in_executor(None, _collect_multi_freq, plan, accumulator, return_pressure)
+    finally:
+        if own_workspace:
+            await loop.run_in_executor(None, workspace.cleanup)
+
+
+async def _fold_as_completed(coros, fold):
+    """
+    并发运行所有作业，每个作业完成后立即调用 fold(下标, 结果)；
+    任一失败时取消其余作业并等待其结束后再抛出
+    """
+    async def indexed(j, coro):
+        return j, await coro
+
+    tasks = [asyncio.ensure_future(indexed(j, c)) for j, c in enumerate(coros)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            j, result = await next_done
+            fold(j, result)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def call_Bellhop_batch(scenarios):
+    """
+    批量计算：把所有场景展开为 bellhop 作业（频率 × 角度分段、方位扇面/互易/散点接收的各个运行、
+    到达结构和射线追踪），在共享执行器上统一调度，代价（声线数 × 最大距离）大的作业先运行，
+    最后按场景重新组装结果
+
+    Args:
+        scenarios: 场景列表，每个元素是字典，下列键均可选：
+            'field': call_Bellhop_multi_freq 的关键字参数；其中 broadband=True 时改用 call_Bellhop_broadband
+            'radials': call_Bellhop_radials 的关键字参数
+            'reciprocal': call_Bellhop_reciprocal 的关键字参数
+            'points': call_Bellhop_points 的关键字参数
+            'time_wave': call_Bellhop_time_wave 的关键字参数
+            'rays': call_Bellhop_Rays 的关键字参数；None 表示不计算对应结果
+
+    Returns:
+        与 scenarios 顺序一致的列表，每个元素是字典，键与场景相同（'field' 和 'rays' 总是存在），
+        值为对应函数的返回值；某个场景的某项失败时对应位置为异常对象，不影响其他场景
+    """
+    planners = {'radials': _plan_radials, 'reciprocal': _plan_reciprocal, 'points': _plan_points}
+    results = []
+    workspaces = []
+    finishers = []  # (场景下标, 结果键, finish)；finish 的参数为该键下作业的结果（到达结构）或 None
+    jobs = []    # (场景下标, 结果键, 求解函数, 作业（声场为文件名，其余为 (文件名, 缓存键)）, 代价, 声场作业的 (累加器, 作业下标))
+    try:
+        for i, scenario in enumerate(scenarios):
+            results.append({'field': None, 'rays': None})
+            workspace = create_workspace(f'batch{i}')
+            workspaces.append(workspace)
+
+            field_kwargs = scenario.get('field')
+            if field_kwargs:
+                field_kwargs = dict(field_kwargs)
+                field_kwargs.pop('sediment', None)
+                return_pressure = field_kwargs.pop('return_pressure', False)
+                frequencies = field_kwargs.pop('frequencies')
+                if not isinstance(frequencies, (list, np.ndarray)):
+                    frequencies = [frequencies]
+                frequencies = np.array(frequencies)
+                try:
+                    if field_kwargs.pop('broadband', False):
+                        # 宽带场景只有一个到达结构作业
+                        job, cost = _plan_broadband(workspace.file('broadband'), frequencies, **field_kwargs)
+                        finishers.append((i, 'field', functools.partial(_collect_broadband, frequencies,
+                                                                        return_pressure=return_pressure)))
+                        jobs.append((i, 'field', _solve_arrivals_job, job, cost, None))
+                    else:
+                        plan = _plan_multi_freq(workspace.file('multi_freq'), frequencies, **field_kwargs)
+                        (accumulator,), field_jobs = _accumulate([plan], cleanup=not workspace.keep)
+                        finishers.append((i, 'field', lambda _, plan=plan, accumulator=accumulator,
+                                          return_pressure=return_pressure:
+                                          _collect_multi_freq(plan, accumulator, return_pressure)))
+                        jobs.extend((i, 'field', _solve_field_job, job, cost, (accumulator, j))
+                                    for accumulator, j, job, cost in field_jobs)
+                except Exception as e:
+                    results[i]['field'] = e
+
+            for name, planner in planners.items():
+                kwargs = scenario.get(name)
+                if not kwargs:
+                    continue
+                results[i][name] = None
+                kwargs = dict(kwargs)
+                kwargs.pop('sediment', None)
+                try:
+                    field_jobs, finish = planner(workspace, **kwargs)
+                    finishers.append((i, name, lambda _, finish=finish: finish()))
+                    jobs.extend((i, name, _solve_field_job, job, cost, (accumulator, j))
+                                for accumulator, j, job, cost in field_jobs)
+                except Exception as e:
+                    results[i][name] = e
+
+            time_wave_kwargs = scenario.get('time_wave')
+            if time_wave_kwargs:
+                results[i]['time_wave'] = None
+                time_wave_kwargs = dict(time_wave_kwargs)
+                time_wave_kwargs.pop('sediment', None)
+                try:
+                    job, cost, finish = _plan_time_wave(workspace, **time_wave_kwargs)
+                    finishers.append((i, 'time_wave', finish))
+                    jobs.append((i, 'time_wave', _solve_arrivals_job, job, cost, None))
+                except Exception as e:
+                    results[i]['time_wave'] = e
+
+            ray_kwargs = scenario.get('rays')
+            if ray_kwargs:
+                ray_kwargs = dict(ray_kwargs)
+                ray_kwargs.pop('sediment', None)
+                filename = workspace.file('cz')
+                try:
+                    cost, key = _write_rays_env(filename, **ray_kwargs)
+                    jobs.append((i, 'rays', _solve_rays_job, (filename, key), cost, None))
+                except Exception as e:
+                    results[i]['rays'] = e
+
+        # 所有场景的作业统一调度，长作业先运行，避免最后只剩一个长作业占用单个核心；
+        # 声场分段完成后立即叠加到所属计划的累加器
+        def on_done(n, outcome):
+            i, name, target = jobs[n][0], jobs[n][1], jobs[n][5]
+            if isinstance(outcome, Exception):
+                if not isinstance(results[i][name], Exception):
+                    results[i][name] = outcome
+            elif target is not None:
+                target[0].add(target[1], outcome)
+            else:
+                results[i][name] = outcome  # 到达结构或射线，声场和时域波形在最后合成
+
+        get_executor().run_longest_first(
+            lambda job: job[2](job[3]), jobs, [job[4] for job in jobs], on_done=on_done)
+
+        # 按场景组装结果
+        for i, name, finish in finishers:
+            if isinstance(results[i][name], Exception):
+                continue
+            try:
+                results[i][name] = finish(results[i][name])
+            except Exception as e:
+                results[i][name] = e
+        return results
+    finally:
+        for workspace in workspaces:
+            workspace.cleanup()
 
 
 def write_ssp(sspfile, ssp, bathm, NZmax):
@@ -265,18 +1505,12 @@ def write_ssp(sspfile, ssp, bathm, NZmax):
     # **Ensure directory exists**
     os.makedirs(os.path.dirname(sspfile), exist_ok=True)
     
-    with open(sspfile, 'w') as f:
-        f.write(str(len(ssp)) + '\r\n')
-        for val in bathm.r:
-            f.write(str(val) + '\t')
-        f.write('\r\n')
-        for row in range(NZmax):
-            for col in range(len(ssp)):
-                if len(ssp[col].z) <= row:
-                    f.write('{:4.6f}'.format(1800) + '\t')
-                else:
-                    f.write('{:6f}'.format(ssp[col].c[row]) + '\t')
-            f.write('\r\n')
+    # 深度 × 剖面 的声速矩阵，较短的剖面用 1800 m/s 补齐
+    cw = np.full((NZmax, len(ssp)), 1800.0)
+    for col, profile in enumerate(ssp):
+        n = min(len(profile.z), NZmax)
+        cw[:n, col] = profile.c[:n]
+    write_ssp_matrix(sspfile, bathm.r, cw, fmt='%6f', nprof=len(ssp))
     return
 
 
@@ -304,7 +1538,8 @@ def calZmax(ssp):
     return NZmax, Zmax, ssp_idx
 
 def call_Bellhop_p(filename):
-    system(AtBinPath + "/bellhop " + filename)
+    """运行一次声场计算，失败时抛出 BellhopRunError"""
+    run_bellhop(filename, bin_path=AtBinPath, output_ext='.shd')
 
 def calculate_transmission_loss(pressure, min_db_threshold=-250.0):
     """
@@ -328,9 +1563,13 @@ def calculate_transmission_loss(pressure, min_db_threshold=-250.0):
 def call_Bellhop(frequency, source_depth, receiver_depths, receiver_ranges, 
                  bathymetry, sound_speed_profile, sediment, bottom_params,
                  return_pressure=False, performance_mode=False, 
-                 beam_number=None, grazing_high=None, grazing_low=None):
+                 beam_number=None, grazing_high=None, grazing_low=None,
+                 workspace=None):
     """
-    统一的Bellhop计算函数
+    统一的Bellhop计算函数（单频率）
+
+    与 call_Bellhop_multi_freq 使用同一个 Scenario 计划：.env 由模板生成，.ssp/.bty 只写一次，
+    命中结果缓存时不运行 bellhop
     
     Args:
         frequency: 频率
@@ -346,186 +1585,32 @@ def call_Bellhop(frequency, source_depth, receiver_depths, receiver_ranges,
         beam_number: 用户指定的射线数量，默认None（自动计算）
         grazing_high: 掠射角上限（度），默认None
         grazing_low: 掠射角下限（度），默认None
+        workspace: 临时工作空间，默认None（自动创建并在结束后清理）
     
     Returns:
         如果return_pressure=False: (Pos1, TL)
         如果return_pressure=True: (Pos1, TL, pressure)
-    """
-    # Source and receiving position
-    filename = 'data/tmp/envB'
-    
-    # **确保目录存在**
-    os.makedirs('data/tmp', exist_ok=True)    # **Always use user-provided precise grid data**
-    # receiver_depths is already the user-provided depth grid, receiver_ranges is the user-provided range grid
-    ran = np.array(receiver_ranges) / 1000.0  # Convert input meters to km for Bellhop internal use
-    RD = np.array(receiver_depths)  # Keep receiver depths in original units (meters)
-    Rmax = max(ran)  # Maximum range in km for internal calculations
-    print(f"Using user-defined grid: {len(receiver_ranges)} range points, {len(RD)} depth points")
-    
-    # Calculate sound speed profile related parameters
-    NZmax, Zmax, ssp_idx = calZmax(sound_speed_profile)
-    
-    pos = Pos(Source(source_depth), Dom(ran, RD))
-    
-    # Range of phase velocity
-    cint_obj = cInt(1400, 15000)
-
-    # The number of media
-    NMedia = 1
-    ssp_raw = []
-    depth = [0]
-    # Sound speed profile - 确保数组长度与NZmax一致
-    Z_original = sound_speed_profile[ssp_idx].z  # 原始深度
-    Cp_original = sound_speed_profile[ssp_idx].c  # 原始声速
-    
-    # 如果原始数组长度小于NZmax，需要扩展
-    if len(Z_original) < NZmax:
-        # 扩展深度数组到NZmax长度
-        Z = np.zeros(NZmax)
-        Cp = np.zeros(NZmax)
-        
-        # 复制原始数据
-        Z[:len(Z_original)] = Z_original
-        Cp[:len(Cp_original)] = Cp_original
-        
-        # 对缺失的点进行线性插值或使用最后一个值
-        for i in range(len(Z_original), NZmax):
-            if len(Z_original) > 1:
-                # 使用最后一个值
-                Z[i] = Z_original[-1] + (i - len(Z_original) + 1) * 10  # 每10米一个点
-                Cp[i] = Cp_original[-1]  # 使用最后的声速值
-            else:
-                Z[i] = i * 10  # 默认每10米
-                Cp[i] = 1500  # 默认声速
-    else:
-        # 如果长度匹配或更长，直接使用前NZmax个点
-        Z = Z_original[:NZmax]
-        Cp = Cp_original[:NZmax]
-    
-    # **确保所有数组长度一致**
-    Cs = np.zeros(len(Z))  # Speed of S-wave
-    Rho = np.ones(len(Z))  # Density of the media  
-    Ap = np.zeros(len(Z))  # Attenuation of P-wave
-    As = np.zeros(len(Z))  # Attenuation of S-wave
-    ssp_raw.append(SSPraw(Z, Cp, Cs, Rho, Ap, As))
-    depth.append(Z[-1])
-
-    Opt_top = 'SVW'
-    N = np.zeros(NMedia, np.int8)
-    Sigma = np.zeros(NMedia + 1)
-    sspB = SSP(ssp_raw, depth, NMedia, Opt_top, N, Sigma)
+        TL 和 pressure 与 .shd 相同，按 [方位, 声源深度, 接收深度, 接收距离] 排列
 
-    #  Bottom option
-    hs = HS(bottom_params[0].cp, bottom_params[0].cs, bottom_params[0].rho, bottom_params[0].a_p, bottom_params[0].a_s)
-    Opt_bot = 'A~'
-    bottom = BotBndry(Opt_bot, hs)
-    top = TopBndry(Opt_top)
-    bdy = Bndry(top, bottom)
-    
-    # Beam params - 使用用户提供的参数或默认计算
-    run_type = 'C'  # incoherently sum beams, see AT docs for more info
-    
-    # 使用用户提供的射线数量或自动计算
-    if beam_number is not None and beam_number > 0:
-        totalBeams = int(beam_number)
-        print(f"使用用户指定的射线数量: {totalBeams}")
-    else:
-        if performance_mode:
-            # **性能模式：减少角度分段数和声线数量**
-            totalBeams = min(200, beamsnumber(frequency, Rmax, max(bathymetry.d)))  # 限制最大声线数
-        else:
-            # **标准模式：完整精度计算**
-            totalBeams = beamsnumber(frequency, Rmax, max(bathymetry.d))
-        print(f"自动计算的射线数量: {totalBeams}")
-    
-    # 使用用户提供的掠射角范围或自动计算
-    if grazing_low is not None and grazing_high is not None:
-        # 使用用户提供的角度范围
-        Alpha = [float(grazing_low), float(grazing_high)]
-        NAlphaRange = 2  # 直接使用用户提供的范围，不再分段
-        print(f"使用用户指定的掠射角范围: {grazing_low}° 到 {grazing_high}°")
-    else:
-        # 自动计算角度范围
-        if performance_mode:
-            NAlphaRange = 6  # 减少角度分段数
-        else:
-            NAlphaRange = 12
-        Alpha = alphadiv(NAlphaRange, Rmax)  # min and max launch angle
-        print(f"自动计算的掠射角范围: {Alpha[0]:.1f}° 到 {Alpha[-1]:.1f}°")
-        
-    box = Box(Zmax, max(bathymetry.r))  # bound the region you let the beams go, depth in meters and range in km
-    deltas = 0  # length step of ray trace, 0 means automatically choose
-
-    # Write *.env file
-    ialpha = 0
-    Filenames = []
-    
-    # 根据Alpha的长度确定处理方式
-    if len(Alpha) == 2:
-        # 用户指定的角度范围，直接使用
-        alpha = np.array([float(Alpha[0]), float(Alpha[1])])
-        nbeams = totalBeams
-        beam = Beam(RunType=run_type, Nbeams=nbeams, alpha=alpha, box=box, deltas=deltas)
-        filenameI = filename + '0'
-        write_env(filenameI + '.env', 'BELLHOP', 'Pekeris profile', frequency, sspB, bdy, pos, beam, cint_obj, Rmax)
-        write_ssp(filenameI, sound_speed_profile, bathymetry, NZmax)
-        write_bathy(filenameI, bathymetry)
-        Filenames.append(filenameI)
-        NAlphaRange = 1  # 只有一个角度范围
-    else:
-        # 自动计算的多个角度分段
-        for iAlphaRange in range(len(Alpha) - 1):
-            alpha = np.array([float(Alpha[iAlphaRange]), float(Alpha[iAlphaRange + 1])])
-            # 确保计算中的数值类型正确，修复类型错误
-            alpha_diff = float(alpha[1] - alpha[0])
-            nbeams = int(totalBeams * alpha_diff / 180.0)
-            # 确保nbeams至少为1
-            nbeams = max(1, nbeams)
-            beam = Beam(RunType=run_type, Nbeams=nbeams, alpha=alpha, box=box, deltas=deltas)
-            filenameI = filename + str(iAlphaRange)
-            write_env(filenameI + '.env', 'BELLHOP', 'Pekeris profile', frequency, sspB, bdy, pos, beam, cint_obj, Rmax)
-            write_ssp(filenameI, sound_speed_profile, bathymetry, NZmax)
-            write_bathy(filenameI, bathymetry)
-            Filenames.append(filenameI)
-
-    pool = Pool(NAlphaRange)
-    pool.map(call_Bellhop_p, Filenames)
-    pool.close()
-    pool.join()  # Read sound field
-    
-    # 初始化默认返回值
-    Pos1 = None
-    TL = None
-    pressure = None
-    
-    try:
-        [x, x, x, x, Pos1, pressure] = read_shd(filename + '0.shd')
-        for iAlphaRange in range(NAlphaRange - 1):
-            [x, x, x, x, Pos1, pressure1] = read_shd(filename + str(iAlphaRange + 1) + '.shd')
-            pressure = pressure + pressure1
-        # 计算传输损失
-        TL = calculate_transmission_loss(pressure)
-        
-        # **根据参数决定返回值**
-        if return_pressure:
-            return Pos1, TL, pressure
-        else:
-            return Pos1, TL
-        
-    except Exception as e:
-        # 创建默认的返回值
-        default_pos = Pos(Source(source_depth), Dom(ran, RD))
-        TL = np.full((len(RD), len(ran)), 100.0)
-        
-        if return_pressure:
-            pressure = np.zeros((len(RD), len(ran)), dtype=complex)
-            return default_pos, TL, pressure
-        else:
-            return default_pos, TL
+    Raises:
+        BellhopRunError: bellhop 运行失败或没有得到完整的声场
+    """
+    source_depth = np.atleast_1d(np.asarray(source_depth, dtype=float))
+    shape = (1, len(source_depth), len(receiver_depths), len(receiver_ranges))
+    Pos1, TL, pressure = call_Bellhop_multi_freq([frequency], source_depth, receiver_depths, receiver_ranges,
+                                                 bathymetry, sound_speed_profile, sediment, bottom_params,
+                                                 return_pressure=True, performance_mode=performance_mode,
+                                                 beam_number=beam_number, grazing_high=grazing_high,
+                                                 grazing_low=grazing_low, workspace=workspace)
+    TL = np.reshape(TL, shape)
+    if return_pressure:
+        return Pos1, TL, np.reshape(pressure, shape)
+    return Pos1, TL
 
 def call_Bellhop_Rays(frequency, source_depth, receiver_depths, receiver_ranges,
                       bathymetry, sound_speed_profile, sediment, bottom_params,
-                      beam_number=None, grazing_high=None, grazing_low=None):
+                      beam_number=None, grazing_high=None, grazing_low=None,
+                      workspace=None):
     """
     Bellhop ray tracing calculation function
     
@@ -541,27 +1626,73 @@ def call_Bellhop_Rays(frequency, source_depth, receiver_depths, receiver_ranges,
         beam_number: 用户指定的射线数量，默认None（自动计算）
         grazing_high: 掠射角上限（度），默认None
         grazing_low: 掠射角下限（度），默认None
+        workspace: 临时工作空间，默认None（自动创建并在结束后清理）
     
     Returns:
         ray tracing results
     """
-    # Source and receiving position
-    filename = 'data/tmp/cz'  # 修复文件名路径
-    
-    # **确保目录存在**    os.makedirs('data/tmp', exist_ok=True)
-    
+    # 每次求解使用独立的工作空间，避免并发求解互相覆盖文件
+    own_workspace = workspace is None
+    if own_workspace:
+        workspace = create_workspace('cz')
+    filename = workspace.file('cz')
+    try:
+        cost, key = _write_rays_env(filename, frequency, source_depth, receiver_depths, receiver_ranges,
+                                    bathymetry, sound_speed_profile, bottom_params,
+                                    beam_number, grazing_high, grazing_low)
+
+        # Run bellhop and read the rays (or reuse cached rays)
+        return _solve_rays_job((filename, key))
+    finally:
+        if own_workspace:
+            workspace.cleanup()
+
+
+async def call_Bellhop_Rays_async(frequency, source_depth, receiver_depths, receiver_ranges,
+                                  bathymetry, sound_speed_profile, sediment, bottom_params,
+                                  beam_number=None, grazing_high=None, grazing_low=None,
+                                  workspace=None):
+    """call_Bellhop_Rays 的 asyncio 版本，参数和返回值相同"""
+    loop = asyncio.get_running_loop()
+
+    own_workspace = workspace is None
+    if own_workspace:
+        workspace = await loop.run_in_executor(None, create_workspace, 'cz')
+    filename = workspace.file('cz')
+    try:
+        cost, key = await loop.run_in_executor(None, functools.partial(
+            _write_rays_env, filename, frequency, source_depth, receiver_depths, receiver_ranges,
+            bathymetry, sound_speed_profile, bottom_params,
+            beam_number, grazing_high, grazing_low))
+
+        cache = get_result_cache()
+        rays = await loop.run_in_executor(None, cache.get_rays, key)
+        if rays is None:
+            await run_bellhop_async(filename, bin_path=AtBinPath, output_ext='.ray')
+            rays = await loop.run_in_executor(None, get_rays, filename + ".ray")
+            await loop.run_in_executor(None, cache.put_rays, key, rays)
+        return rays
+    finally:
+        if own_workspace:
+            await loop.run_in_executor(None, workspace.cleanup)
+
+
+def _write_rays_env(filename, frequency, source_depth, receiver_depths, receiver_ranges,
+                    bathymetry, sound_speed_profile, bottom_params,
+                    beam_number=None, grazing_high=None, grazing_low=None):
+    """写出射线追踪所需的 .env/.bty 文件，返回 (作业代价估计, 结果缓存键)"""
     # **Always use user-provided precise grid data**
     # receiver_depths is already the user-provided depth grid, receiver_ranges is the user-provided range grid
     ran = np.array(receiver_ranges) / 1000.0  # Convert input meters to km for Bellhop internal use
     RD = np.array(receiver_depths)  # Keep receiver depths in original units (meters)
     Rmax = max(ran)  # Maximum range in km for internal calculations
     print(f"Ray tracing with user-defined grid: {len(receiver_ranges)} range points, {len(RD)} depth points")
-    
+
     # Calculate sound speed profile related parameters
     NZmax, Zmax, ssp_idx = calZmax(sound_speed_profile)
-    
+
     pos = Pos(Source(source_depth), Dom(ran, RD))
-    
+
     # Range of phase velocity
     cint_obj = cInt(1400, 15000)
 
@@ -603,10 +1734,10 @@ def call_Bellhop_Rays(frequency, source_depth, receiver_depths, receiver_ranges,
     bottom = BotBndry(Opt_bot, hs)
     top = TopBndry(Opt_top)
     bdy = Bndry(top, bottom)
-    
+
     # Beam params - 使用用户提供的参数或默认值
     run_type = 'R'  # ray trace mode
-    
+
     # 使用用户提供的射线数量或默认值
     if beam_number is not None and beam_number > 0:
         nbeams = int(beam_number)
@@ -614,7 +1745,7 @@ def call_Bellhop_Rays(frequency, source_depth, receiver_depths, receiver_ranges,
     else:
         nbeams = 301  # 默认射线数量
         print(f"使用默认射线数量: {nbeams}")
-    
+
     # 使用用户提供的掠射角范围或默认值
     if grazing_low is not None and grazing_high is not None:
         alpha = np.array([float(grazing_low), float(grazing_high)])
@@ -622,7 +1753,7 @@ def call_Bellhop_Rays(frequency, source_depth, receiver_depths, receiver_ranges,
     else:
         alpha = np.linspace(-10, 10, 2)  # 默认角度范围 -10° 到 10°
         print(f"使用默认掠射角范围: {alpha[0]:.1f}° 到 {alpha[1]:.1f}°")
-        
+    
     box = Box(Zmax, max(bathymetry.r))  # bound the region you let the beams go, depth in meters and range in km
     deltas = 0  # length step of ray trace, 0 means automatically choose
     beam = Beam(RunType=run_type, Nbeams=nbeams, alpha=alpha, box=box, deltas=deltas)  # package
@@ -630,15 +1761,133 @@ def call_Bellhop_Rays(frequency, source_depth, receiver_depths, receiver_ranges,
     # Write *.env file
     write_env(filename + '.env', 'BELLHOP', 'Pekeris profile', frequency, sspB, bdy, pos, beam, cint_obj, Rmax)
     write_bathy(filename, bathymetry)
+    # 射线轨迹只取决于环境、声源深度、射线扇面和计算区域，与频率和接收网格无关：
+    # 缓存键不含频率和接收点，不同频率/接收网格的射线请求共用同一条目
+    key = make_key('rays', bellhop_executable(AtBinPath), sspB, bdy, pos.s.depth, beam, bathymetry)
+    return nbeams * Rmax, key  # 作业代价估计（用于调度）和结果缓存键
 
-    system(AtBinPath + "/bellhop " + filename)
-    # Read sound field
-    return get_rays(filename + ".ray")
+def filter_rays(rays, min_depth=None, max_depth=None, max_top_bnc=None, max_bot_bnc=None, angle_range=None):
+    """
+    向量化射线筛选：每条射线的最大深度用分段归约 (np.maximum.reduceat) 一次求出
 
-def find_cvgcRays(rays_total, bathymetry=None):
-    """筛选有效射线，基于声学原理的宽松筛选策略"""
-    Rays = []
-    
+    Args:
+        rays: RayStore 或 Eigenray 列表
+        min_depth: 最大深度小于该值的射线视为过浅（通常是计算异常）而过滤 (m)
+        max_depth: 最大深度超过该值的射线被过滤 (m)
+        max_top_bnc: 海面反射次数上限
+        max_bot_bnc: 海底反射次数上限
+        angle_range: 发射角窗口 (下限, 上限)（度）
+
+    Returns:
+        (保留的射线 RayStore, 统计字典)；每条被过滤的射线只计入第一个不满足的条件：
+        empty 无坐标、shallow 过浅、deep 过深、top_bounce/bottom_bounce 反射次数超限、angle 发射角超出窗口
+    """
+    if not isinstance(rays, RayStore):
+        rays = RayStore.from_rays(rays)
+    total = len(rays)
+    lengths = rays.lengths
+    keep = lengths > 0
+    stats = {'total': total, 'empty': int(total - np.count_nonzero(keep))}
+
+    ray_max_depth = np.full(total, -np.inf)
+    if np.any(keep):
+        ray_max_depth[keep] = np.maximum.reduceat(rays.xy[1], rays.offsets[:-1][keep])
+
+    checks = [
+        ('shallow', None if min_depth is None else ray_max_depth < min_depth),
+        ('deep', None if max_depth is None else ray_max_depth > max_depth),
+        ('top_bounce', None if max_top_bnc is None else rays.num_top_bnc > max_top_bnc),
+        ('bottom_bounce', None if max_bot_bnc is None else rays.num_bot_bnc > max_bot_bnc),
+        ('angle', None if angle_range is None else
+         (rays.angles < min(angle_range)) | (rays.angles > max(angle_range))),
+    ]
+    for name, rejected in checks:
+        if rejected is None:
+            stats[name] = 0
+            continue
+        rejected = keep & rejected
+        stats[name] = int(np.count_nonzero(rejected))
+        keep &= ~rejected
+
+    stats['valid'] = int(np.count_nonzero(keep))
+    stats['retention'] = stats['valid'] / total if total else 0.0
+    return rays.subset(keep), stats
+
+
+def simplify_rays(rays, tolerance):
+    """
+    射线轨迹抽稀（Douglas–Peucker），对所有射线同时进行
+
+    射线端点和转折点（深度变化方向改变的点，包括海面/海底反射点）总是保留；
+    其余点在偏离相邻保留点连线的距离不超过 tolerance 时删除
+
+    Args:
+        rays: RayStore 或 Eigenray 列表
+        tolerance: 允许的最大偏离距离 (m)，None 或 <= 0 表示不抽稀
+
+    Returns:
+        RayStore
+    """
+    if not isinstance(rays, RayStore):
+        rays = RayStore.from_rays(rays)
+    if tolerance is None or tolerance <= 0 or rays.npoints < 3:
+        return rays
+    r, z = rays.xy
+    ray_id = rays.ray_index()
+    lengths = rays.lengths
+
+    # 端点和转折点
+    keep = np.zeros(rays.npoints, dtype=bool)
+    keep[rays.offsets[:-1][lengths > 0]] = True
+    keep[rays.offsets[1:][lengths > 0] - 1] = True
+    direction = np.sign(np.diff(z))
+    keep[1:-1] |= (direction[:-1] * direction[1:] < 0) & (ray_id[:-2] == ray_id[2:])
+
+    # 相邻保留点之间的分段，每轮在所有分段中同时找偏离最大的点
+    kept = np.flatnonzero(keep)
+    first, last = kept[:-1], kept[1:]
+    inner = (ray_id[first] == ray_id[last]) & (last - first > 1)
+    first, last = first[inner], last[inner]
+    while len(first):
+        counts = last - first - 1
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        segment = np.repeat(np.arange(len(first)), counts)
+        points = np.repeat(first + 1 - offsets[:-1], counts) + np.arange(offsets[-1])
+
+        x0, y0 = r[first][segment], z[first][segment]
+        dx, dy = r[last][segment] - x0, z[last][segment] - y0
+        chord = np.hypot(dx, dy)
+        px, py = r[points] - x0, z[points] - y0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            distance = np.where(chord > 0, np.abs(dy * px - dx * py) / chord, np.hypot(px, py))
+
+        worst = np.maximum.reduceat(distance, offsets[:-1])
+        candidates = np.flatnonzero(distance == worst[segment])
+        _, pick = np.unique(segment[candidates], return_index=True)
+        split = worst > tolerance
+        middle = points[candidates[pick]][split]
+        keep[middle] = True
+
+        first = np.concatenate([first[split], middle])
+        last = np.concatenate([middle, last[split]])
+        more = last - first > 1
+        first, last = first[more], last[more]
+
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(ray_id[keep], minlength=len(rays)))])
+    return RayStore(rays.xy[:, keep], offsets, rays.angles, rays.num_top_bnc, rays.num_bot_bnc)
+
+
+def find_cvgcRays(rays_total, bathymetry=None, max_depth=None, max_top_bnc=None, max_bot_bnc=None,
+                  angle_range=None, tolerance=None, return_stats=False):
+    """
+    筛选有效射线，基于声学原理的宽松筛选策略
+
+    默认只过滤空射线和明显过浅的异常射线；max_depth、max_top_bnc、max_bot_bnc、angle_range
+    为可选的附加条件（见 filter_rays）；指定 tolerance (m) 时对保留的射线轨迹抽稀（见 simplify_rays）
+
+    Returns:
+        保留的射线 RayStore；return_stats=True 时返回 (射线, 统计字典)
+    """
     # 动态计算深度阈值 - 仅用于过滤明显异常的射线
     if bathymetry is not None:
         # 检查bathymetry对象的属性结构
@@ -657,38 +1906,19 @@ def find_cvgcRays(rays_total, bathymetry=None):
         depth_threshold = max(10, min_bottom_depth * 0.2)
     else:
         depth_threshold = 10  # 非常宽松的默认阈值
-    
-    print(f"射线筛选深度阈值: {depth_threshold:.1f}m (仅过滤异常浅射线)")
-    
-    # 简化筛选逻辑：只过滤明显无效的射线
-    valid_rays = 0
-    empty_rays = 0
-    shallow_rays = 0
-    
-    for ray in rays_total[0]:
-        # 跳过空射线（无坐标数据）
-        if ray.xy.size == 0:
-            empty_rays += 1
-            continue
-            
-        # 检查射线是否过浅（可能是计算错误）
-        max_depth = max(ray.xy[1,:])
-        if max_depth < depth_threshold:
-            shallow_rays += 1
-            continue
-        
-        # 保留所有其他射线，不限制反射次数
-        Rays.append(ray)
-        valid_rays += 1
-    
-    print(f"射线筛选统计:")
-    print(f"  - 总射线数: {len(rays_total[0])}")
-    print(f"  - 空射线: {empty_rays}")
-    print(f"  - 过浅射线 (<{depth_threshold:.1f}m): {shallow_rays}")
-    print(f"  - 有效射线: {valid_rays}")
-    print(f"  - 保留率: {valid_rays/len(rays_total[0])*100:.1f}%")
-    
-    return Rays
+
+    # 保留所有其他射线，默认不限制反射次数
+    rays, stats = filter_rays(rays_total[0], min_depth=depth_threshold, max_depth=max_depth,
+                              max_top_bnc=max_top_bnc, max_bot_bnc=max_bot_bnc, angle_range=angle_range)
+    stats['depth_threshold'] = float(depth_threshold)
+    if tolerance:
+        npoints = rays.npoints
+        rays = simplify_rays(rays, tolerance)
+        stats['points'] = npoints
+        stats['simplified_points'] = rays.npoints
+    if return_stats:
+        return rays, stats
+    return rays
 
 def alphadiv(NalphaRange, Rmax):
     """计算声线角度分布"""
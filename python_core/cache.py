@@ -0,0 +1,641 @@
+"""
+Bellhop结果缓存
+以 write_env/write_ssp/write_bathy 全部输入的规范化哈希加上 bellhop 可执行文件标识作为键，
+在磁盘上保存声压场（.npz）、射线（RayStore 数组，.rays.npz）和到达结构文件（.arr）。
+命中时直接返回结果，不再启动 bellhop 子进程。
+接收网格不同（最大接收距离相同，声线数和角度分段因此相同）的请求可以从已缓存的超集网格（或加密网格）中切片/插值得到。
+缓存大小有上限，按最近访问时间（LRU）淘汰；跨进程访问通过文件锁保护
+"""
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import numpy as np
+
+try:
+    import fcntl  # POSIX
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt  # Windows
+except ImportError:
+    msvcrt = None
+
+try:
+    from .env import Source, Dom, Pos, RayStore
+    from .project import get_data_path
+except ImportError:
+    from env import Source, Dom, Pos, RayStore
+    from project import get_data_path
+
+# 缓存格式版本，格式变化时递增使旧条目失效
+CACHE_VERSION = 1
+
+# 接收网格匹配容差 (m)：.shd 中的坐标是 float32，read_shd 把距离四舍五入到 1 mm
+GRID_ATOL = 1e-3
+GRID_RTOL = 1e-6
+
+# 超过上限时淘汰到上限的这一比例，之后的写入不必每次都遍历缓存目录
+EVICT_TARGET = 0.9
+
+
+def _env_flag(name, default=False):
+    """读取布尔型环境变量"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def canonical(obj):
+    """
+    把缓存键的输入转换为可稳定序列化的结构：
+    numpy 数组和标量转为列表/Python 数值，对象按类名和属性字典展开，字典按键排序
+    """
+    if isinstance(obj, np.ndarray):
+        return {'ndarray': str(obj.dtype), 'shape': list(obj.shape), 'data': canonical(obj.tolist())}
+    if isinstance(obj, np.generic):
+        return canonical(obj.item())
+    if isinstance(obj, bytes):
+        return obj.decode('latin-1')
+    if isinstance(obj, complex):
+        return {'complex': [obj.real, obj.imag]}
+    if isinstance(obj, (list, tuple)):
+        return [canonical(x) for x in obj]
+    if isinstance(obj, dict):
+        return {str(k): canonical(v) for k, v in sorted(obj.items(), key=lambda kv: str(kv[0]))}
+    if hasattr(obj, '__dict__'):
+        return {'class': type(obj).__name__, 'attrs': canonical(vars(obj))}
+    return obj
+
+
+_binary_ids = {}
+_binary_lock = threading.Lock()
+
+
+def binary_identity(path):
+    """bellhop 可执行文件的内容哈希（按路径、大小和修改时间缓存）；文件不存在时返回 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    stamp = (os.path.realpath(path), st.st_size, st.st_mtime_ns)
+    with _binary_lock:
+        digest = _binary_ids.get(stamp)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with _binary_lock:
+            _binary_ids[stamp] = digest
+    return digest
+
+
+def make_key(kind, binary, *inputs):
+    """
+    生成缓存键
+
+    Args:
+        kind: 结果类型，例如 'field' 或 'rays'
+        binary: bellhop 可执行文件路径
+        inputs: 写入 .env/.ssp/.bty 的全部参数
+
+    Returns:
+        sha256 十六进制字符串；无法确定可执行文件标识时返回 None（不使用缓存）
+    """
+    identity = binary_identity(binary)
+    if identity is None:
+        return None
+    payload = json.dumps([CACHE_VERSION, kind, identity, canonical(inputs)],
+                         sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def content_key(*inputs):
+    """输入内容的哈希（不含可执行文件标识），用于在同一次计算中判断输入是否相同"""
+    payload = json.dumps(canonical(inputs), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _match_indices(grid, values):
+    """values 中每个值在 grid 中的下标（容差内），有任一值不在 grid 中时返回 None"""
+    grid = np.asarray(grid, dtype=float)
+    values = np.asarray(values, dtype=float)
+    if grid.size == 0:
+        return None
+    order = np.argsort(grid, kind='stable')
+    sorted_grid = grid[order]
+    right = np.clip(np.searchsorted(sorted_grid, values), 0, grid.size - 1)
+    left = np.clip(right - 1, 0, grid.size - 1)
+    nearest = np.where(np.abs(sorted_grid[left] - values) <= np.abs(sorted_grid[right] - values), left, right)
+    if np.any(np.abs(sorted_grid[nearest] - values) > GRID_ATOL + GRID_RTOL * np.abs(values)):
+        return None
+    return order[nearest]
+
+
+def _covers(grid, values):
+    """grid 严格递增且覆盖 values 的取值范围（可插值）"""
+    grid = np.asarray(grid, dtype=float)
+    return (grid.size >= 2 and np.all(np.diff(grid) > 0)
+            and np.min(values) >= grid[0] and np.max(values) <= grid[-1])
+
+
+def _resolves(grid, values, wavenumber):
+    """
+    values 可以从 grid 上取得：精确匹配，或 grid 覆盖 values 且间距小于半个波长
+    （wavenumber·间距 < π，插值不会混叠声压沿该方向的干涉结构）
+    """
+    if _match_indices(grid, values) is not None:
+        return True
+    return (wavenumber is not None and _covers(grid, values)
+            and float(np.max(np.diff(grid))) * abs(wavenumber) < np.pi)
+
+
+def sample_field(pos, pressure, receiver_depths, receiver_ranges, wavenumber=None):
+    """
+    从已有声压场中取出请求的接收网格
+
+    请求网格是已有网格的子集时直接切片；否则在给出 wavenumber 且已有网格覆盖请求范围时
+    去掉沿距离的载波后做双线性插值（见 sample_demodulated）。需要插值的方向（深度或距离）上
+    网格间距不小于半个波长（欠采样）或无法满足时返回 None，由调用方直接计算
+
+    Args:
+        pos, pressure: read_shd 格式的位置信息和声压 (..., Nrd, Nrr)
+        receiver_depths: 请求的接收深度 (m)
+        receiver_ranges: 请求的接收距离 (m)
+        wavenumber: 参考波数 2πf/c (1/m)，None 表示只做精确切片
+
+    Returns:
+        (pos, pressure) 或 None
+    """
+    cached_rd = np.asarray(pos.r.depth, dtype=float)
+    cached_rr = np.asarray(pos.r.range, dtype=float)
+    rd = np.atleast_1d(np.asarray(receiver_depths, dtype=float))
+    rr = np.atleast_1d(np.asarray(receiver_ranges, dtype=float))
+
+    ird = _match_indices(cached_rd, rd)
+    irr = _match_indices(cached_rr, rr)
+    if ird is not None and irr is not None:
+        new_rd, new_rr = cached_rd[ird], cached_rr[irr]
+        sampled = np.take(np.take(pressure, ird, axis=-2), irr, axis=-1)
+    elif wavenumber is not None and _resolves(cached_rd, rd, wavenumber) and _resolves(cached_rr, rr, wavenumber):
+        new_rd, new_rr = rd, np.round(rr, 3)
+        depths, ranges = np.meshgrid(rd, rr, indexing='ij')
+        sampled = sample_demodulated(pressure, cached_rd, cached_rr, depths.ravel(), ranges.ravel(), wavenumber)
+        sampled = sampled.reshape(pressure.shape[:-2] + depths.shape)
+    else:
+        return None
+
+    new_pos = Pos(Source(pos.s.depth), Dom(new_rr, new_rd))
+    new_pos.s.x = pos.s.x
+    new_pos.s.y = pos.s.y
+    new_pos.theta = getattr(pos, 'theta', 0.0)
+    return new_pos, sampled
+
+
+def _bracket(grid, values):
+    """values 在 grid（严格递增）中的左右下标和线性插值权重；超出范围的值取边界"""
+    grid = np.asarray(grid, dtype=float)
+    values = np.clip(np.asarray(values, dtype=float), grid[0], grid[-1])
+    if grid.size < 2:
+        zeros = np.zeros(values.shape, dtype=int)
+        return zeros, zeros, np.zeros(values.shape)
+    right = np.clip(np.searchsorted(grid, values), 1, grid.size - 1)
+    weight = (values - grid[right - 1]) / (grid[right] - grid[right - 1])
+    return right - 1, right, weight
+
+
+def sample_points(pressure, grid_depths, grid_ranges, depths, ranges):
+    """
+    从规则网格上的声压场中取出散点 (深度, 距离) 的声压，所有点一次双线性插值
+    （复声压线性插值，只适合足够密的网格）
+
+    Args:
+        pressure: 声压 (..., Nrd, Nrr)
+        grid_depths, grid_ranges: 网格的深度和距离，严格递增
+        depths, ranges: 散点的深度和距离，长度相同
+
+    Returns:
+        声压 (..., 点数)；网格以外的点取网格边界上的值
+    """
+    iz0, iz1, wz = _bracket(grid_depths, depths)
+    ir0, ir1, wr = _bracket(grid_ranges, ranges)
+    return ((1 - wz) * (1 - wr) * pressure[..., iz0, ir0] + (1 - wz) * wr * pressure[..., iz0, ir1]
+            + wz * (1 - wr) * pressure[..., iz1, ir0] + wz * wr * pressure[..., iz1, ir1])
+
+
+# bellhop 的相位约定为 exp(-iωτ)（τ 为时延），声压沿距离的载波为 exp(CARRIER_SIGN·i·k·r)
+CARRIER_SIGN = -1.0
+
+
+def sample_demodulated(field, grid_depths, grid_ranges, depths, ranges, wavenumber):
+    """
+    散点插值前去掉沿距离的载波 exp(-i·wavenumber·r)，插值后再乘回
+
+    声压相位沿距离大约每个波长变化 2π，直接对复声压线性插值会在网格间距接近波长时显著低估幅度；
+    去掉载波后的包络变化慢得多。深度方向没有载波，网格间距需要小于半个波长（见 sample_field）
+    """
+    phase = CARRIER_SIGN * abs(wavenumber)
+    envelope = field * np.exp(-1j * phase * np.asarray(grid_ranges, dtype=float))
+    values = sample_points(envelope, grid_depths, grid_ranges, depths, ranges)
+    return values * np.exp(1j * phase * np.asarray(ranges, dtype=float))
+
+
+def _save_field(path, pos, pressure, **extra):
+    """把 (pos, pressure) 写成 .npz"""
+    # 2D 声场的 Source 没有 x/y（None），不写出
+    for name in ('x', 'y'):
+        if getattr(pos.s, name) is not None:
+            extra['s' + name] = np.asarray(getattr(pos.s, name), dtype=float)
+    with open(path, 'wb') as f:
+        np.savez(f, pressure=pressure,
+                 sd=np.asarray(pos.s.depth, dtype=float),
+                 rd=np.asarray(pos.r.depth, dtype=float),
+                 rr=np.asarray(pos.r.range, dtype=float),
+                 theta=np.asarray(getattr(pos, 'theta', 0.0), dtype=float),
+                 **extra)
+
+
+def _load_field(path):
+    """读取 _save_field 写出的 .npz，返回 (pos, pressure, 其他数组)"""
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files}
+    pos = Pos(Source(arrays.pop('sd')), Dom(arrays.pop('rr'), arrays.pop('rd')))
+    pos.s.x = tuple(arrays.pop('sx').tolist()) if 'sx' in arrays else None
+    pos.s.y = tuple(arrays.pop('sy').tolist()) if 'sy' in arrays else None
+    pos.theta = arrays.pop('theta').item()
+    return pos, arrays.pop('pressure'), arrays
+
+
+def _save_rays(path, ray_sets):
+    """把每个声源深度一个 RayStore 的列表拼接成一组不规则数组写成 .npz"""
+    counts = [len(rays) for rays in ray_sets]
+    xy = np.concatenate([rays.xy for rays in ray_sets], axis=1) if ray_sets else np.zeros((2, 0))
+    starts = np.cumsum([0] + [rays.npoints for rays in ray_sets])
+    offsets = np.concatenate([[0]] + [rays.offsets[1:] + start for rays, start in zip(ray_sets, starts)])
+    with open(path, 'wb') as f:
+        np.savez(f, xy=xy, offsets=offsets.astype(np.int64),
+                 source_offsets=np.cumsum([0] + counts).astype(np.int64),
+                 angles=np.concatenate([[]] + [rays.angles for rays in ray_sets]),
+                 num_top_bnc=np.concatenate([np.zeros(0, np.int64)] + [rays.num_top_bnc for rays in ray_sets]),
+                 num_bot_bnc=np.concatenate([np.zeros(0, np.int64)] + [rays.num_bot_bnc for rays in ray_sets]))
+
+
+def _load_rays(path):
+    """读取 _save_rays 写出的 .npz，返回每个声源深度一个 RayStore 的列表"""
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files}
+    xy, offsets, source_offsets = arrays['xy'], arrays['offsets'], arrays['source_offsets']
+    # 每个声源的坐标是拼接数组的连续一段，直接取视图
+    return [RayStore(xy[:, offsets[a]:offsets[b]], offsets[a:b + 1] - offsets[a], arrays['angles'][a:b],
+                     arrays['num_top_bnc'][a:b], arrays['num_bot_bnc'][a:b])
+            for a, b in zip(source_offsets[:-1], source_offsets[1:])]
+
+
+class _FileLock:
+    """跨进程文件锁（POSIX 使用 flock，Windows 使用 msvcrt），两者都不可用时退化为进程内锁"""
+
+    _local_lock = threading.RLock()
+
+    def __init__(self, path, shared=False):
+        self.path = path
+        self.shared = shared
+        self._file = None
+
+    def __enter__(self):
+        if fcntl is None and msvcrt is None:
+            self._local_lock.acquire()
+            return self
+        self._file = open(self.path, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._file is None:
+            self._local_lock.release()
+            return False
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+        return False
+
+
+class ResultCache:
+    """
+    磁盘结果缓存
+
+    Args:
+        root: 缓存目录，默认 data/cache
+        max_bytes: 缓存总大小上限（字节），超过后按最近访问时间淘汰
+        enabled: 是否启用
+
+    未显式指定的参数从环境变量读取：
+        BELLHOP_CACHE_DIR, BELLHOP_CACHE_MAX_MB（默认 1024）, BELLHOP_CACHE（默认启用）
+    """
+
+    def __init__(self, root=None, max_bytes=None, enabled=None):
+        self.root = root or os.environ.get('BELLHOP_CACHE_DIR') or os.path.join(get_data_path(), 'cache')
+        if max_bytes is None:
+            try:
+                max_bytes = int(float(os.environ.get('BELLHOP_CACHE_MAX_MB', 1024)) * 1024 * 1024)
+            except ValueError:
+                print("警告: 无效的 BELLHOP_CACHE_MAX_MB，使用默认值 1024")
+                max_bytes = 1024 * 1024 * 1024
+        self.max_bytes = max_bytes
+        self.enabled = enabled if enabled is not None else _env_flag('BELLHOP_CACHE', True)
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def configure(self, root=None, max_bytes=None, enabled=None):
+        """更新配置，None 表示保持原值"""
+        if root is not None:
+            self.root = root
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        if enabled is not None:
+            self.enabled = enabled
+
+    # ---- 统计 ----
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        """返回本进程的命中统计以及缓存目录的当前大小"""
+        with self._stats_lock:
+            result = dict(self._stats)
+        lookups = result['hits'] + result['misses']
+        result['hit_rate'] = result['hits'] / lookups if lookups else 0.0
+        entries = self._entries()
+        result['entries'] = len(entries)
+        result['bytes'] = sum(size for _, size, _ in entries)
+        return result
+
+    # ---- 文件布局 ----
+    def _path(self, key, ext):
+        return os.path.join(self.root, key[:2], key + ext)
+
+    def _grid_dir(self, key):
+        """同一环境、不同接收网格的声压场放在同一目录下"""
+        return os.path.join(self.root, key[:2], key)
+
+    def _lock(self, shared=False):
+        os.makedirs(self.root, exist_ok=True)
+        return _FileLock(os.path.join(self.root, '.lock'), shared=shared)
+
+    def _entries(self):
+        """所有缓存条目 (路径, 大小, 最近访问时间)"""
+        entries = []
+        for dirpath, _, names in os.walk(self.root):
+            if dirpath == self.root:
+                continue
+            for name in names:
+                if name.startswith('.'):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, st.st_size, st.st_mtime))
+        return entries
+
+    def _touch(self, path):
+        """记录访问时间（mtime 作为 LRU 时间戳）"""
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def _store(self, path, write):
+        """写入临时文件后原子替换，再按需淘汰；write(tmp_path) 负责写出内容"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix='.tmp_', suffix=os.path.splitext(path)[1],
+                                   dir=os.path.dirname(path))
+        os.close(fd)
+        try:
+            write(tmp)
+            size = os.path.getsize(tmp)
+            with self._lock():
+                try:
+                    replaced = os.path.getsize(path)
+                except OSError:
+                    replaced = 0
+                os.replace(tmp, path)
+                total = self._read_total()
+                self._evict(None if total is None else total + size - replaced)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self._count('stores')
+
+    # 缓存总大小记录在 .size 中（各进程在排他锁内更新），写入条目时不必遍历整个缓存目录
+    def _read_total(self):
+        try:
+            with open(os.path.join(self.root, '.size')) as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _write_total(self, total):
+        try:
+            with open(os.path.join(self.root, '.size'), 'w') as f:
+                f.write(str(int(total)))
+        except OSError:
+            pass
+
+    def _evict(self, total=None):
+        """
+        总大小超过上限时删除最久未访问的条目，直到不超过上限的 EVICT_TARGET（调用方持有排他锁）
+
+        total 为记录的总大小；只有超过上限（或没有记录）时才遍历目录重新统计，
+        同时修正其他方式删除条目造成的偏差
+        """
+        if total is not None and total <= self.max_bytes:
+            self._write_total(total)
+            return
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            for path, size, _ in sorted(entries, key=lambda e: e[2]):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                self._count('evictions')
+                if total <= EVICT_TARGET * self.max_bytes:
+                    break
+        self._write_total(total)
+
+    # ---- 声压场 ----
+    def get_field(self, key):
+        """读取缓存的声压场，返回 (pos, pressure)；未命中返回 None"""
+        if not self.enabled or key is None:
+            return None
+        path = self._path(key, '.npz')
+        try:
+            with self._lock(shared=True):
+                pos, pressure, _ = _load_field(path)
+                self._touch(path)
+        except (OSError, ValueError, KeyError):
+            self._count('misses')
+            return None
+        self._count('hits')
+        return pos, pressure
+
+    def put_field(self, key, pos, pressure):
+        """保存 read_shd 读出的 (pos, pressure)"""
+        if not self.enabled or key is None:
+            return
+
+        self._store(self._path(key, '.npz'), lambda tmp: _save_field(tmp, pos, pressure))
+
+    # ---- 按接收网格复用的声压场 ----
+    def find_field(self, key, receiver_depths, receiver_ranges, wavenumber=None):
+        """
+        在同一环境（key 除最大接收距离外不含接收网格）的缓存声压场中查找能覆盖请求网格的结果
+
+        优先选择请求网格是其子集的条目（精确切片）；其次在给出 wavenumber 时选择需要插值的方向上
+        间距小于半个波长的加密网格条目做解调插值（见 sample_field）
+
+        Args:
+            key: 不含接收网格的环境缓存键
+            receiver_depths: 接收深度 (m)
+            receiver_ranges: 接收距离 (m)
+            wavenumber: 参考波数 2πf/c (1/m)，None 表示只复用精确匹配的条目
+
+        Returns:
+            (pos, pressure) 或 None
+        """
+        if not self.enabled or key is None:
+            return None
+        directory = self._grid_dir(key)
+        try:
+            with self._lock(shared=True):
+                dense_path = None
+                for name in sorted(os.listdir(directory)):
+                    if not name.endswith('.npz'):
+                        continue
+                    path = os.path.join(directory, name)
+                    with np.load(path, allow_pickle=False) as data:
+                        rd, rr, dense = data['rd'], data['rr'], bool(data['dense'])
+                    if (_match_indices(rd, receiver_depths) is not None
+                            and _match_indices(rr, receiver_ranges) is not None):
+                        pos, pressure, _ = _load_field(path)
+                        self._touch(path)
+                        self._count('hits')
+                        return sample_field(pos, pressure, receiver_depths, receiver_ranges)
+                    if (dense and dense_path is None and wavenumber is not None
+                            and _resolves(rd, receiver_depths, wavenumber)
+                            and _resolves(rr, receiver_ranges, wavenumber)):
+                        dense_path = path
+                if dense_path is not None:
+                    pos, pressure, _ = _load_field(dense_path)
+                    self._touch(dense_path)
+                    self._count('hits')
+                    return sample_field(pos, pressure, receiver_depths, receiver_ranges, wavenumber)
+        except (OSError, ValueError, KeyError):
+            pass
+        self._count('misses')
+        return None
+
+    def put_grid_field(self, key, pos, pressure, dense=False):
+        """保存某一接收网格上的声压场；dense=True 表示加密网格，允许插值复用"""
+        if not self.enabled or key is None:
+            return
+        grid = hashlib.sha256(np.asarray(pos.r.depth, dtype=float).tobytes()
+                              + np.asarray(pos.r.range, dtype=float).tobytes()).hexdigest()[:16]
+        path = os.path.join(self._grid_dir(key), grid + '.npz')
+        self._store(path, lambda tmp: _save_field(tmp, pos, pressure, dense=np.asarray(bool(dense))))
+
+    # ---- 射线 ----
+    def get_rays(self, key):
+        """读取缓存的射线，返回每个声源深度一个 RayStore 的列表；未命中返回 None"""
+        if not self.enabled or key is None:
+            return None
+        path = self._path(key, '.rays.npz')
+        try:
+            with self._lock(shared=True):
+                ray_sets = _load_rays(path)
+                self._touch(path)
+        except (OSError, ValueError, KeyError):
+            self._count('misses')
+            return None
+        self._count('hits')
+        return ray_sets
+
+    def put_rays(self, key, ray_sets):
+        """保存 get_rays 读出的射线（RayStore 列表）"""
+        if not self.enabled or key is None:
+            return
+        self._store(self._path(key, '.rays.npz'), lambda tmp: _save_rays(tmp, ray_sets))
+
+    # ---- 原始输出文件（.arr 等） ----
+    def get_file(self, key, ext, dest):
+        """把缓存的输出文件复制到 dest，命中返回 True"""
+        if not self.enabled or key is None:
+            return False
+        path = self._path(key, ext)
+        try:
+            with self._lock(shared=True):
+                shutil.copyfile(path, dest)
+                self._touch(path)
+        except OSError:
+            self._count('misses')
+            return False
+        self._count('hits')
+        return True
+
+    def put_file(self, key, ext, src):
+        """保存 bellhop 输出文件"""
+        if not self.enabled or key is None:
+            return
+        self._store(self._path(key, ext), lambda tmp: shutil.copyfile(src, tmp))
+
+    def clear(self):
+        """清空缓存目录"""
+        with self._lock():
+            for path, _, _ in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._write_total(0)
+
+
+# 全局实例
+_cache = ResultCache()
+
+
+def get_result_cache():
+    """获取全局结果缓存"""
+    return _cache
+
+
+def configure_cache(root=None, max_bytes=None, enabled=None):
+    """配置全局结果缓存（目录、大小上限、是否启用）"""
+    _cache.configure(root=root, max_bytes=max_bytes, enabled=enabled)
+
+
+def cache_stats():
+    """全局结果缓存的命中统计"""
+    return _cache.stats()
@@ -256,6 +256,72 @@ class Arrival:
         self.num_bot_bnc = info_list[5] 
         
 
+# 到达结构数组的字段：幅度、相位（度）、复时延 (s)、出射角和接收角（度）、海面/海底反射次数
+ARRIVAL_DTYPE = np.dtype([('amp', np.float64), ('phase', np.float64), ('delay', np.complex128),
+                          ('src_ang', np.float64), ('rec_ang', np.float64),
+                          ('num_top_bnc', np.int32), ('num_bot_bnc', np.int32)])
+
+
+class ArrivalStore:
+    """
+    到达结构的数组存储
+
+    所有接收点的到达按 (声源深度, 接收深度, 接收距离) 顺序拼接为一个 ARRIVAL_DTYPE 结构化数组 data，
+    第 i 个接收点（按该顺序展平的下标）的到达为 data[offsets[i]:offsets[i+1]]
+    """
+
+    def __init__(self, data, offsets, shape, freq=None, pos=None):
+        self.data = np.asarray(data, dtype=ARRIVAL_DTYPE)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.shape = tuple(shape)  # (Nsd, Nrd, Nrr)
+        self.freq = freq
+        self.pos = pos
+
+    @property
+    def counts(self):
+        """每个接收点的到达数，形状 (Nsd, Nrd, Nrr)"""
+        return np.diff(self.offsets).reshape(self.shape)
+
+    @property
+    def amplitude(self):
+        """复幅度 amp * exp(i * phase)"""
+        return self.data['amp'] * np.exp(1j * np.deg2rad(self.data['phase']))
+
+    def receiver_index(self):
+        """每个到达所属接收点的展平下标"""
+        return np.repeat(np.arange(len(self.offsets) - 1), np.diff(self.offsets))
+
+    def arrivals(self, isd, ird, irr):
+        """某个接收点的到达"""
+        i = np.ravel_multi_index((isd, ird, irr), self.shape)
+        return self.data[self.offsets[i]:self.offsets[i + 1]]
+
+    def subset(self, receivers):
+        """按展平下标选取接收点，返回新的 ArrivalStore，shape 为 (选取的接收点数,)"""
+        receivers = np.asarray(receivers, dtype=np.int64).ravel()
+        counts = np.diff(self.offsets)[receivers]
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        rows = np.repeat(self.offsets[receivers] - offsets[:-1], counts) + np.arange(offsets[-1])
+        return ArrivalStore(self.data[rows], offsets, (len(receivers),), self.freq)
+
+    def to_list(self):
+        """转换为 read_arrivals_asc 的列表格式：每个接收点一个 [amp, delay, src_ang, rec_ang, 海面反射, 海底反射] 列表"""
+        amplitude = self.amplitude
+        result = []
+        for i in range(len(self.offsets) - 1):
+            rows = slice(self.offsets[i], self.offsets[i + 1])
+            d = self.data[rows]
+            result.append([list(row) for row in zip(amplitude[rows], d['delay'], d['src_ang'], d['rec_ang'],
+                                                     d['num_top_bnc'].tolist(), d['num_bot_bnc'].tolist())])
+        return result
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return f'ArrivalStore({len(self)} arrivals, receivers={self.shape})'
+
+
 class KernInput:
     def __init__(self, Field_r, Field_s, env):
         self.gr = Field_r.greens_mat
@@ -282,5 +348,81 @@ class Eigenray:
         self.num_top_bnc = num_top_bnc
         self.num_bot_bnc = num_bot_bnc
         self.xy = xy_arr
+
+
+class RayStore:
+    """
+    一组射线的数组存储
+
+    所有射线的坐标拼接为一个 2 × 总点数 的数组 xy，第 i 条射线为 xy[:, offsets[i]:offsets[i+1]]；
+    发射角 angles 和海面/海底反射次数 num_top_bnc/num_bot_bnc 是与射线一一对应的平行数组。
+    按整数下标或迭代访问时返回 Eigenray（其 xy 是共享数组的视图），
+    按切片、下标数组或布尔掩码访问时返回新的 RayStore
+    """
+
+    def __init__(self, xy, offsets, angles, num_top_bnc, num_bot_bnc):
+        self.xy = np.asarray(xy, dtype=float).reshape(2, -1)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.angles = np.asarray(angles, dtype=float)
+        self.num_top_bnc = np.asarray(num_top_bnc, dtype=np.int64)
+        self.num_bot_bnc = np.asarray(num_bot_bnc, dtype=np.int64)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros((2, 0)), [0], [], [], [])
+
+    @classmethod
+    def from_rays(cls, rays):
+        """由 Eigenray 列表构造"""
+        rays = list(rays)
+        if not rays:
+            return cls.empty()
+        xys = [np.asarray(ray.xy, dtype=float).reshape(2, -1) for ray in rays]
+        offsets = np.concatenate([[0], np.cumsum([xy.shape[1] for xy in xys])])
+        return cls(np.concatenate(xys, axis=1), offsets, [ray.src_ang for ray in rays],
+                   [ray.num_top_bnc for ray in rays], [ray.num_bot_bnc for ray in rays])
+
+    @property
+    def lengths(self):
+        """每条射线的点数"""
+        return np.diff(self.offsets)
+
+    @property
+    def npoints(self):
+        return int(self.offsets[-1])
+
+    def ray_index(self):
+        """每个坐标点所属的射线下标"""
+        return np.repeat(np.arange(len(self)), self.lengths)
+
+    def subset(self, index):
+        """按布尔掩码或下标数组选取射线，返回新的 RayStore（坐标一次性整体拷贝）"""
+        index = np.asarray(index)
+        if index.dtype == bool:
+            index = np.flatnonzero(index)
+        lengths = self.lengths[index]
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        points = np.repeat(self.offsets[index] - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return RayStore(self.xy[:, points], offsets, self.angles[index],
+                        self.num_top_bnc[index], self.num_bot_bnc[index])
+
+    def __len__(self):
+        return len(self.angles)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.subset(np.arange(len(self))[i])
+        if np.ndim(i) > 0:
+            return self.subset(i)
+        i = range(len(self))[i]
+        return Eigenray(self.angles[i], self.num_top_bnc[i], self.num_bot_bnc[i],
+                        self.xy[:, self.offsets[i]:self.offsets[i + 1]])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self):
+        return f'RayStore({len(self)} rays, {self.npoints} points)'
     
 
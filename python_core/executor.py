@@ -0,0 +1,263 @@
+"""
+Bellhop共享执行器
+bellhop 在外部进程中计算，工作线程只负责启动子进程并等待结果，
+因此用一个长期存在、跨调用共享的线程池代替每次调用新建的 multiprocessing.Pool，
+避免进程池的 fork/启动开销，以及在嵌入式解释器中的嵌套 fork
+
+每个工作线程在 bellhop 结束后直接解析自己的输出文件（.shd 解析在 numpy 中释放 GIL），
+解析出的数组与调用方在同一进程中，按引用交给调用方，不需要 pickle 或共享内存
+"""
+import os
+import atexit
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from concurrent.futures import as_completed as futures_as_completed
+
+
+def _default_max_workers():
+    """默认并发数：环境变量 BELLHOP_MAX_WORKERS，否则为 CPU 核数"""
+    value = os.environ.get('BELLHOP_MAX_WORKERS')
+    if value:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            print(f"警告: 无效的 BELLHOP_MAX_WORKERS={value!r}，使用 CPU 核数")
+    return os.cpu_count() or 1
+
+
+class ProcessSlots:
+    """
+    可调整上限的并发名额，线程和 asyncio 协程共用
+
+    threading.BoundedSemaphore 的初值不能修改，调整上限时替换信号量会让旧名额和新名额同时生效，
+    因此用条件变量计数：resize 只改上限，已占用的名额在释放前继续计入。
+    用法：with slots: ...（线程中）或 async with slots: ...（协程中，等待时不阻塞事件循环）
+    """
+
+    def __init__(self, limit):
+        self.limit = max(1, int(limit))
+        self._active = 0
+        self._cond = threading.Condition()
+        self._waiters = deque()  # 等待名额的协程 (事件循环, Future)
+
+    @property
+    def active(self):
+        """当前占用的名额数"""
+        return self._active
+
+    def acquire(self):
+        with self._cond:
+            while self._active >= self.limit or self._waiters:
+                self._cond.wait()
+            self._active += 1
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._wake()
+
+    def resize(self, limit):
+        """调整上限；调小时已占用的名额在释放前继续计入，不会超过新旧上限中较大的一个"""
+        with self._cond:
+            self.limit = max(1, int(limit))
+            self._wake()
+
+    def _wake(self):
+        """（持有锁时调用）把空出的名额先交给等待的协程，其余唤醒等待的线程"""
+        while self._waiters and self._active < self.limit:
+            loop, future = self._waiters.popleft()
+            self._active += 1
+            try:
+                loop.call_soon_threadsafe(self._grant, future)
+            except RuntimeError:  # 事件循环已经关闭
+                self._active -= 1
+        self._cond.notify_all()
+
+    def _grant(self, future):
+        """在协程所在的事件循环中交付名额；协程已取消时归还"""
+        if future.done():
+            self.release()
+        else:
+            future.set_result(None)
+
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return
+            future = loop.create_future()
+            self._waiters.append((loop, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._cond:
+                if (loop, future) in self._waiters:
+                    self._waiters.remove((loop, future))
+                    self._wake()
+                    raise
+            if future.done() and not future.cancelled():
+                self.release()  # 名额已交付但协程被取消
+            raise
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+        return False
+
+    async def __aenter__(self):
+        await self.acquire_async()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.release()
+        return False
+
+
+class BellhopExecutor:
+    """
+    共享线程池，max_workers 即全局 bellhop 并发上限
+
+    线程池中的任务和 asyncio 路径（runner.run_bellhop_once_async）共用同一组名额 slots，
+    同步和异步请求同时进行时运行中的 bellhop 进程总数也不超过 max_workers。
+    提交的任务应是叶子任务（运行一次 bellhop 并读取结果），
+    不要在任务内部等待其他提交到同一执行器的任务，否则可能耗尽名额而死锁。
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or _default_max_workers()
+        self.slots = ProcessSlots(self.max_workers)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='bellhop')
+            return self._pool
+
+    def _run(self, fn, *args, **kwargs):
+        """在工作线程中占用一个名额运行任务"""
+        with self.slots:
+            return fn(*args, **kwargs)
+
+    def _submit(self, pool, fn, *args, **kwargs):
+        return pool.submit(self._run, fn, *args, **kwargs)
+
+    def submit(self, fn, *args, **kwargs):
+        """提交单个任务，返回 Future"""
+        return self._submit(self._get_pool(), fn, *args, **kwargs)
+
+    def map(self, fn, iterable):
+        """
+        并发执行并按输入顺序返回结果列表
+
+        任一任务失败时取消尚未开始的任务，并等待正在运行的任务结束后再抛出异常，
+        保证返回时不再有任务访问调用方的临时文件
+        """
+        pool = self._get_pool()
+        futures = [self._submit(pool, fn, item) for item in iterable]
+        done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+        if pending:
+            for future in pending:
+                future.cancel()
+            wait(pending)
+        return [future.result() for future in futures]
+
+    def as_completed(self, fn, iterable):
+        """
+        并发执行，按完成顺序逐个产出 (输入下标, 结果)，调用方可以在其余任务运行期间处理已完成的结果
+
+        任一任务失败（或调用方提前停止迭代）时取消尚未开始的任务，并等待正在运行的任务结束，
+        保证迭代结束后不再有任务访问调用方的临时文件
+        """
+        pool = self._get_pool()
+        futures = {self._submit(pool, fn, item): i for i, item in enumerate(iterable)}
+        try:
+            for future in futures_as_completed(list(futures)):
+                i = futures.pop(future)
+                yield i, future.result()
+        finally:
+            _cancel_and_wait(futures)
+
+    def run_longest_first(self, fn, items, costs, on_done=None):
+        """
+        按代价从大到小提交所有任务并等待全部完成（线程池按提交顺序启动任务）
+
+        指定 on_done 时，在调用方线程中按完成顺序调用 on_done(下标, 结果或异常对象)，不保留结果，返回 None；
+        否则返回与 items 顺序一致的列表，失败任务对应位置为异常对象
+        """
+        pool = self._get_pool()
+        order = sorted(range(len(items)), key=lambda i: costs[i], reverse=True)
+        futures = [None] * len(items)
+        for i in order:
+            futures[i] = self._submit(pool, fn, items[i])
+        if on_done is None:
+            wait(futures)
+            return [future.exception() or future.result() for future in futures]
+
+        index = {future: i for i, future in enumerate(futures)}
+        del futures
+        try:
+            for future in futures_as_completed(list(index)):
+                i = index.pop(future)
+                on_done(i, future.exception() or future.result())
+        finally:
+            _cancel_and_wait(index)
+
+    def resize(self, max_workers):
+        """
+        调整并发上限；已提交的任务在旧线程池中继续完成
+
+        新旧线程池的任务共用 slots，旧任务占用的名额在结束前继续计入，调整后运行中的任务数不超过新上限
+        （调小时等旧任务结束后才达到新上限）
+        """
+        with self._lock:
+            old_pool = self._pool
+            self.max_workers = max(1, int(max_workers))
+            self.slots.resize(self.max_workers)
+            self._pool = None
+        if old_pool is not None:
+            old_pool.shutdown(wait=False)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            pool = self._pool
+            self._pool = None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+
+def _cancel_and_wait(futures):
+    """取消尚未开始的任务并等待正在运行的任务结束"""
+    for future in futures:
+        future.cancel()
+    wait(futures)
+
+
+# 全局实例
+_executor = BellhopExecutor()
+
+
+def get_executor():
+    """获取全局共享执行器"""
+    return _executor
+
+
+def configure_executor(max_workers):
+    """设置全局并发上限"""
+    _executor.resize(max_workers)
+
+
+def shutdown_executor(wait=True):
+    """关闭全局执行器（下次提交时会自动重建）"""
+    _executor.shutdown(wait=wait)
+
+
+atexit.register(shutdown_executor)
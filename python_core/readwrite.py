@@ -9,12 +9,13 @@ if not hasattr(np, 'NaN'):
 
 # 条件导入
 try:
-    from .env import Source, Dom, Pos, cInt, Ice, SSPraw, SSP, HS, BotBndry, TopBndry, Bndry, Box, Beam, Modes, Eigenray
+    from .env import Source, Dom, Pos, cInt, Ice, SSPraw, SSP, HS, BotBndry, TopBndry, Bndry, Box, Beam, Modes, Eigenray, RayStore, ArrivalStore, ARRIVAL_DTYPE
 except ImportError:
-    from env import Source, Dom, Pos, cInt, Ice, SSPraw, SSP, HS, BotBndry, TopBndry, Bndry, Box, Beam, Modes, Eigenray
+    from env import Source, Dom, Pos, cInt, Ice, SSPraw, SSP, HS, BotBndry, TopBndry, Bndry, Box, Beam, Modes, Eigenray, RayStore, ArrivalStore, ARRIVAL_DTYPE
 
 import re
 from math import floor
+from itertools import islice
 
 """ 
     translation of basic read functions from Mike Porter's 
@@ -225,110 +226,127 @@ def write_env(envfil, model, TitleEnv, freq, ssp, bdry, pos, beam, cint, RMax, N
     # **关键修复：确保目录存在**
     os.makedirs(os.path.dirname(envfil), exist_ok=True)
 
-    if (len(varargin) == 0):
-        f = open(envfil, 'w')  # create new env file
-    else:
-        f = open(envfil, 'a')  # append to existing envfil
+    text = EnvTemplate(model, TitleEnv, ssp, bdry, pos, cint, RMax, NMESH).render(freq, beam)
+    with open(envfil, 'w' if len(varargin) == 0 else 'a') as f:  # create new env file / append to existing envfil
+        f.write(text)
 
-    model = model.upper()  # convert to uppercase
 
-    f.write('\'' + TitleEnv + '\' ! Title \r\n')
-    f.write('{:8.2f}'.format(freq) + ' \t \t \t ! Frequency (Hz) \r\n')
-    f.write('{:5d}'.format(ssp.NMedia) + ' \t \t \t ! NMedia \r\n')
-    f.write('\'' + bdry.Top.Opt + '\'' + ' \t \t \t ! Top Option \r\n')
-
-    if (bdry.Top.Opt[0] == 'A'):  # analytic boundary
-        f.write('     {:6.2f}'.format(ssp.depth[0]) + \
-                ' {:6.2f}'.format(bdry.Top.hs.alphaR) + \
-                ' {:6.2f}'.format(bdry.Top.hs.betaR) + \
-                ' {:6.2g}'.format(bdry.Top.hs.rho) + \
-                ' {:6.2f}'.format(bdry.Top.hs.alphaI) + \
-                ' {:6.2f}'.format(bdry.Top.hs.betaI) + \
-                '  \t ! upper halfspace \r\n')
-
-    # SSP
-    for medium in range(ssp.NMedia):
-
-        # get NMESH
-        if NMESH is None:
-            NMESH = ssp.N[medium]
-        f.write('{:5d}'.format(NMESH) + \
-                ' {:4.2f}'.format(ssp.sigma[medium]) + \
-                ' {:6.2f}'.format(ssp.depth[medium + 1]) + ' \t ! N sigma depth \r\n')
-        for ii in range(len(ssp.raw[medium].z)):
-            f.write('\t {:6.2f} '.format(ssp.raw[medium].z[ii]) + \
-                    '{:6.2f} '.format(ssp.raw[medium].alphaR[ii]) + \
-                    '{:6.2f} '.format(ssp.raw[medium].betaR[ii]) + \
-                    '{:6.2g}'.format(ssp.raw[medium].rho[ii]) + \
-                    ' {:10.6f} '.format(ssp.raw[medium].alphaI[ii]) + \
-                    '{:6.2f} '.format(ssp.raw[medium].betaI[ii]) + \
-                    '/ \t ! z c cs rho \r\n')
-
-    # lower halfspace
-    f.write('\'' + bdry.Bot.Opt + '\'' + ' {:6.2f}'.format(
-        ssp.sigma[1]) + '  \t \t ! Bottom Option, sigma\r\n')  # ssp.sigma( 2 ) )
-
-    fmtr = {'all': lambda x: ' {:6.2f}'.format(float(x))}  # , 'void': lambda x: ''}
-    a = np.array([])
-    d = np.array([float(ssp.depth[ssp.NMedia])])
-    vls = [d, bdry.Bot.hs.alphaR, bdry.Bot.hs.betaR, bdry.Bot.hs.rho, \
-           bdry.Bot.hs.alphaI, bdry.Bot.hs.betaI]
-    strings = [np.array2string(x, formatter=fmtr) for x in vls]
-    s = '  {:6.2f} '.format(ssp.depth[ssp.NMedia])
-    for string in strings[1:]:
-        if string == '':
-            string = ' 0.00'
-        s += string
-    if (bdry.Bot.Opt[0] == 'A'):
-        #        print('{:6.2f}'.format(bdry.Bot.hs.betaI[0]))
-        f.write('   ' + s + '  \t  / \t ! lower halfspace \r\n')
-
-    if model in ['SCOOTER', 'KRAKEN', 'KRAKENC', 'SPARC']:
-        f.write('{:6.0f} '.format(cint.Low) + '{:6.0f} \t \t ! cLow cHigh (m/s) \r\n'.format(
-            cint.High))  # phase speed limits
-        f.write('{:8.2f} \t \t \t ! RMax (km) \r\n'.format(RMax))  # maximum range
-
-    # source depths
-    f.write('{:5d} \t \t \t \t ! NSD'.format(len(pos.s.depth)))
-
-    if (len(pos.s.depth) >= 2) and equally_spaced(pos.s.depth):
-        f.write('\r\n    {:6f} '.format(pos.s.depth[0]) + ' {:6f} '.format(pos.s.depth[-1]))
-    else:
-        f.write('\r\n    ')  # {:6f}  '.format( pos.s.depth[0] ))
-        for tmp_depth in pos.s.depth:
-            f.write('{:6f} '.format(tmp_depth))
+class EnvTemplate:
+    """
+    .env 文件模板：环境部分（声速剖面、边界、收发位置）只格式化一次，
+    每次生成文件时只替换频率行和 bellhop 声线参数部分（声线数、角度等）
 
-    f.write('/ \t ! SD(1)  ... (m) \r\n')
+    参数含义与 write_env 相同
+    """
 
-    # receiver depths
+    def __init__(self, model, TitleEnv, ssp, bdry, pos, cint, RMax, NMESH=None):
+        model = model.upper()  # convert to uppercase
+        self.with_beam = (model == 'BELLHOP') or (model == 'FirePE')
+        self.head = '\'' + TitleEnv + '\' ! Title \r\n'
+
+        # 频率行之后、声线参数之前的全部内容
+        out = []
+        out.append('{:5d}'.format(ssp.NMedia) + ' \t \t \t ! NMedia \r\n')
+        out.append('\'' + bdry.Top.Opt + '\'' + ' \t \t \t ! Top Option \r\n')
+
+        if (bdry.Top.Opt[0] == 'A'):  # analytic boundary
+            out.append('     {:6.2f}'.format(ssp.depth[0]) + \
+                       ' {:6.2f}'.format(bdry.Top.hs.alphaR) + \
+                       ' {:6.2f}'.format(bdry.Top.hs.betaR) + \
+                       ' {:6.2g}'.format(bdry.Top.hs.rho) + \
+                       ' {:6.2f}'.format(bdry.Top.hs.alphaI) + \
+                       ' {:6.2f}'.format(bdry.Top.hs.betaI) + \
+                       '  \t ! upper halfspace \r\n')
+
+        # SSP
+        for medium in range(ssp.NMedia):
+
+            # get NMESH
+            if NMESH is None:
+                NMESH = ssp.N[medium]
+            out.append('{:5d}'.format(NMESH) + \
+                       ' {:4.2f}'.format(ssp.sigma[medium]) + \
+                       ' {:6.2f}'.format(ssp.depth[medium + 1]) + ' \t ! N sigma depth \r\n')
+            out.append(_format_ssp_rows(ssp.raw[medium]))
+
+        # lower halfspace
+        out.append('\'' + bdry.Bot.Opt + '\'' + ' {:6.2f}'.format(
+            ssp.sigma[1]) + '  \t \t ! Bottom Option, sigma\r\n')  # ssp.sigma( 2 ) )
+
+        s = '  {:6.2f} '.format(ssp.depth[ssp.NMedia])
+        for x in [bdry.Bot.hs.alphaR, bdry.Bot.hs.betaR, bdry.Bot.hs.rho, bdry.Bot.hs.alphaI, bdry.Bot.hs.betaI]:
+            s += _format_halfspace_value(x)
+        if (bdry.Bot.Opt[0] == 'A'):
+            out.append('   ' + s + '  \t  / \t ! lower halfspace \r\n')
+
+        if model in ['SCOOTER', 'KRAKEN', 'KRAKENC', 'SPARC']:
+            out.append('{:6.0f} '.format(cint.Low) + '{:6.0f} \t \t ! cLow cHigh (m/s) \r\n'.format(
+                cint.High))  # phase speed limits
+            out.append('{:8.2f} \t \t \t ! RMax (km) \r\n'.format(RMax))  # maximum range
 
-    f.write('{:5d} \t \t \t \t ! NRD'.format(len(pos.r.depth)))
+        # source depths
+        out.append('{:5d} \t \t \t \t ! NSD'.format(len(pos.s.depth)))
+        out.append(_format_depth_vector(pos.s.depth, ' '))
+        out.append('/ \t ! SD(1)  ... (m) \r\n')
 
-    if (len(pos.r.depth) >= 2) and equally_spaced(pos.r.depth):
-        f.write('\r\n    {:6f} '.format(pos.r.depth[0]) + '{:6f} '.format(pos.r.depth[-1]))
-    else:
-        f.write('\r\n    ')
-        for tmp_depth in pos.r.depth:
-            f.write('{:6f} '.format(tmp_depth))
+        # receiver depths
+        out.append('{:5d} \t \t \t \t ! NRD'.format(len(pos.r.depth)))
+        out.append(_format_depth_vector(pos.r.depth, ''))
+        out.append('/ \t ! RD(1)  ... (m) \r\n')
 
-    f.write('/ \t ! RD(1)  ... (m) \r\n')    # receiver ranges
-    if (model == 'BELLHOP') or (model == 'FirePE'):
         # receiver ranges
-        f.write('{:5d} \t \t \t \t ! NRR'.format(len(pos.r.range)))
-
-        # **修复：检查range数组是否为空**
-        if len(pos.r.range) == 0:
-            f.write('\r\n    0.0  '.format())
-            f.write('/ \t ! RR(1)  ... (km) \r\n')
-        elif (len(pos.r.range) >= 2) and equally_spaced(pos.r.range):
-            f.write('\r\n    {:6f} '.format(pos.r.range[0]) + '{:6f} '.format(pos.r.range[-1]))
-            f.write('/ \t ! RR(1)  ... (km) \r\n')
-        else:
-            f.write('\r\n    {:6f}  '.format(pos.r.range[0]))
-            f.write('/ \t ! RR(1)  ... (km) \r\n')
-        write_bell(f, beam)
-
-    f.close()
+        if self.with_beam:
+            out.append('{:5d} \t \t \t \t ! NRR'.format(len(pos.r.range)))
+
+            # **修复：检查range数组是否为空**
+            if len(pos.r.range) == 0:
+                out.append('\r\n    0.0  ')
+            elif len(pos.r.range) == 1:
+                out.append('\r\n    {:6f}  '.format(pos.r.range[0]))
+            else:
+                # 等间距时只写首尾两个值，否则写出全部距离
+                out.append(_format_depth_vector(pos.r.range, ''))
+            out.append('/ \t ! RR(1)  ... (km) \r\n')
+        self.body = ''.join(out)
+
+    def render(self, freq, beam):
+        """生成指定频率和声线参数的 .env 文本"""
+        text = self.head + '{:8.2f}'.format(freq) + ' \t \t \t ! Frequency (Hz) \r\n' + self.body
+        if self.with_beam:
+            text += format_bell(beam)
+        return text
+
+    def write(self, envfil, freq, beam):
+        """写出 .env 文件（envfil 含扩展名）"""
+        with open(envfil, 'w') as f:
+            f.write(self.render(freq, beam))
+
+
+def _format_ssp_rows(raw):
+    """格式化一个介质的声速剖面行（z c cs rho alphaI betaI），按列转换后逐行套用同一格式"""
+    n = len(raw.z)
+    columns = [np.asarray(col, dtype=float)[:n] for col in
+               (raw.z, raw.alphaR, raw.betaR, raw.rho, raw.alphaI, raw.betaI)]
+    if any(len(col) < n for col in columns):
+        raise IndexError('SSP columns are shorter than the depth vector')
+    row = '\t %6.2f %6.2f %6.2f %6.2g %10.6f %6.2f / \t ! z c cs rho \r\n'
+    return ''.join(row % values for values in zip(*[col.tolist() for col in columns]))
+
+
+def _format_halfspace_value(x):
+    """半空间参数格式化：标量直接格式化，数组与 np.array2string 的输出一致"""
+    x = np.asarray(x)
+    if x.ndim == 0:
+        return ' {:6.2f}'.format(float(x))
+    string = np.array2string(x, formatter={'all': lambda v: ' {:6.2f}'.format(float(v))})
+    return string if string != '' else ' 0.00'
+
+
+def _format_depth_vector(values, sep):
+    """格式化深度（或距离）向量：等间距时只写首尾两个值（sep 为首尾之间的额外分隔符），否则写出全部值"""
+    if (len(values) >= 2) and equally_spaced(values):
+        return '\r\n    {:6f} '.format(values[0]) + sep + '{:6f} '.format(values[-1])
+    return '\r\n    ' + ''.join(['%6f ' % v for v in np.asarray(values, dtype=float).tolist()])
 
 
 def write_ssp(sspfile, cw, r_arr):
@@ -343,16 +361,36 @@ def write_ssp(sspfile, cw, r_arr):
     """
     if sspfile[-3:] != 'ssp':
         sspfile += '.ssp'
+    write_ssp_matrix(sspfile, r_arr, cw)
+    return
+
+
+def write_ssp_matrix(sspfile, ranges, cw, fmt=None, nprof=None):
+    """
+    写出距离相关声速剖面文件：剖面数、各剖面距离 (km)、按深度逐行的声速矩阵，整个文件拼接后一次写出
+
+    Input
+    sspfile - string
+        path of file to write (with extension)
+    ranges - 1d array
+        ranges (in km) of the profiles
+    cw - numpy 2d array
+        sound speed matrix, rows are depths and columns are profiles
+    fmt - string
+        printf-style format of each matrix value, None writes str(value)
+    nprof - int
+        number of profiles written in the header, default len(ranges)
+    """
+    cw = np.asarray(cw)
+    out = [str(len(ranges) if nprof is None else nprof) + '\r\n',
+           ''.join([str(val) + '\t' for val in ranges]) + '\r\n']
+    if fmt is None:
+        out.extend(''.join([str(val) + '\t' for val in row]) + '\r\n' for row in cw)
+    else:
+        row_fmt = (fmt + '\t') * cw.shape[1] + '\r\n'
+        out.extend(row_fmt % tuple(row) for row in cw.tolist())
     with open(sspfile, 'w') as f:
-        f.write(str(r_arr.size) + '\r\n')
-        for val in r_arr:
-            f.write(str(val) + '\t')
-        f.write('\r\n')
-        for row in range(cw.shape[0]):
-            for val in cw[row, :]:
-                f.write(str(val) + '\t')
-            f.write('\r\n')
-        return
+        f.write(''.join(out))
 
 
 def write_bathy(btyfile, bathm):
@@ -374,33 +412,112 @@ def write_bathy(btyfile, bathm):
 
 
 def write_bell(f, beam):
-    f.write('\'' + beam.RunType + '\'' + ' \t \t \t \t ! Run Type \r\n');
+    f.write(format_bell(beam))
+
+
+def format_bell(beam):
+    """生成 .env 文件中 bellhop 声线参数部分的文本"""
+    out = ['\'' + beam.RunType + '\'' + ' \t \t \t \t ! Run Type \r\n']
 
     if (beam.Ibeam != None):
-        f.write('{:<i}'.format(beam.Nbeams) + '{:<i}'.format(beam.Ibeam) + ' \t \t \t \t ! Nbeams Ibeam \r\n');
+        out.append('{:<i}'.format(beam.Nbeams) + '{:<i}'.format(beam.Ibeam) + ' \t \t \t \t ! Nbeams Ibeam \r\n')
     else:
         # if this is a ray trace run and the field beam.Nrays exists to use
         # fewer rays in the trace, then use that
         if ((beam).RunType[0] == 'R') and (beam.Nrays != None):
-            f.write('{:d}'.format(beam.Nrays) + ' \t \t \t \t \t ! Nbeams \r\n');
+            out.append('{:d}'.format(beam.Nrays) + ' \t \t \t \t \t ! Nbeams \r\n')
         else:
-            f.write('{:d}'.format(beam.Nbeams) + '\t \t \t \t \t ! Nbeams \r\n')
+            out.append('{:d}'.format(beam.Nbeams) + '\t \t \t \t \t ! Nbeams \r\n')
 
-    f.write('{:f}'.format(beam.alpha[0]) + ' {:f} '.format(beam.alpha[-1]) + '/ \t \t ! angles (degrees) \r\n');
-    f.write('{:f}'.format(beam.deltas) + ' {:f}'.format(beam.box.z) + ' {:f}'.format(
-        beam.box.r) + '\t ! deltas (m) box.z (m) box.r (km) \r\n');
+    out.append('{:f}'.format(beam.alpha[0]) + ' {:f} '.format(beam.alpha[-1]) + '/ \t \t ! angles (degrees) \r\n')
+    out.append('{:f}'.format(beam.deltas) + ' {:f}'.format(beam.box.z) + ' {:f}'.format(
+        beam.box.r) + '\t ! deltas (m) box.z (m) box.r (km) \r\n')
 
     # Cerveny-style Gaussian beams
     if (len(beam.RunType) > 1) and ((beam.RunType[1] != 'G') and (beam.RunType[1] != 'B') and (beam.RunType[1] != 'S')):
-        f.write('\'' + beam.Type[0:1] + '\'' + ' {:f}'.format(beam.epmult) + ' {:f}'.format(
+        out.append('\'' + beam.Type[0:1] + '\'' + ' {:f}'.format(beam.epmult) + ' {:f}'.format(
             beam.rLoop) + ' \t \t ! ''Min/Fill/Cer, Sin/Doub/Zero'' Epsmult RLoop (km) \r\n')
-        f.write('{:d}'.format(beam.Nimage) + ' {:d}'.format(beam.Ibwin) + '  \t \t \t \t ! Nimage Ibwin \r\n')
+        out.append('{:d}'.format(beam.Nimage) + ' {:d}'.format(beam.Ibwin) + '  \t \t \t \t ! Nimage Ibwin \r\n')
+    return ''.join(out)
+
+
+def _read_shd_header(f):
+    """
+    读取 .shd 文件头（前 10 条记录）
+
+    Returns:
+        title, PlotType, freqVec, atten, pos, dims, recl
+        dims = (Nfreq, Ntheta, Nsx, Nsy, Nsd, Nrd, Nrr)
+    """
+    pos = Pos(Source(0), Dom(0, 0))
+
+    f.seek(0)
+    recl = int(np.fromfile(f, dtype='<i4', count=1)[0])  # record length in bytes will be 4*recl
+    title = unpack('80s', f.read(80))
+
+    f.seek(4 * recl)  # reposition to end of first record
+    PlotType = f.read(10).decode('ascii', errors='replace')
+
+    f.seek(2 * 4 * recl)  # reposition to end of second record
+    Nfreq, Ntheta, Nsx, Nsy, Nsd, Nrd, Nrr, atten = [int(v) for v in np.fromfile(f, dtype='<i4', count=8)]
+
+    f.seek(3 * 4 * recl)  # reposition to end of record 3
+    freqVec = np.fromfile(f, dtype='<f8', count=Nfreq)
+
+    f.seek(4 * 4 * recl)  # reposition to end of record 4
+    pos.theta = float(np.fromfile(f, dtype='<f4', count=Ntheta)[0])
+
+    if PlotType[0:2] != 'TL':
+        f.seek(5 * 4 * recl)  # reposition to end of record 5
+        pos.s.x = tuple(np.fromfile(f, dtype='<f4', count=Nsx).tolist())
+        f.seek(6 * 4 * recl)  # reposition to end of record 6
+        pos.s.y = tuple(np.fromfile(f, dtype='<f4', count=Nsy).tolist())
+    else:  # compressed format for TL from FIELD3D
+        f.seek(5 * 4 * recl)
+        x = np.fromfile(f, dtype='<f4', count=2)
+        pos.s.x = tuple(np.linspace(x[0], x[-1], Nsx).tolist())
+        f.seek(6 * 4 * recl)
+        y = np.fromfile(f, dtype='<f4', count=2)
+        pos.s.y = tuple(np.linspace(y[0], y[-1], Nsy).tolist())
+
+    f.seek(7 * 4 * recl)  # reposition to end of record 7
+    pos.s.depth = np.fromfile(f, dtype='<f4', count=Nsd).astype(float)
+
+    f.seek(8 * 4 * recl)  # reposition to end of record 8
+    pos.r.depth = np.fromfile(f, dtype='<f4', count=Nrd).astype(float)
+
+    f.seek(9 * 4 * recl)  # reposition to end of record 9
+    pos.r.range = np.round(np.fromfile(f, dtype='<f4', count=Nrr).astype(float), 3)
+
+    return title, PlotType, freqVec, atten, pos, (Nfreq, Ntheta, Nsx, Nsy, Nsd, Nrd, Nrr), recl
+
+
+def _shd_records(filename, recl, shape, Nrr):
+    """
+    按记录步长映射 .shd 数据区（第 10 条记录之后），返回 float32 数组 shape + (recl,)
+    文件完整时使用 np.memmap；最后一条记录只写出 2*Nrr 个数、没有补齐到 recl 时退化为
+    np.fromfile，只补齐记录尾部不读取的部分。声压数据不完整（bellhop 被终止、磁盘写满）时报错
+    """
+    nrec = int(np.prod(shape))
+    offset = 10 * 4 * recl
+    size = os.path.getsize(filename)
+    if size >= offset + nrec * 4 * recl:
+        return np.memmap(filename, dtype='<f4', mode='r', offset=offset, shape=tuple(shape) + (recl,))
+    if size < offset + ((nrec - 1) * recl + 2 * Nrr) * 4:
+        raise ValueError('shd file is truncated')
+    with open(filename, 'rb') as f:
+        f.seek(offset)
+        raw = np.fromfile(f, dtype='<f4', count=nrec * recl)
+    raw = np.concatenate([raw, np.zeros(nrec * recl - raw.size, dtype='<f4')])
+    return raw.reshape(tuple(shape) + (recl,))
+
+
+def _records_to_complex(records, Nrr):
+    """取每条记录的前 2*Nrr 个 float32 并直接视为 complex64（复制出映射区，不保留文件引用）"""
+    return np.array(records[..., :2 * Nrr], dtype='<f4').view(np.complex64)
 
 
 def read_shd_bin(*varargin):
-    s = Source(0)
-    r = Dom(0, 0)
-    pos = Pos(s, r)
     '''
     Read TL surfaces from a binary Bellhop/Kraken .SHD file
     without having to convert to ASCII first.
@@ -408,7 +525,10 @@ def read_shd_bin(*varargin):
     ... = read_shd_bin( filename, xs, ys )
     where (xs, ys) is the source coordinate in km
     (xs, ys) are optional
-    Output is a 4-D pressure field p( Ntheta, Nsd, Nrd, Nrr )
+    ... = read_shd_bin( filename, freq )
+    selects the frequency closest to freq
+    Output is a 4-D complex64 pressure field p( Ntheta, Nsd, Nrd, Nrr ); a broadband file
+    (Nfreq > 1) read without freq gives a 5-D field p( Nfreq, Ntheta, Nsd, Nrd, Nrr )
     '''
     if (len(varargin) < 1) or (len(varargin) > 3):
         raise ValueError("Can only pass one to three arguments: filename; (filename, xs, ys); or (filename, freq)")
@@ -429,123 +549,144 @@ def read_shd_bin(*varargin):
         xs = np.nan
         ys = np.nan
 
-    ##
-    f = open(filename, 'rb')
-
-    recl = unpack('<I', f.read(4))[0];  # record length in bytes will be 4*recl
-    title = unpack('80s', f.read(80))
+    with open(filename, 'rb') as f:
+        title, PlotType, freqVec, atten, pos, dims, recl = _read_shd_header(f)
+    Nfreq, Ntheta, Nsx, Nsy, Nsd, Nrd, Nrr = dims
 
-    f.seek(4 * recl);  # reposition to end of first record
-    PlotType = unpack('10s', f.read(10))
-
-    f.seek(2 * 4 * recl);  # reposition to end of second record
-    Nfreq = unpack('<I', f.read(4))[0]
-    Ntheta = unpack('<I', f.read(4))[0]
-    Nsx = unpack('<I', f.read(4))[0]
-    Nsy = unpack('<I', f.read(4))[0]
-    Nsd = unpack('<I', f.read(4))[0]
-    Nrd = unpack('<I', f.read(4))[0]
-    Nrr = unpack('<I', f.read(4))[0]
-    atten = unpack('<I', f.read(4))[0]
-    f.seek(3 * 4 * recl);  # reposition to end of record 3
-    freqVec = unpack(str(Nfreq) + 'd', f.read(Nfreq * 8))
-
-    f.seek(4 * 4 * recl);  # reposition to end of record 4
-    pos.theta = unpack(str(Ntheta) + 'f', f.read(4 * Ntheta))[0]
-
-    if (PlotType[1: 2] != 'TL'):
-        f.seek(5 * 4 * recl);  # reposition to end of record 5
-        pos.s.x = unpack(str(Nsx) + 'f', f.read(Nsx * 4))
-        f.seek(6 * 4 * recl);  # reposition to end of record 6
-        pos.s.y = unpack(str(Nsy) + 'f', f.read(Nsy * 4))
-    else:  # compressed format for TL from FIELD3D
-        f.seek(5 * 4 * recl, -1);  # reposition to end of record 5
-        pos.s.x = f.read(2, 'float32')
-        pos.s.x = np.linspace(pos.s.x[0], pos.s.x[-1], Nsx)
-
-        f.seek(6 * 4 * recl, -1);  # reposition to end of record 6
-        pos.s.y = f.read(2, 'float32')
-        pos.s.y = np.linspace(pos.s.y[0], pos.s.y[-1], Nsy)
-
-    f.seek(7 * 4 * recl);  # reposition to end of record 7
-    pos.s.depth = unpack(str(Nsd) + 'f', f.read(Nsd * 4))
-    pos.s.depth = np.array(pos.s.depth)
-
-    f.seek(8 * 4 * recl);  # reposition to end of record 8
-    pos.r.depth = unpack(str(Nrd) + 'f', f.read(Nrd * 4))
-    pos.r.depth = np.array(pos.r.depth)
-
-    f.seek(9 * 4 * recl);  # reposition to end of record 9
-    pos.r.range = unpack(str(Nrr) + 'f', f.read(Nrr * 4))
-    # pos.r.range = pos.r.range';   # make it a row vector
-    pos.r.range = np.array(pos.r.range)
-    pos.r.range = np.round(pos.r.range, 3)
-    ##
     # Each record holds data from one source depth/receiver depth pair
-
-    if PlotType == 'rectilin  ':
-        pressure = np.zeros((Ntheta, Nsd, Nrd, Nrr), dtype=np.complex128)
-        Nrcvrs_per_range = Nrd
     if PlotType == 'irregular ':
-        pressure = np.zeros((Ntheta, Nsd, 1, Nrr), dtype=np.complex128)
         Nrcvrs_per_range = 1
     else:
-        pressure = np.zeros((Ntheta, Nsd, Nrd, Nrr), dtype=np.complex128)
         Nrcvrs_per_range = Nrd
 
-    ##
-    if np.isnan(xs):  # Just read the first xs, ys, but all theta, sd, and rd
-        # get the index of the frequency if one was selected
-        ifreq = 0
-        if not np.isnan(freq):
-            freqdiff = [abs(x - freq) for x in freqVec]
-            ifreq = min(freqdiff)
-
-        for itheta in range(Ntheta):
-            for isd in range(Nsd):
-                # disp( [ 'Reading data for source at depth ' num2str( isd ) ' of ' num2str( Nsd ) ] )
-                for ird in range(Nrcvrs_per_range):
-                    recnum = 10 + (ifreq) * Ntheta * Nsd * Nrcvrs_per_range + \
-                             (itheta) * Nsd * Nrcvrs_per_range + \
-                             (isd) * Nrcvrs_per_range + \
-                             ird
-                    status = f.seek(int(recnum) * 4 * recl);  # Move to end of previous record
-                    if (status == -1):
-                        raise ValueError('Seek to specified record failed in read_shd_bin')
-                    temp = unpack(str(2 * Nrr) + 'f', f.read(2 * Nrr * 4));  # Read complex data
-                    pressure[itheta, isd, ird, :] = temp[0: 2 * Nrr - 1: 2] + complex(0, 1) * np.array(
-                        (temp[1: 2 * Nrr:2]))
-                    # Transmission loss matrix indexed by  theta x sd x rd x rr
-
-    else:  # read for a source at the desired x, y, z.
-
-        xdiff = abs(pos.s.x - xs * 1000.)
-        [holder, idxX] = min(xdiff)
-        ydiff = abs(pos.s.y - ys * 1000.)
-        [holder, idxY] = min(ydiff)
-
-        # show the source x, y that was found to be closest
-        # [ pos.s.x( idxX ) pos.s.y( idxY ) ]
-        for itheta in range(Ntheta):
-            for isd in range(Nsd):
-                # disp( [ 'Reading data for source at depth ' num2str( isd ) ' of ' num2str( Nsd ) ] )
-                for ird in range(Nrcvrs_per_range):
-                    recnum = 10 + (idxX - 1) * Nsy * Ntheta * Nsd * Nrcvrs_per_range + \
-                             (idxY - 1) * Ntheta * Nsd * Nrcvrs_per_range + \
-                             (itheta - 1) * Nsd * Nrcvrs_per_range + \
-                             (isd - 1) * Nrcvrs_per_range + ird - 1
-                    status = f.seek(recnum * 4 * recl);  # Move to end of previous record
-                    if (status == -1):
-                        raise ValueError('Seek to specified record failed in read_shd_bin')
-
-                    temp = f.read(2 * Nrr, 'float32');  # Read complex data
-                    pressure[itheta, isd, ird, :] = temp[1: 2: 2 * Nrr] + complex(0, 1) * np.array(temp[2: 2: 2 * Nrr])
-                    # Transmission loss matrix indexed by  theta x sd x rd x rr
-
-    f.close()
+    # 所有记录按 (xs, ys, freq, theta, sd, rd) 顺序排列，一次映射后按下标选取
+    records = _shd_records(filename, recl, (Nsx, Nsy, Nfreq, Ntheta, Nsd, Nrcvrs_per_range), Nrr)
+
+    idxX, idxY = 0, 0  # Just read the first xs, ys, but all theta, sd, and rd
+    if not np.isnan(xs):  # read for a source at the desired x, y, z.
+        idxX = int(np.argmin(np.abs(np.asarray(pos.s.x) - xs * 1000.)))
+        idxY = int(np.argmin(np.abs(np.asarray(pos.s.y) - ys * 1000.)))
+    selected = records[idxX, idxY]
+
+    # get the index of the frequency if one was selected
+    if not np.isnan(freq):
+        selected = selected[int(np.argmin(np.abs(freqVec - freq)))]
+    elif Nfreq == 1:
+        selected = selected[0]
+
+    # Transmission loss matrix indexed by [freq x] theta x sd x rd x rr
+    pressure = _records_to_complex(selected, Nrr)
+    del records, selected
     return [title, PlotType, freqVec, atten, pos, pressure]
 
 
+def _take(arr, sel, axis):
+    """沿某一轴选取：int 去掉该维，slice 保持惰性视图，下标数组只读取选中的记录"""
+    if sel is None:
+        return arr
+    if isinstance(sel, slice):
+        return arr[(slice(None),) * axis + (sel,)]
+    return np.take(arr, sel, axis=axis)
+
+
+class ShdField:
+    '''
+    Lazy handle on a binary .shd file
+
+    The header (title, PlotType, freqVec, atten, Pos) is read when the handle is opened;
+    pressure is read on demand from a memory map of the record block, so asking for a few
+    receiver depths or a range window only touches those records.
+
+    usage:
+        with ShdField( 'file.shd' ) as field:
+            p  = field.pressure( freq=100, rd=[ 0, 5 ], range_window=( 1000, 5000 ) )
+            tl = field.transmission_loss( rd=field.depth_index( 50.0 ) )
+    '''
+
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self.title, self.PlotType, self.freqVec, self.atten, self.Pos, dims, self.recl = _read_shd_header(f)
+        self.Nfreq, self.Ntheta, self.Nsx, self.Nsy, self.Nsd, self.Nrd, self.Nrr = dims
+        self.Nrcvrs_per_range = 1 if self.PlotType == 'irregular ' else self.Nrd
+        self._records = _shd_records(filename, self.recl, (self.Nsx, self.Nsy, self.Nfreq, self.Ntheta,
+                                                           self.Nsd, self.Nrcvrs_per_range), self.Nrr)
+
+    @property
+    def shape(self):
+        """完整声压场的形状 (Nfreq, Ntheta, Nsd, Nrd, Nrr)"""
+        return (self.Nfreq, self.Ntheta, self.Nsd, self.Nrcvrs_per_range, self.Nrr)
+
+    def freq_index(self, freq):
+        """最接近 freq 的频率下标"""
+        return int(np.argmin(np.abs(self.freqVec - freq)))
+
+    def depth_index(self, depths):
+        """最接近给定接收深度 (m) 的下标"""
+        depths = np.asarray(depths, dtype=float)
+        idx = np.argmin(np.abs(self.Pos.r.depth[None, :] - depths.reshape(-1, 1)), axis=1)
+        return int(idx[0]) if depths.ndim == 0 else idx
+
+    def range_slice(self, range_window):
+        """距离窗口 (rmin, rmax)（m，闭区间）对应的下标切片"""
+        ranges = self.Pos.r.range
+        inside = np.nonzero((ranges >= range_window[0]) & (ranges <= range_window[1]))[0]
+        if inside.size == 0:
+            return slice(0, 0)
+        return slice(int(inside[0]), int(inside[-1]) + 1)
+
+    def pressure(self, freq=None, sd=None, rd=None, range_window=None, itheta=0, xs=None, ys=None):
+        """
+        按需读取声压（complex64）
+
+        Args:
+            freq: 频率 (Hz)，取最接近的一个；None 表示全部频率（保留频率维）
+            sd: 声源深度下标（int、slice 或下标数组）；None 表示全部
+            rd: 接收深度下标（int、slice 或下标数组）；None 表示全部
+            range_window: 距离窗口 (rmin, rmax)，单位 m；None 表示全部距离
+            itheta: 方位下标
+            xs, ys: 声源坐标 (km)，默认第一个声源
+
+        Returns:
+            依次为 [freq,] [sd,] [rd,] range 维的数组；int 选择对应的维被去掉
+        """
+        idxX, idxY = 0, 0
+        if xs is not None:
+            idxX = int(np.argmin(np.abs(np.asarray(self.Pos.s.x) - xs * 1000.)))
+            idxY = int(np.argmin(np.abs(np.asarray(self.Pos.s.y) - ys * 1000.)))
+
+        # 记录维依次为 freq, theta, sd, rd；int 选择会去掉对应的维
+        selected = self._records[idxX, idxY]
+        axis = 0
+        for sel in (None if freq is None else self.freq_index(freq), itheta, sd, rd):
+            selected = _take(selected, sel, axis)
+            if not isinstance(sel, (int, np.integer)):
+                axis += 1
+
+        window = slice(0, self.Nrr) if range_window is None else self.range_slice(range_window)
+        return np.array(selected[..., 2 * window.start:2 * window.stop], dtype='<f4').view(np.complex64)
+
+    def transmission_loss(self, min_db_threshold=-250.0, **selection):
+        """按需读取并计算传输损失 (dB)，选择参数同 pressure"""
+        magnitude = np.abs(self.pressure(**selection)).astype(float)
+        magnitude = np.maximum(magnitude, 10 ** (min_db_threshold / 20.0))
+        return np.minimum(-20 * np.log10(magnitude), -min_db_threshold)
+
+    def close(self):
+        """释放内存映射（Windows 上删除文件前需要先关闭）"""
+        self._records = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def __repr__(self):
+        return f'ShdField({self.filename!r}, shape={self.shape}, PlotType={self.PlotType!r})'
+
+
 def read_ram_bin(fname):
     """
     Red the .out file from rammpl
@@ -597,12 +738,15 @@ def read_ram_bin(fname):
     return cp, f, z, r
 
 
-def read_shd(*varargin):
+def read_shd(*varargin, lazy=False):
     '''
      Read the shade file
     [ PlotTitle, PlotType, freqVec, atten, Pos, pressure ] return vals
      calls the appropriate routine (binary, ascii, or mat file) to read in the pressure field
 
+     usage: field = read_shd( filename, lazy=True )
+        Returns a ShdField handle for a binary .shd file instead of reading the pressure.
+
      usage: [ PlotTitle, PlotType, freqVec, atten, Pos, pressure ] = read_shd( filename )
         Reads first source.
             [ PlotTitle, PlotType, freqVec, atten, Pos, pressure ] = read_shd( filename, xs, ys )
@@ -665,6 +809,11 @@ def read_shd(*varargin):
             if (endchar >= 4):
                 FileType = filename[endchar - 3: endchar].lower()
 
+    if lazy:
+        if FileType not in ['shd', 'grn']:
+            raise ValueError('Lazy reading is only supported for binary .shd/.grn files')
+        return ShdField(filename)
+
     ##
     PlotTitle, PlotType, freqVec, atten, pos, pressure = [], [], [], [], [], []
     if FileType in ['shd', 'grn']:  # binary format
@@ -1410,52 +1559,223 @@ def read_arrivals_asc_alt(fname, narrmx=200):
                     arrival_list.append(loc_arrivals)
     return arrival_list, pos
 
-def get_rays(fname):
+def _arrivals_from_values(counts, values, shape, freq, sd, rd, rr):
+    """由每个接收点的到达数和 (到达总数, 8) 的数值数组构造 ArrivalStore"""
+    data = np.zeros(len(values), dtype=ARRIVAL_DTYPE)
+    data['amp'] = values[:, 0]
+    data['phase'] = values[:, 1]
+    data['delay'] = values[:, 2] + 1j * values[:, 3]
+    data['src_ang'] = values[:, 4]
+    data['rec_ang'] = values[:, 5]
+    data['num_top_bnc'] = values[:, 6]
+    data['num_bot_bnc'] = values[:, 7]
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    pos = Pos(Source(np.array(sd)), Dom(np.array(rr), np.array(rd)))
+    return ArrivalStore(data, offsets, shape, freq, pos)
+
+
+def _gather_blocks(values, heads, counts, width):
+    """从一维数组中取出各接收点的到达块（起点 heads，各 counts × width 个数），返回 (到达数, width)"""
+    counts = np.asarray(counts, dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(counts)]) * width
+    index = np.repeat(np.asarray(heads, dtype=np.int64) - offsets[:-1], counts * width) + np.arange(offsets[-1])
+    return values[index].reshape(-1, width)
+
+
+def _read_arrivals_ascii(text):
+    lines = text.split('\n', 5)
+    if lines[0].strip().startswith("'"):
+        # 新格式：'2D'，频率，以及 "个数 值..." 形式的声源深度、接收深度、接收距离
+        if '3D' in lines[0]:
+            raise ValueError('3D arrivals files are not supported')
+        freq = float(lines[1].split()[0])
+        sd, rd, rr = [[float(x) for x in line.split()[1:]] for line in lines[2:5]]
+        body = lines[5] if len(lines) > 5 else ''
+    else:
+        # 旧格式：首行为 频率 Nsd Nrd Nrr，之后三行为坐标
+        freq = float(lines[0].split()[0])
+        sd, rd, rr = [[float(x) for x in line.split()] for line in lines[1:4]]
+        body = '\n'.join(lines[4:])
+    shape = (len(sd), len(rd), len(rr))
+    tokens = _parse_numbers(body)
+
+    nrcv = shape[1] * shape[2]
+    heads = np.empty(shape[0] * nrcv, dtype=np.int64)
+    counts = np.empty(shape[0] * nrcv, dtype=np.int64)
+    pos = 0
+    i = 0
+    for isd in range(shape[0]):
+        pos += 1  # 该声源所有接收点中的最大到达数
+        for k in range(nrcv):
+            n = int(tokens[pos])
+            heads[i], counts[i] = pos + 1, n
+            pos += 1 + 8 * n
+            i += 1
+    if pos > len(tokens):
+        raise ValueError('arrivals file is truncated')
+    return _arrivals_from_values(counts, _gather_blocks(tokens, heads, counts, 8), shape, freq, sd, rd, rr)
+
+
+def _read_arrivals_binary(buf):
+    """Fortran 无格式顺序文件：每条记录前后各有 4 字节的记录长度"""
+    def record(pos):
+        n = unpack('<i', buf[pos:pos + 4])[0]
+        return pos + 4, n, pos + 8 + n
+
+    start, n, pos = record(0)
+    flag = buf[start:start + n].decode('ascii', errors='replace')
+    if '3D' in flag:
+        raise ValueError('3D arrivals files are not supported')
+    start, n, pos = record(pos)
+    freq = float(np.frombuffer(buf, dtype='<f8' if n == 8 else '<f4', count=1, offset=start)[0])
+    coords = []
+    for _ in range(3):
+        start, n, pos = record(pos)
+        count = unpack('<i', buf[start:start + 4])[0]
+        coords.append(np.frombuffer(buf, dtype='<f4', count=count, offset=start + 4).astype(float).tolist())
+    sd, rd, rr = coords
+    shape = (len(sd), len(rd), len(rr))
+
+    # 每个到达是一条记录：6 个 float32 和 2 个 int32（海面、海底反射次数），连同记录长度共 40 字节
+    nrcv = shape[1] * shape[2]
+    heads = np.empty(shape[0] * nrcv, dtype=np.int64)
+    counts = np.empty(shape[0] * nrcv, dtype=np.int64)
+    i = 0
+    for isd in range(shape[0]):
+        pos = record(pos)[2]  # 该声源所有接收点中的最大到达数
+        for k in range(nrcv):
+            start, n, pos = record(pos)
+            count = unpack('<i', buf[start:start + 4])[0]
+            heads[i], counts[i] = pos + 4, count
+            if count and unpack('<i', buf[pos:pos + 4])[0] != 32:
+                raise ValueError('unsupported binary arrivals record layout')
+            pos += 40 * count
+            i += 1
+    if pos > len(buf):
+        raise ValueError('arrivals file is truncated')
+
+    # 所有记录长度都是 4 的倍数，按到达记录的对齐方式把文件看作 4 字节数组
+    shift = int(heads[0] % 4) if len(heads) else 0
+    values = np.frombuffer(buf, dtype='<f4', count=(len(buf) - shift) // 4, offset=shift)
+    # 同一接收点的相邻到达记录间隔 10 个数（8 个数值加前后两个记录长度字段）
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    first = np.repeat((heads - shift) // 4 - 10 * starts, counts) + 10 * np.arange(counts.sum())
+    index = first[:, None] + np.arange(8)
+    blocks = values[index].astype(float)
+    # 反射次数 NTopBnc、NBotBnc 是 INTEGER，按 int32 解释同一段数据
+    blocks[:, 6:] = values.view('<i4')[index[:, 6:]]
+    return _arrivals_from_values(counts, blocks, shape, freq, sd, rd, rr)
+
+
+def read_arrivals(fname):
+    """
+    读取 bellhop 的到达结构文件（.arr），自动识别 ASCII（新旧两种文件头）和二进制格式
+
+    Returns:
+        ArrivalStore：所有到达的结构化数组和每个接收点的偏移，pos 为收发位置（接收距离单位 m）
+    """
+    if fname[-4:] != '.arr':
+        fname = fname + '.arr'
+    with open(fname, 'rb') as f:
+        buf = f.read()
+    if buf[:1] in (b"'", b' ', b'\t') or buf[:1].isdigit() or buf[:1] in (b'-', b'+', b'.'):
+        return _read_arrivals_ascii(buf.decode('ascii', errors='replace'))
+    return _read_arrivals_binary(buf)
+
+
+def _ray_header(lines):
+    """解析 .ray 文件的 7 行文件头，返回 (声源深度数, 每个声源的射线数, 每个点的坐标个数)"""
+    Nsz = int(lines[2].split()[2])
+    Nalpha = int(lines[3].split()[0])
+    ndim = 3 if 'xyz' in lines[6] else 2
+    return Nsz, Nalpha, ndim
+
+
+def _parse_numbers(text):
+    """把空白分隔的数值文本整体转换为 float 数组"""
+    try:
+        return np.fromstring(text, dtype=float, sep=' ')
+    except ValueError:  # Fortran 的 D 指数等 NumPy 不识别的写法
+        return np.array(text.replace('D', 'E').replace('d', 'e').split(), dtype=float)
+
+
+def _rays_from_tokens(tokens, heads, ndim):
+    """由数值数组和每条射线头部（发射角、点数、反射次数）的位置构造 RayStore"""
+    if len(heads) == 0:
+        return RayStore.empty()
+    heads = np.asarray(heads, dtype=np.int64)
+    nsteps = tokens[heads + 1].astype(np.int64)
+    offsets = np.concatenate([[0], np.cumsum(nsteps)])
+    # 所有射线坐标在 tokens 中的位置，一次性取出
+    starts = heads + 4 - offsets[:-1] * ndim
+    index = np.repeat(starts, nsteps * ndim) + np.arange(offsets[-1] * ndim)
+    coords = tokens[index].reshape(-1, ndim)
+    return RayStore(np.ascontiguousarray(coords[:, :2].T), offsets, tokens[heads],
+                    tokens[heads + 2].astype(np.int64), tokens[heads + 3].astype(np.int64))
+
+
+def read_rays(fname):
+    """
+    读取 bellhop 的 .ray 文件，整个文件一次性转换为数值数组
+
+    Returns:
+        每个声源深度一个 RayStore 的列表；文件被截断时只包含完整的射线
+    """
     with open(fname, 'r') as f:
-        lines = f.readlines()
-        TITLE = lines[0]
-        freq = float(lines[1])
-        tmp = lines[2].split(' ')
-        tmp = [x for x in tmp if x != '']
-        Nsx = int(tmp[0])
-        Nsy = int(tmp[1])
-        Nsz = int(tmp[2])
-        tmp = lines[3].split(' ')
-        tmp = [x for x in tmp if x != '']
-        Nalpha = int(tmp[0])
-        Nbeta = int(tmp[1])
-        deptht = float(lines[4])
-        depthb = float(lines[5])
-
-        line_ind = 7
-        ray_collections = []
-        for i in range(Nsz):
-            source_collection = []
+        text = f.read()
+    parts = text.split('\n', 7)
+    Nsz, Nalpha, ndim = _ray_header(parts)
+    tokens = _parse_numbers(parts[7] if len(parts) > 7 else '')
+
+    ntokens = len(tokens)
+    pos = 0
+    ray_collections = []
+    for isz in range(Nsz):
+        heads = []
+        for ibeam in range(Nalpha):
+            if pos + 4 > ntokens:
+                break
+            end = pos + 4 + int(tokens[pos + 1]) * ndim
+            if end > ntokens:
+                break
+            heads.append(pos)
+            pos = end
+        ray_collections.append(_rays_from_tokens(tokens, heads, ndim))
+    return ray_collections
+
+
+def iter_rays(fname, chunk_size=1024):
+    """
+    逐块读取 .ray 文件，适用于无法整体放入内存的大文件
+
+    Yields:
+        (声源深度下标, RayStore)，每块最多 chunk_size 条射线，不跨越声源
+    """
+    with open(fname, 'r') as f:
+        Nsz, Nalpha, ndim = _ray_header([f.readline() for _ in range(7)])
+        for isz in range(Nsz):
+            chunk = []
             for ibeam in range(Nalpha):
-                if line_ind >= len(lines) - 1:
+                angle = f.readline()
+                counts = f.readline().split()
+                if not angle.strip() or len(counts) < 3:
+                    break
+                nsteps = int(counts[0])
+                coords = _parse_numbers(''.join(islice(f, nsteps)))
+                coords = coords[:len(coords) // ndim * ndim].reshape(-1, ndim)
+                if len(coords) < nsteps:
                     break
-                else:
-                    angle = float(lines[line_ind])
-                    line_ind += 1
-                    tmp = lines[line_ind].split(' ')
-                    tmp = [x for x in tmp if x != '']
-                    nsteps = int(tmp[0])
-                    num_top_bnc = int(tmp[1])
-                    num_bot_bnc = int(tmp[2])
-                    line_ind += 1
-                    xy = np.zeros((2, nsteps))
-                    counter = 0
-                    for line_ind in range(line_ind, line_ind + nsteps):
-                        tmp = lines[line_ind].split(' ')
-                        tmp = [x for x in tmp if x != '']
-                        xy[0, counter], xy[1, counter] = float(tmp[0]), float(tmp[1])
-                        counter += 1
-                    ray = Eigenray(angle, num_top_bnc, num_bot_bnc, xy)
-                    source_collection.append(ray)
-                    line_ind += 1
-            ray_collections.append(source_collection)
-
-        return ray_collections
+                chunk.append(Eigenray(float(angle), int(counts[1]), int(counts[2]), coords[:, :2].T))
+                if len(chunk) == chunk_size:
+                    yield isz, RayStore.from_rays(chunk)
+                    chunk = []
+            if chunk:
+                yield isz, RayStore.from_rays(chunk)
+
+
+def get_rays(fname):
+    """读取 .ray 文件，返回每个声源深度一个 RayStore（可按下标或迭代得到 Eigenray）"""
+    return read_rays(fname)
 
 
 def read_shd_asc(filename):
@@ -0,0 +1,295 @@
+"""
+Bellhop子进程运行引擎
+直接 exec bellhop（不经过 shell），检查退出码，支持墙钟/CPU 时间限制、
+超时终止失控进程、从 .prt 文件或 stderr 提取失败原因，以及带退避的重试
+"""
+import os
+import time
+import signal
+import asyncio
+import subprocess
+
+try:
+    import resource  # 仅 POSIX 可用
+except ImportError:
+    resource = None
+
+try:
+    from .project import get_project_root
+    from .executor import get_executor
+except ImportError:
+    from project import get_project_root
+    from executor import get_executor
+
+
+def _env_number(name, default, cast=float):
+    """读取数值型环境变量，无效或未设置时返回默认值"""
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        print(f"警告: 无效的 {name}={value!r}，使用默认值 {default}")
+        return default
+
+
+# 默认运行限制，可通过环境变量覆盖
+DEFAULT_TIMEOUT = _env_number('BELLHOP_TIMEOUT', 600.0)        # 单次运行墙钟时间上限 (s)
+DEFAULT_CPU_LIMIT = _env_number('BELLHOP_CPU_LIMIT', None, int)  # 单次运行 CPU 时间上限 (s)
+DEFAULT_RETRIES = _env_number('BELLHOP_RETRIES', 1, int)        # 失败后的重试次数
+DEFAULT_BACKOFF = _env_number('BELLHOP_RETRY_BACKOFF', 0.5)     # 首次重试等待时间 (s)，之后翻倍
+
+# 输入错误等确定性失败，重试没有意义
+NON_RETRYABLE = ('binary_missing', 'fatal_error')
+
+
+class BellhopRunError(RuntimeError):
+    """
+    bellhop 运行失败
+
+    reason 取值：
+        binary_missing  找不到 bellhop 可执行文件
+        timeout         超过墙钟时间上限，进程已被终止
+        cpu_limit       超过 CPU 时间上限，进程被系统终止
+        exit_code       非零退出码或被信号终止
+        fatal_error     .prt 文件中报告了错误
+        no_output       运行结束但没有生成预期的输出文件
+    """
+
+    def __init__(self, filename, reason, returncode=None, detail='', attempts=1):
+        self.filename = filename
+        self.reason = reason
+        self.returncode = returncode
+        self.detail = detail
+        self.attempts = attempts
+        message = f"bellhop run failed for {filename}: {reason}"
+        if returncode is not None:
+            message += f" (returncode={returncode})"
+        if detail:
+            message += f": {detail}"
+        super().__init__(message)
+
+    def to_dict(self):
+        return {
+            'filename': self.filename,
+            'reason': self.reason,
+            'returncode': self.returncode,
+            'detail': self.detail,
+            'attempts': self.attempts
+        }
+
+
+def bellhop_executable(bin_path=None):
+    """bellhop 可执行文件路径，默认使用项目 bin 目录"""
+    if bin_path is None:
+        bin_path = os.path.join(get_project_root(), 'bin')
+    name = 'bellhop.exe' if os.name == 'nt' else 'bellhop'
+    return os.path.join(bin_path, name)
+
+
+def bellhop_command(filename, bin_path=None):
+    """
+    生成运行命令和工作目录
+
+    bellhop 的文件名参数是定长 Fortran 字符串，因此在文件所在目录中运行并只传基名
+    """
+    workdir = os.path.dirname(os.path.abspath(filename))
+    return [bellhop_executable(bin_path), os.path.basename(filename)], workdir
+
+
+def _popen_kwargs():
+    """平台相关的子进程参数：独立进程组（便于整体终止）"""
+    if os.name != 'posix':
+        return {}
+    return {'start_new_session': True}
+
+
+def limit_cpu(proc, cpu_limit):
+    """
+    启动后用 prlimit 设置子进程的 CPU 时间上限
+
+    不使用 preexec_fn：它在 fork 与 exec 之间执行 Python 代码，多线程进程（线程池提交）中不安全。
+    没有 prlimit 的平台（非 Linux）不限制 CPU 时间
+    """
+    if not cpu_limit or resource is None or not hasattr(resource, 'prlimit'):
+        return
+    try:
+        resource.prlimit(proc.pid, resource.RLIMIT_CPU, (int(cpu_limit), int(cpu_limit) + 1))
+    except ProcessLookupError:
+        pass  # 进程已经结束
+
+
+def remove_outputs(filename, output_ext=None):
+    """删除上一次运行留下的输出文件和 .prt，避免失败的运行被误判为成功或读到旧结果"""
+    for ext in ('.prt', output_ext):
+        if ext and os.path.exists(filename + ext):
+            os.remove(filename + ext)
+
+
+def kill_process(proc):
+    """终止子进程及其进程组"""
+    try:
+        if os.name == 'posix':
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+
+def read_prt_errors(filename, max_lines=5):
+    """从 .prt 文件中提取错误信息，没有错误时返回空字符串"""
+    prtfile = filename + '.prt'
+    if not os.path.exists(prtfile):
+        return ''
+    try:
+        with open(prtfile, 'r', errors='replace') as f:
+            lines = f.readlines()
+    except OSError:
+        return ''
+    for i, line in enumerate(lines):
+        if 'ERROR' in line:
+            context = [l.strip() for l in lines[i:i + max_lines] if l.strip()]
+            return ' | '.join(context)
+    return ''
+
+
+def classify_result(filename, returncode, stderr, output_ext=None, cpu_limit=None):
+    """根据退出码、.prt 和输出文件判断运行结果，成功返回 None，失败返回 (reason, detail)"""
+    stderr = (stderr or '').strip()
+    prt_errors = read_prt_errors(filename)
+    if returncode != 0:
+        if cpu_limit and returncode in (-getattr(signal, 'SIGXCPU', 24), -signal.SIGKILL):
+            return 'cpu_limit', prt_errors or stderr or f'exceeded {cpu_limit}s CPU time'
+        return 'exit_code', prt_errors or stderr[-500:]
+    if prt_errors:
+        return 'fatal_error', prt_errors
+    if output_ext and not os.path.exists(filename + output_ext):
+        return 'no_output', stderr[-500:] or f'{filename + output_ext} was not written'
+    return None
+
+
+def run_bellhop_once(filename, bin_path=None, timeout=None, cpu_limit=None, output_ext=None):
+    """运行一次 bellhop，失败时抛出 BellhopRunError"""
+    cmd, workdir = bellhop_command(filename, bin_path)
+    if not os.path.exists(cmd[0]):
+        raise BellhopRunError(filename, 'binary_missing', detail=cmd[0])
+
+    remove_outputs(filename, output_ext)
+    proc = subprocess.Popen(cmd, cwd=workdir, stdin=subprocess.DEVNULL,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            **_popen_kwargs())
+    limit_cpu(proc, cpu_limit)
+    try:
+        stdout, stderr = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        kill_process(proc)
+        proc.communicate()
+        raise BellhopRunError(filename, 'timeout', returncode=proc.returncode,
+                              detail=f'exceeded {timeout}s wall-clock time')
+
+    failure = classify_result(filename, proc.returncode, stderr.decode(errors='replace'),
+                              output_ext, cpu_limit)
+    if failure is not None:
+        reason, detail = failure
+        raise BellhopRunError(filename, reason, returncode=proc.returncode, detail=detail)
+
+
+def _resolve_limits(timeout, cpu_limit, retries, backoff):
+    """未指定的运行限制使用默认值"""
+    return (DEFAULT_TIMEOUT if timeout is None else timeout,
+            DEFAULT_CPU_LIMIT if cpu_limit is None else cpu_limit,
+            DEFAULT_RETRIES if retries is None else retries,
+            DEFAULT_BACKOFF if backoff is None else backoff)
+
+
+def _retry_delay(error, attempt, retries, backoff):
+    """返回重试前的等待时间；不应重试时返回 None"""
+    error.attempts = attempt
+    if error.reason in NON_RETRYABLE or attempt > retries:
+        return None
+    delay = backoff * (2 ** (attempt - 1))
+    print(f"警告: bellhop 运行失败 ({error.reason})，{delay:.1f}s 后重试 [{attempt}/{retries}]: {error.filename}")
+    return delay
+
+
+def run_bellhop(filename, bin_path=None, timeout=None, cpu_limit=None, retries=None,
+                backoff=None, output_ext=None):
+    """
+    运行 bellhop，可重试
+
+    Args:
+        filename: 环境文件路径（不含 .env 扩展名）
+        bin_path: bellhop 所在目录，默认项目 bin 目录
+        timeout: 墙钟时间上限 (s)，默认 BELLHOP_TIMEOUT
+        cpu_limit: CPU 时间上限 (s)，默认 BELLHOP_CPU_LIMIT（仅 POSIX）
+        retries: 失败后的重试次数，默认 BELLHOP_RETRIES
+        backoff: 首次重试前的等待时间 (s)，之后每次翻倍
+        output_ext: 期望生成的输出文件扩展名，例如 '.shd' 或 '.ray'
+
+    Raises:
+        BellhopRunError: 重试后仍失败
+    """
+    timeout, cpu_limit, retries, backoff = _resolve_limits(timeout, cpu_limit, retries, backoff)
+
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            run_bellhop_once(filename, bin_path, timeout, cpu_limit, output_ext)
+            return
+        except BellhopRunError as e:
+            delay = _retry_delay(e, attempt, retries, backoff)
+            if delay is None:
+                raise
+            time.sleep(delay)
+
+
+async def run_bellhop_once_async(filename, bin_path=None, timeout=None, cpu_limit=None, output_ext=None):
+    """run_bellhop_once 的 asyncio 版本，通过 asyncio.create_subprocess_exec 运行"""
+    cmd, workdir = bellhop_command(filename, bin_path)
+    if not os.path.exists(cmd[0]):
+        raise BellhopRunError(filename, 'binary_missing', detail=cmd[0])
+
+    # 与共享执行器的线程池任务共用并发名额，同步和异步请求合计不超过 max_workers 个 bellhop 进程
+    async with get_executor().slots:
+        remove_outputs(filename, output_ext)
+        proc = await asyncio.create_subprocess_exec(*cmd, cwd=workdir, stdin=subprocess.DEVNULL,
+                                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                                    **_popen_kwargs())
+        limit_cpu(proc, cpu_limit)
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            kill_process(proc)
+            await proc.communicate()
+            raise BellhopRunError(filename, 'timeout', returncode=proc.returncode,
+                                  detail=f'exceeded {timeout}s wall-clock time')
+        except asyncio.CancelledError:
+            kill_process(proc)
+            raise
+
+    failure = classify_result(filename, proc.returncode, stderr.decode(errors='replace'),
+                              output_ext, cpu_limit)
+    if failure is not None:
+        reason, detail = failure
+        raise BellhopRunError(filename, reason, returncode=proc.returncode, detail=detail)
+
+
+async def run_bellhop_async(filename, bin_path=None, timeout=None, cpu_limit=None, retries=None,
+                            backoff=None, output_ext=None):
+    """run_bellhop 的 asyncio 版本，参数含义相同"""
+    timeout, cpu_limit, retries, backoff = _resolve_limits(timeout, cpu_limit, retries, backoff)
+
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            await run_bellhop_once_async(filename, bin_path, timeout, cpu_limit, output_ext)
+            return
+        except BellhopRunError as e:
+            delay = _retry_delay(e, attempt, retries, backoff)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
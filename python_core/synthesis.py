@@ -0,0 +1,130 @@
+"""
+Bellhop到达结构合成
+由一次到达结构（arrivals）计算的结果合成任意多个频率的复声压：
+p(f, 接收点) = Σ amp · exp(i·phase) · exp(-i·2πf·delay)，delay 为复时延（虚部表示衰减），
+对 频率 × 到达 的矩阵一次计算，再按接收点分段求和，代替每个频率单独运行 bellhop 的声场计算
+"""
+import numpy as np
+
+# 单次计算的 频率 × 到达 矩阵元素数上限，超出时按频率分块，控制峰值内存
+MAX_BLOCK_ELEMENTS = 1 << 22
+
+
+def _frequency_blocks(nfreq, narr, max_elements=MAX_BLOCK_ELEMENTS):
+    """按频率分块，每块 块大小 × 到达数 不超过 max_elements"""
+    step = max(1, max_elements // max(narr, 1))
+    for start in range(0, nfreq, step):
+        yield slice(start, min(start + step, nfreq))
+
+
+def _is_uniform(frequencies):
+    """频率是否等间隔"""
+    if len(frequencies) < 3:
+        return False
+    steps = np.diff(frequencies)
+    return bool(np.allclose(steps, steps[0], rtol=1e-9, atol=0.0))
+
+
+def arrivals_to_pressure(arrivals, frequencies, max_elements=MAX_BLOCK_ELEMENTS):
+    """
+    由到达结构合成各频率的复声压
+
+    Args:
+        arrivals: ArrivalStore（read_arrivals 的返回值）
+        frequencies: 频率列表 (Hz)
+        max_elements: 频率 × 到达 矩阵的分块上限
+
+    Returns:
+        复声压，形状 (Nfreq, Nsd, Nrd, Nrr)；没有到达的接收点为 0
+    """
+    frequencies = np.atleast_1d(np.asarray(frequencies, dtype=float))
+    counts = np.diff(arrivals.offsets)
+    pressure = np.zeros((len(frequencies), len(counts)), dtype=complex)
+    if len(arrivals) == 0:
+        return pressure.reshape((len(frequencies),) + arrivals.shape)
+
+    amplitude = arrivals.amplitude
+    delay = arrivals.data['delay']
+    # 只对有到达的接收点分段求和（reduceat 的分段起点必须严格对应非空分段）
+    nonempty = counts > 0
+    starts = arrivals.offsets[:-1][nonempty]
+    uniform = _is_uniform(frequencies)
+    for block in _frequency_blocks(len(frequencies), len(arrivals), max_elements):
+        omega = 2.0 * np.pi * frequencies[block]
+        if uniform and len(omega) > 2:
+            # 等间隔频率：每个分块起点计算一次指数，之后逐行乘以频率步长对应的相位因子
+            terms = np.empty((len(omega), len(delay)), dtype=complex)
+            terms[0] = amplitude * np.exp(-1j * omega[0] * delay)
+            step = np.exp(-1j * (omega[1] - omega[0]) * delay)
+            for k in range(1, len(omega)):
+                np.multiply(terms[k - 1], step, out=terms[k])
+        else:
+            terms = np.exp(-1j * np.outer(omega, delay))
+            terms *= amplitude
+        pressure[block][:, nonempty] = np.add.reduceat(terms, starts, axis=1)
+    return pressure.reshape((len(frequencies),) + arrivals.shape)
+
+
+def source_pulse(frequency, sample_rate, kind='ricker', cycles=4):
+    """
+    生成声源脉冲
+
+    Args:
+        frequency: 中心频率 (Hz)
+        sample_rate: 采样率 (Hz)
+        kind: 'ricker'（Ricker 子波）或 'tone'（Hann 窗调制的正弦猝发）
+        cycles: tone 脉冲的周期数
+
+    Returns:
+        从 t=0 开始的脉冲采样
+    """
+    if kind == 'ricker':
+        # 子波峰值位于 t0 = 1.5/f，时长 3/f 内两侧衰减到可以忽略
+        t = np.arange(int(np.ceil(3.0 * sample_rate / frequency)) + 1) / sample_rate - 1.5 / frequency
+        a = (np.pi * frequency * t) ** 2
+        return (1.0 - 2.0 * a) * np.exp(-a)
+    if kind == 'tone':
+        n = int(np.ceil(cycles * sample_rate / frequency)) + 1
+        t = np.arange(n) / sample_rate
+        return np.sin(2.0 * np.pi * frequency * t) * np.hanning(n)
+    raise ValueError(f"Unknown pulse type: {kind}")
+
+
+def arrivals_to_waveform(arrivals, receivers, source, sample_rate, t_start=None, n_samples=None,
+                         max_elements=MAX_BLOCK_ELEMENTS):
+    """
+    由到达结构合成接收点的时域波形
+
+    每个接收点的传递函数 H(f) = Σ amp · exp(i·phase) · exp(-i·2πf·(delay - t_start)) 在 rfft 频率网格上
+    直接求和（到达时延不需要取整到采样点，即 FFT 分数时延），乘以声源频谱后逆变换；
+    所有选中的接收点一次批量计算
+
+    Args:
+        arrivals: ArrivalStore
+        receivers: 接收点的展平下标（(声源深度, 接收深度, 接收距离) 顺序）
+        source: 声源时域信号（从 t=0 开始的采样）
+        sample_rate: 采样率 (Hz)
+        t_start: 输出时间窗起点 (s)，默认取最早到达之前 8 个采样点（对齐到采样网格）
+        n_samples: 输出采样点数，默认覆盖最晚到达加上声源信号长度
+
+    Returns:
+        (t_start, waveforms)，waveforms 形状 (接收点数, n_samples)
+    """
+    source = np.asarray(source, dtype=float)
+    selected = arrivals.subset(receivers)
+    delay = selected.data['delay'].real
+    if t_start is None:
+        t_start = (np.floor(delay.min() * sample_rate) - 8) / sample_rate if len(delay) else 0.0
+        t_start = max(t_start, 0.0)
+    if n_samples is None:
+        last = delay.max() if len(delay) else t_start
+        n_samples = int(np.ceil((last - t_start) * sample_rate)) + len(source) + 8
+    # 补零到 2 的整数次幂，且不短于时间窗加声源长度，避免循环卷积回绕
+    nfft = 1 << int(np.ceil(np.log2(max(n_samples + len(source), 2))))
+
+    selected.data['delay'] -= t_start
+    frequencies = np.fft.rfftfreq(nfft, 1.0 / sample_rate)
+    transfer = arrivals_to_pressure(selected, frequencies, max_elements)
+    spectrum = np.fft.rfft(source, nfft)
+    waveforms = np.fft.irfft(transfer * spectrum[:, None], nfft, axis=0)
+    return t_start, np.ascontiguousarray(waveforms[:n_samples].T)
@@ -0,0 +1,124 @@
+"""
+Bellhop临时工作空间管理
+为每次求解分配独立的临时目录，避免同一工作目录下的并发求解互相覆盖 .env/.ssp/.bty/.shd 文件
+"""
+import os
+import shutil
+import tempfile
+import threading
+
+try:
+    from .project import get_tmp_path
+except ImportError:
+    from project import get_tmp_path
+
+# 内存文件系统（Linux），可选作为工作空间根目录
+RAM_ROOT = '/dev/shm'
+
+
+def _env_flag(name, default=False):
+    """读取布尔型环境变量"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class Workspace:
+    """单次求解的独立临时目录"""
+
+    def __init__(self, path, keep=False):
+        self.path = path
+        self.keep = keep
+        self._closed = False
+
+    def file(self, name):
+        """返回工作空间内的文件路径（扩展名由调用方追加）"""
+        return os.path.join(self.path, name)
+
+    def cleanup(self):
+        """删除工作空间目录；keep=True 时保留文件用于调试"""
+        if self._closed:
+            return
+        self._closed = True
+        if self.keep:
+            print(f"保留工作空间: {self.path}")
+            return
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cleanup()
+        return False
+
+    def __repr__(self):
+        return f'Workspace({self.path!r}, keep={self.keep})'
+
+
+class WorkspaceManager:
+    """
+    工作空间管理器
+
+    Args:
+        root: 工作空间根目录，默认使用项目的 data/tmp
+        use_ram: 是否优先使用内存文件系统（/dev/shm）作为根目录
+        keep: 是否在求解结束后保留临时文件
+        prefix: 临时目录名前缀
+
+    未显式指定的参数从环境变量读取：
+        BELLHOP_WORKSPACE_ROOT, BELLHOP_WORKSPACE_RAM, BELLHOP_KEEP_WORKSPACE
+    """
+
+    def __init__(self, root=None, use_ram=None, keep=None, prefix='bellhop_'):
+        self.root = root if root is not None else os.environ.get('BELLHOP_WORKSPACE_ROOT')
+        self.use_ram = use_ram if use_ram is not None else _env_flag('BELLHOP_WORKSPACE_RAM')
+        self.keep = keep if keep is not None else _env_flag('BELLHOP_KEEP_WORKSPACE')
+        self.prefix = prefix
+        self._lock = threading.Lock()
+
+    def configure(self, root=None, use_ram=None, keep=None):
+        """更新配置，None 表示保持原值"""
+        with self._lock:
+            if root is not None:
+                self.root = root
+            if use_ram is not None:
+                self.use_ram = use_ram
+            if keep is not None:
+                self.keep = keep
+
+    def resolve_root(self):
+        """确定当前使用的根目录"""
+        if self.root:
+            return self.root
+        if self.use_ram and os.path.isdir(RAM_ROOT) and os.access(RAM_ROOT, os.W_OK):
+            return os.path.join(RAM_ROOT, 'bellhop')
+        return get_tmp_path()
+
+    def create(self, tag=None, keep=None):
+        """创建一个唯一的工作空间目录"""
+        root = self.resolve_root()
+        os.makedirs(root, exist_ok=True)
+        prefix = self.prefix + (tag + '_' if tag else '')
+        path = tempfile.mkdtemp(prefix=prefix, dir=root)
+        return Workspace(path, keep=self.keep if keep is None else keep)
+
+
+# 全局实例
+_manager = WorkspaceManager()
+
+
+def get_workspace_manager():
+    """获取全局工作空间管理器"""
+    return _manager
+
+
+def configure_workspace(root=None, use_ram=None, keep=None):
+    """配置全局工作空间（根目录、是否使用内存盘、是否保留文件）"""
+    _manager.configure(root=root, use_ram=use_ram, keep=keep)
+
+
+def create_workspace(tag=None, keep=None):
+    """从全局管理器创建工作空间"""
+    return _manager.create(tag=tag, keep=keep)
@@ -3,6 +3,6 @@ Bellhop Python Wrapper
 Provides Python implementation of C++ interface
 """
 
-from .bellhop_wrapper import solve_bellhop_propagation
+from .bellhop_wrapper import solve_bellhop_propagation, solve_bellhop_propagation_async, solve_bellhop_propagation_batch
 
 __version__ = "1.0.0"
@@ -5,13 +5,16 @@ Bellhop Python包装器
 import sys
 import os
 import json
+import asyncio
 import datetime
+import functools
 import numpy as np
 
-# 添加python_core到路径
+# 添加项目根目录到路径：python_core 只作为包导入，与 python_core/__init__ 共用同一组模块实例
+# （例如同一个结果缓存和执行器），不把 python_core 目录本身加入路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
-python_core_path = os.path.join(os.path.dirname(current_dir), 'python_core')
-sys.path.insert(0, python_core_path)
+if os.path.dirname(current_dir) not in sys.path:
+    sys.path.insert(0, os.path.dirname(current_dir))
 
 # **设置项目二进制文件路径**
 import os
@@ -132,29 +135,38 @@ def parse_input_data(input_json):
             if freq <= 0:
                 raise ValueError("频率必须大于0")
     elif freq_range is not None:
-        # 宽带模型使用中心频率
         lower = freq_range.get('lower', 100)
         upper = freq_range.get('upper', 200)
         if lower <= 0 or upper <= 0 or upper <= lower:
             raise ValueError("频率范围无效")
-        freq = (lower + upper) / 2
+        num = freq_range.get('num')
+        if num is None:
+            # 未指定频点数时使用中心频率
+            freq = (lower + upper) / 2
+        else:
+            # 频带内均匀分布的频点，默认使用宽带模式计算
+            num = int(num)
+            if num < 1:
+                raise ValueError("freq_range.num必须大于0")
+            freq = [float(f) for f in np.linspace(lower, upper, num)]
     
     # 解析声源深度
     sd = data.get('source_depth')
     if sd is None:
         raise ValueError("缺少source_depth字段")
     
+    # 多个声源深度在同一次 bellhop 运行中计算
     if isinstance(sd, (list, np.ndarray)):
         if len(sd) == 0:
             raise ValueError("声源深度列表不能为空")
-        sd = float(sd[0])
+        sd = [float(d) for d in sd]
     else:
-        sd = float(sd)
+        sd = [float(sd)]
     
-    if sd < 0:
+    if any(d < 0 for d in sd):
         raise ValueError("声源深度不能为负数")
     
-    sd = np.array([sd])  # 转换为数组格式
+    sd = np.array(sd)  # 转换为数组格式
     
     # 解析接收器深度和距离
     rd = data.get('receiver_depth')
@@ -302,6 +314,9 @@ def parse_input_data(input_json):
     # **新增：解析其他参数**
     coherent_para = data.get('coherent_para', 'C')  # 默认相干
     is_propagation_pressure_output = data.get('is_propagation_pressure_output', False)
+    is_dense_grid = data.get('is_dense_grid', False)  # 在加密网格上计算，便于之后的请求复用缓存
+    # 宽带模式：一次到达结构计算合成所有频率（freq_range 指定频点数时默认开启）
+    is_broadband = data.get('is_broadband', freq_range is not None and freq_range.get('num') is not None)
     
     # 解析射线模型参数 - 根据接口定义只有ray_model_para
     ray_model_para = data.get('ray_model_para', {})
@@ -309,20 +324,301 @@ def parse_input_data(input_json):
     beam_number = ray_model_para.get('beam_number', None)
     grazing_high = ray_model_para.get('grazing_high', None)  # 掠射角上限
     grazing_low = ray_model_para.get('grazing_low', None)    # 掠射角下限
+
+    # 解析时域波形参数
+    time_wave_para = data.get('time_wave_para') or {}
+    if not isinstance(time_wave_para, dict):
+        raise ValueError("time_wave_para必须是字典")
+    is_time_wave_output = bool(time_wave_para.get('is_time_wave_output', False))
+
+    # 解析方位扇面（N×2D）：每个方位可以给出自己的 bathy/sound_speed_profile/sediment_info，未给出的沿用顶层字段
+    radials = None
+    if data.get('radials'):
+        if not isinstance(data['radials'], list):
+            raise ValueError("radials必须是列表")
+        radials = []
+        for i, radial in enumerate(data['radials']):
+            if not isinstance(radial, dict) or radial.get('bearing') is None:
+                raise ValueError(f"radials[{i}]必须是包含bearing字段的字典")
+            radial_data = dict(data, radials=None, cartesian_grid=None)
+            for field in ('bathy', 'sound_speed_profile', 'sediment_info'):
+                if radial.get(field) is not None:
+                    radial_data[field] = radial[field]
+            _, _, _, radial_bathm, radial_ssp, _, radial_base, _ = parse_input_data(radial_data)
+            radials.append({
+                'bearing': float(radial['bearing']),
+                'bathymetry': radial_bathm,
+                'sound_speed_profile': radial_ssp,
+                'bottom_params': radial_base
+            })
+
+    # 解析互易计算参数：大量声源位置到少量水听器，每个水听器只运行一次 bellhop
+    reciprocal_para = data.get('reciprocal_para') or {}
+    if not isinstance(reciprocal_para, dict):
+        raise ValueError("reciprocal_para必须是字典")
+    source_positions = hydrophones = None
+    if reciprocal_para.get('source_positions'):
+        if radials is not None:
+            raise ValueError("reciprocal_para不能与radials同时使用")
+        source_positions = parse_points(reciprocal_para['source_positions'], 'reciprocal_para.source_positions')
+        if reciprocal_para.get('receivers'):
+            hydrophones = parse_points(reciprocal_para['receivers'], 'reciprocal_para.receivers')
+        else:
+            # 默认水听器为接收深度 × 接收距离的所有组合
+            hydrophones = np.array([(d, r) for d in rd for r in receiver_range], dtype=float)
+
+    # 解析散点接收位置：只计算这些 (深度, 距离) 点，不计算完整的接收网格
+    receiver_points = None
+    if data.get('receiver_points'):
+        if radials is not None or source_positions is not None:
+            raise ValueError("receiver_points不能与radials或reciprocal_para同时使用")
+        receiver_points = parse_points(data['receiver_points'], 'receiver_points')
+    is_irregular_grid = bool(data.get('is_irregular_grid', True))
+
+    # 方位扇面结果插值到水平直角坐标网格（可选）
+    cartesian_grid = data.get('cartesian_grid')
+    if cartesian_grid is not None:
+        if radials is None:
+            raise ValueError("cartesian_grid需要与radials一起使用")
+        if not isinstance(cartesian_grid, dict) or not cartesian_grid.get('x') or not cartesian_grid.get('y'):
+            raise ValueError("cartesian_grid必须是包含x和y列表的字典")
     
     return freq, sd, rd, bathm, ssp, sed, base, {
         'coherent_para': coherent_para,
         'is_propagation_pressure_output': is_propagation_pressure_output,
         'is_ray_output': is_ray_output,
+        'dense_grid': is_dense_grid,
+        'broadband': bool(is_broadband),
         'receiver_range': receiver_range,
         'freq_range': freq_range,
         'ray_model_para': ray_model_para,
         'beam_number': beam_number,
         'grazing_high': grazing_high,
-        'grazing_low': grazing_low
+        'grazing_low': grazing_low,
+        'is_time_wave_output': is_time_wave_output,
+        'time_wave_para': time_wave_para,
+        'radials': radials,
+        'cartesian_grid': cartesian_grid,
+        'source_positions': source_positions,
+        'hydrophones': hydrophones,
+        'receiver_points': receiver_points,
+        'irregular_grid': is_irregular_grid
     }
 
-def format_output_data(pos, TL, freq, pressure=None, rays=None, options=None, error_code=200, error_message=""):
+def parse_points(points, name):
+    """解析 (深度, 距离) 点列表，支持 [{'depth': d, 'range': r}, ...] 或 [[d, r], ...]，返回 [N, 2] 数组（m）"""
+    if not isinstance(points, list):
+        raise ValueError(f"{name}必须是列表")
+    try:
+        points = np.array([(p['depth'], p['range']) if isinstance(p, dict) else (p[0], p[1]) for p in points],
+                          dtype=float)
+    except (KeyError, IndexError, TypeError, ValueError):
+        raise ValueError(f"{name}的每个点必须包含深度和距离")
+    if np.any(points < 0):
+        raise ValueError(f"{name}的深度和距离不能为负数")
+    return points
+
+def ray_filter_options(options):
+    """从 ray_model_para 中读取射线筛选和抽稀条件，作为 find_cvgcRays 的关键字参数"""
+    ray_model_para = (options or {}).get('ray_model_para') or {}
+    filters = {}
+    if ray_model_para.get('max_ray_depth') is not None:
+        filters['max_depth'] = float(ray_model_para['max_ray_depth'])
+    if ray_model_para.get('max_top_bnc') is not None:
+        filters['max_top_bnc'] = int(ray_model_para['max_top_bnc'])
+    if ray_model_para.get('max_bot_bnc') is not None:
+        filters['max_bot_bnc'] = int(ray_model_para['max_bot_bnc'])
+    alpha_range = ray_model_para.get('alpha_range')
+    if alpha_range is not None and len(alpha_range) == 2:
+        filters['angle_range'] = (float(alpha_range[0]), float(alpha_range[1]))
+    if ray_model_para.get('ray_tolerance'):
+        filters['tolerance'] = float(ray_model_para['ray_tolerance'])
+    return filters
+
+def time_wave_arguments(options, freq):
+    """从 time_wave_para 中读取时域波形参数，作为 call_Bellhop_time_wave 的关键字参数"""
+    para = (options or {}).get('time_wave_para') or {}
+    if not isinstance(freq, list):
+        freq = [freq]
+    kwargs = {
+        'frequency': float(para.get('pulse_freq') or freq[0]),
+        'sample_rate': para.get('sample_rate'),
+        'pulse': para.get('pulse_type', 'ricker'),
+        'beam_number': options.get('beam_number'),
+        'grazing_high': options.get('grazing_high'),
+        'grazing_low': options.get('grazing_low')
+    }
+    if para.get('source_signal') is not None:
+        if not para.get('sample_rate'):
+            raise ValueError("指定source_signal时必须提供sample_rate")
+        kwargs['source_signal'] = np.asarray(para['source_signal'], dtype=float)
+    receivers = para.get('receivers')
+    if receivers:
+        # 支持 [{'depth': d, 'range': r}, ...] 或 [[d, r], ...]
+        kwargs['receivers'] = [(p['depth'], p['range']) if isinstance(p, dict) else (p[0], p[1])
+                               for p in receivers]
+    return kwargs
+
+def format_time_wave(time_wave):
+    """时域波形输出：每个接收点的波形按峰值归一化，峰值幅度以 dB（相对声源）给出"""
+    if not time_wave:
+        return {}
+    sample_rate = float(time_wave['sample_rate'])
+    waveforms = np.asarray(time_wave['waveforms'])
+    peaks = np.abs(waveforms).max(axis=1) if waveforms.size else np.zeros(len(waveforms))
+    receivers = []
+    for i in range(len(waveforms)):
+        peak = float(peaks[i])
+        receivers.append({
+            'depth': round(float(time_wave['receiver_depth'][i]), 2),
+            'range': round(float(time_wave['receiver_range'][i]), 2),
+            'peak_db': round(20.0 * np.log10(peak), 2) if peak > 0 else -250.0,
+            'waveform': (waveforms[i] / peak).tolist() if peak > 0 else waveforms[i].tolist()
+        })
+    return {
+        'sample_rate': sample_rate,
+        'time_start': float(time_wave['time_start']),
+        'start_sample': int(round(float(time_wave['time_start']) * sample_rate)),
+        'num_samples': int(waveforms.shape[1]) if waveforms.ndim == 2 else 0,
+        'receivers': receivers
+    }
+
+def radials_arguments(freq, sd, rd, options):
+    """由解析后的输入生成 call_Bellhop_radials 的关键字参数"""
+    return {
+        'frequencies': freq,
+        'source_depth': sd,
+        'receiver_depths': rd,
+        'receiver_ranges': options.get('receiver_range', []),
+        'radials': options['radials'],
+        'return_pressure': options.get('is_propagation_pressure_output', False),
+        'performance_mode': False,
+        'beam_number': options.get('beam_number'),
+        'grazing_high': options.get('grazing_high'),
+        'grazing_low': options.get('grazing_low'),
+        'dense_grid': options.get('dense_grid', False)
+    }
+
+def radials_output(bellhop_module, result, freq, rd, options):
+    """
+    整理 call_Bellhop_radials 的结果
+
+    Returns:
+        (pos, TL, pressure, fan)，TL/pressure 第一维为方位；fan 包含方位列表和可选的直角坐标网格传输损失
+    """
+    return_pressure = options.get('is_propagation_pressure_output', False)
+    receiver_range = options.get('receiver_range', [])
+    bearings, pos, TL = result[:3]
+    pressure = result[3] if return_pressure else None
+    fan = {'bearings': bearings}
+
+    grid = options.get('cartesian_grid')
+    if grid:
+        # 取最接近指定深度的接收深度，对该深度的水平切片插值
+        depth = float(grid.get('depth', rd[0]))
+        idepth = int(np.argmin(np.abs(np.asarray(rd, dtype=float) - depth)))
+        x = np.asarray(grid['x'], dtype=float)
+        y = np.asarray(grid['y'], dtype=float)
+        # TL 为 [方位, 频率, 声源深度, 接收深度, 接收距离]，插值结果为 [频率, 声源深度, y, x]
+        cartesian = bellhop_module.radials_to_cartesian(bearings, receiver_range, TL[..., idepth, :], x, y)
+        cartesian = np.swapaxes(cartesian, 0, 1)  # 声源深度在前，与 transmission_loss 一致
+        if cartesian.shape[0] == 1:
+            cartesian = cartesian[0]
+        if len(freq) == 1:
+            cartesian = cartesian[..., 0, :, :]
+        fan['cartesian'] = {
+            'x': x,
+            'y': y,
+            'depth': float(rd[idepth]),
+            # 扇面覆盖范围以外的点为 None
+            'transmission_loss': np.where(np.isnan(cartesian), None, np.round(cartesian, 2)).tolist()
+        }
+    return pos, TL, pressure, fan
+
+def solve_radials(bellhop_module, freq, sd, rd, options):
+    """
+    方位扇面计算：所有方位的作业在共享执行器上并发运行
+
+    Returns:
+        (pos, TL, pressure, fan)，见 radials_output
+    """
+    result = bellhop_module.call_Bellhop_radials(**radials_arguments(freq, sd, rd, options))
+    return radials_output(bellhop_module, result, freq, rd, options)
+
+def reciprocal_arguments(freq, bathm, ssp, base, options):
+    """由解析后的输入生成 call_Bellhop_reciprocal 的关键字参数"""
+    return {
+        'frequencies': freq,
+        'source_positions': options['source_positions'],
+        'receivers': options['hydrophones'],
+        'bathymetry': bathm,
+        'sound_speed_profile': ssp,
+        'sediment': None,
+        'bottom_params': base,
+        'return_pressure': options.get('is_propagation_pressure_output', False),
+        'performance_mode': False,
+        'beam_number': options.get('beam_number'),
+        'grazing_high': options.get('grazing_high'),
+        'grazing_low': options.get('grazing_low')
+    }
+
+def reciprocal_output(result, options):
+    """整理 call_Bellhop_reciprocal 的结果，供 format_output_data 的 reciprocal 参数使用"""
+    return_pressure = options.get('is_propagation_pressure_output', False)
+    TL, pressure = result if return_pressure else (result, None)
+    return {
+        'sources': options['source_positions'],
+        'receivers': options['hydrophones'],
+        'transmission_loss': TL,
+        'pressure': pressure
+    }
+
+def solve_reciprocal(bellhop_module, freq, bathm, ssp, base, options):
+    """互易计算：以每个水听器为声源运行 bellhop，插值得到所有声源位置到各水听器的传输损失"""
+    result = bellhop_module.call_Bellhop_reciprocal(**reciprocal_arguments(freq, bathm, ssp, base, options))
+    return reciprocal_output(result, options)
+
+def points_arguments(freq, sd, bathm, ssp, base, options):
+    """由解析后的输入生成 call_Bellhop_points 的关键字参数"""
+    return {
+        'frequencies': freq,
+        'source_depth': sd,
+        'receiver_points': options['receiver_points'],
+        'bathymetry': bathm,
+        'sound_speed_profile': ssp,
+        'sediment': None,
+        'bottom_params': base,
+        'return_pressure': options.get('is_propagation_pressure_output', False),
+        'performance_mode': False,
+        'beam_number': options.get('beam_number'),
+        'grazing_high': options.get('grazing_high'),
+        'grazing_low': options.get('grazing_low'),
+        'irregular': options.get('irregular_grid', True)
+    }
+
+def points_output(result, sd, options):
+    """整理 call_Bellhop_points 的结果，供 format_output_data 的 points 参数使用"""
+    return_pressure = options.get('is_propagation_pressure_output', False)
+    return {
+        'receivers': options['receiver_points'],
+        'source_depth': sd,
+        'transmission_loss': result[1],
+        'pressure': result[2] if return_pressure else None
+    }
+
+def solve_points(bellhop_module, freq, sd, bathm, ssp, base, options):
+    """散点接收：只计算 receiver_points 中的接收位置"""
+    result = bellhop_module.call_Bellhop_points(**points_arguments(freq, sd, bathm, ssp, base, options))
+    return points_output(result, sd, options)
+
+def _complex_to_dicts(arr):
+    """复数数组转换为嵌套列表，每个元素为 {'real', 'imag'}"""
+    if arr.ndim == 1:
+        return [{'real': v.real, 'imag': v.imag} for v in arr.tolist()]
+    return [_complex_to_dicts(a) for a in arr]
+
+def format_output_data(pos, TL, freq, pressure=None, rays=None, options=None, error_code=200, error_message="",
+                       time_wave=None, fan=None, reciprocal=None, points=None):
     """格式化输出数据 - 按照接口规范完整实现，小数精度保留2位"""
     
     # 完全避免科学计数法的JSON编码器
@@ -387,6 +683,63 @@ def format_output_data(pos, TL, freq, pressure=None, rays=None, options=None, er
         else:
             return arr
     
+    if reciprocal is not None:
+        # 互易计算：transmission_loss 为 [水听器, 声源位置]，多频率时增加频率维 [频率, 水听器, 声源位置]
+        is_multi_freq = isinstance(freq, list) and len(freq) > 1
+        reciprocal_TL = reciprocal['transmission_loss'] if is_multi_freq else reciprocal['transmission_loss'][0]
+        result = {
+            'error_code': 200,
+            'error_message': '',
+            'receiver_depth': [round_to_2_decimals(d) for d in reciprocal['receivers'][:, 0].tolist()],
+            'receiver_range': [round_to_2_decimals(r) for r in reciprocal['receivers'][:, 1].tolist()],
+            'source_depth': [round_to_2_decimals(d) for d in reciprocal['sources'][:, 0].tolist()],
+            'source_range': [round_to_2_decimals(r) for r in reciprocal['sources'][:, 1].tolist()],
+            'transmission_loss': process_array_to_2_decimals(reciprocal_TL),
+            'frequencies': [round_to_2_decimals(f) for f in (freq if isinstance(freq, list) else [freq])],
+            'is_multi_frequency': is_multi_freq,
+            'is_reciprocal': True,
+            'propagation_pressure': [],
+            'ray_trace': [],
+            'time_wave': {}
+        }
+        if options and options.get('is_propagation_pressure_output', False) and reciprocal['pressure'] is not None:
+            reciprocal_pressure = reciprocal['pressure'] if is_multi_freq else reciprocal['pressure'][0]
+            result['propagation_pressure'] = _complex_to_dicts(reciprocal_pressure)
+        return json.dumps(result, cls=NoScientificJSONEncoder)
+
+    if points is not None:
+        # 散点接收：transmission_loss 为 [接收点]，多频率时为 [频率, 接收点]，多声源深度时最前面增加声源深度维
+        # （计算结果固定为 [频率, 声源深度, 接收点]，在这里去掉长度为 1 的维）
+        is_multi_freq = isinstance(freq, list) and len(freq) > 1
+        points_TL = np.swapaxes(points['transmission_loss'], 0, 1)
+        points_pressure = np.swapaxes(points['pressure'], 0, 1) if points['pressure'] is not None else None
+        is_multi_source = points_TL.shape[0] > 1
+        if not is_multi_source:
+            points_TL = points_TL[0]
+            points_pressure = points_pressure[0] if points_pressure is not None else None
+        if not is_multi_freq:
+            points_TL = points_TL[..., 0, :]
+            points_pressure = points_pressure[..., 0, :] if points_pressure is not None else None
+        result = {
+            'error_code': 200,
+            'error_message': '',
+            'receiver_depth': [round_to_2_decimals(d) for d in points['receivers'][:, 0].tolist()],
+            'receiver_range': [round_to_2_decimals(r) for r in points['receivers'][:, 1].tolist()],
+            'transmission_loss': process_array_to_2_decimals(points_TL),
+            'frequencies': [round_to_2_decimals(f) for f in (freq if isinstance(freq, list) else [freq])],
+            'is_multi_frequency': is_multi_freq,
+            'is_point_list': True,
+            'propagation_pressure': [],
+            'ray_trace': [],
+            'time_wave': {}
+        }
+        if is_multi_source:
+            result['source_depth'] = [round_to_2_decimals(d) for d in np.atleast_1d(points['source_depth']).tolist()]
+            result['is_multi_source'] = True
+        if options and options.get('is_propagation_pressure_output', False) and points_pressure is not None:
+            result['propagation_pressure'] = _complex_to_dicts(points_pressure)
+        return json.dumps(result, cls=NoScientificJSONEncoder)
+
     # 基本输出
     result = {
         'error_code': 200,
@@ -397,98 +750,143 @@ def format_output_data(pos, TL, freq, pressure=None, rays=None, options=None, er
         'transmission_loss': process_array_to_2_decimals(TL.tolist()) if isinstance(TL, np.ndarray) else []
     }
     
-    # 处理多频率输出格式
-    if isinstance(freq, list) and len(freq) > 1:
-        # 多频率输出：添加频率信息
-        result['frequencies'] = [round_to_2_decimals(f) for f in freq]
-        result['is_multi_frequency'] = True
+    def format_fields(TL, pressure):
+        """格式化一个声源深度的传输损失和声压"""
+        field = {}
+        # 处理多频率输出格式
+        if isinstance(freq, list) and len(freq) > 1:
+            # 多频率输出：添加频率信息
+            field['frequencies'] = [round_to_2_decimals(f) for f in freq]
+            field['is_multi_frequency'] = True
         
-        # 传输损失格式：[freq_idx][depth_idx][range_idx]
-        if isinstance(TL, np.ndarray) and TL.ndim == 3:
-            # 多频率TL数据：[Nfreq, Ndepth, Nrange]
-            result['transmission_loss'] = process_array_to_2_decimals(TL.tolist())
-        elif isinstance(TL, np.ndarray) and TL.ndim == 2:
-            # 单频率格式，扩展为多频率格式
-            result['transmission_loss'] = [process_array_to_2_decimals(TL.tolist())]
-    else:
-        # 单频率输出
-        result['frequencies'] = [round_to_2_decimals(freq if not isinstance(freq, list) else freq[0])]
-        result['is_multi_frequency'] = False
+            # 传输损失格式：[freq_idx][depth_idx][range_idx]
+            if isinstance(TL, np.ndarray) and TL.ndim == 3:
+                # 多频率TL数据：[Nfreq, Ndepth, Nrange]
+                field['transmission_loss'] = process_array_to_2_decimals(TL.tolist())
+            elif isinstance(TL, np.ndarray) and TL.ndim == 2:
+                # 单频率格式，扩展为多频率格式
+                field['transmission_loss'] = [process_array_to_2_decimals(TL.tolist())]
+        else:
+            # 单频率输出
+            field['frequencies'] = [round_to_2_decimals(freq if not isinstance(freq, list) else freq[0])]
+            field['is_multi_frequency'] = False
         
-        # 确保单频率TL格式正确
-        if isinstance(TL, np.ndarray) and TL.ndim == 3:
-            # 多频率数据但只有一个频率，取第一个
-            result['transmission_loss'] = process_array_to_2_decimals(TL[0].tolist())
-        elif isinstance(TL, np.ndarray):
-            result['transmission_loss'] = process_array_to_2_decimals(TL.tolist())
-    
-    # 可选输出：声压
-    if options and options.get('is_propagation_pressure_output', False) and pressure is not None:
-        pressure_data = []
-        if isinstance(pressure, np.ndarray):
-            # 处理不同维度的压力数据
-            if pressure.ndim == 2:
-                # 2D数组：单频率压力数据 [depth, range]
-                for i in range(pressure.shape[0]):
-                    row = []
-                    for j in range(pressure.shape[1]):
-                        row.append({
-                            'real': pressure[i, j].real,
-                            'imag': pressure[i, j].imag
-                        })
-                    pressure_data.append(row)
-            elif pressure.ndim == 3:
-                # 3D数组：多频率压力数据 [freq, depth, range]
-                if isinstance(freq, list) and len(freq) > 1:
-                    # 多频率格式：返回每个频率的压力数据
-                    pressure_data = []
-                    for f_idx in range(pressure.shape[0]):
-                        freq_pressure = []
+            # 确保单频率TL格式正确
+            if isinstance(TL, np.ndarray) and TL.ndim == 3:
+                # 多频率数据但只有一个频率，取第一个
+                field['transmission_loss'] = process_array_to_2_decimals(TL[0].tolist())
+            elif isinstance(TL, np.ndarray):
+                field['transmission_loss'] = process_array_to_2_decimals(TL.tolist())
+    
+        # 可选输出：声压
+        if options and options.get('is_propagation_pressure_output', False) and pressure is not None:
+            pressure_data = []
+            if isinstance(pressure, np.ndarray):
+                # 处理不同维度的压力数据
+                if pressure.ndim == 2:
+                    # 2D数组：单频率压力数据 [depth, range]
+                    for i in range(pressure.shape[0]):
+                        row = []
+                        for j in range(pressure.shape[1]):
+                            row.append({
+                                'real': pressure[i, j].real,
+                                'imag': pressure[i, j].imag
+                            })
+                        pressure_data.append(row)
+                elif pressure.ndim == 3:
+                    # 3D数组：多频率压力数据 [freq, depth, range]
+                    if isinstance(freq, list) and len(freq) > 1:
+                        # 多频率格式：返回每个频率的压力数据
+                        pressure_data = []
+                        for f_idx in range(pressure.shape[0]):
+                            freq_pressure = []
+                            for i in range(pressure.shape[1]):
+                                row = []
+                                for j in range(pressure.shape[2]):
+                                    row.append({
+                                        'real': pressure[f_idx, i, j].real,
+                                        'imag': pressure[f_idx, i, j].imag
+                                    })
+                                freq_pressure.append(row)
+                            pressure_data.append(freq_pressure)
+                    else:
+                        # 单频率情况：取第一个频率
                         for i in range(pressure.shape[1]):
                             row = []
                             for j in range(pressure.shape[2]):
                                 row.append({
-                                    'real': pressure[f_idx, i, j].real,
-                                    'imag': pressure[f_idx, i, j].imag
+                                    'real': pressure[0, i, j].real,
+                                    'imag': pressure[0, i, j].imag
                                 })
-                            freq_pressure.append(row)
-                        pressure_data.append(freq_pressure)
+                            pressure_data.append(row)
+                elif pressure.ndim == 4:
+                    # 4D数组：取第一个频率和第一个声源位置
+                    p_2d = pressure[0, 0, :, :] if pressure.shape[0] > 0 and pressure.shape[1] > 0 else pressure.reshape(pressure.shape[-2], pressure.shape[-1])
+                    for i in range(p_2d.shape[0]):
+                        row = []
+                        for j in range(p_2d.shape[1]):
+                            row.append({
+                                'real': p_2d[i, j].real,
+                                'imag': p_2d[i, j].imag
+                            })
+                        pressure_data.append(row)
                 else:
-                    # 单频率情况：取第一个频率
-                    for i in range(pressure.shape[1]):
+                    # 其他情况：展平为2D
+                    p_flat = pressure.reshape(-1, pressure.shape[-1]) if pressure.ndim > 2 else pressure
+                    for i in range(min(p_flat.shape[0], 100)):  # 限制最大行数
                         row = []
-                        for j in range(pressure.shape[2]):
+                        for j in range(p_flat.shape[1]):
                             row.append({
-                                'real': pressure[0, i, j].real,
-                                'imag': pressure[0, i, j].imag
+                                'real': p_flat[i, j].real,
+                                'imag': p_flat[i, j].imag
                             })
                         pressure_data.append(row)
-            elif pressure.ndim == 4:
-                # 4D数组：取第一个频率和第一个声源位置
-                p_2d = pressure[0, 0, :, :] if pressure.shape[0] > 0 and pressure.shape[1] > 0 else pressure.reshape(pressure.shape[-2], pressure.shape[-1])
-                for i in range(p_2d.shape[0]):
-                    row = []
-                    for j in range(p_2d.shape[1]):
-                        row.append({
-                            'real': p_2d[i, j].real,
-                            'imag': p_2d[i, j].imag
-                        })
-                    pressure_data.append(row)
-            else:
-                # 其他情况：展平为2D
-                p_flat = pressure.reshape(-1, pressure.shape[-1]) if pressure.ndim > 2 else pressure
-                for i in range(min(p_flat.shape[0], 100)):  # 限制最大行数
-                    row = []
-                    for j in range(p_flat.shape[1]):
-                        row.append({
-                            'real': p_flat[i, j].real,
-                            'imag': p_flat[i, j].imag
-                        })
-                    pressure_data.append(row)
-        result['propagation_pressure'] = pressure_data
+            field['propagation_pressure'] = pressure_data
+        else:
+            field['propagation_pressure'] = []
+        return field
+
+    def format_sources(TL, pressure):
+        """
+        格式化一个方位的传输损失和声压（可能包含多个声源深度）
+
+        计算结果固定为 [Nfreq, Nsd, Ndepth, Nrange]；只有一个声源深度时去掉声源深度维
+        """
+        if isinstance(TL, np.ndarray) and TL.ndim == 4 and TL.shape[1] == 1:
+            TL = TL[:, 0]
+            pressure = pressure[:, 0] if isinstance(pressure, np.ndarray) else pressure
+        if isinstance(TL, np.ndarray) and TL.ndim == 4:
+            # 多声源深度：TL 为 [Nfreq, Nsd, Ndepth, Nrange]，transmission_loss 和 propagation_pressure 的第一维为声源深度
+            per_source = [format_fields(TL[:, isd], pressure[:, isd] if isinstance(pressure, np.ndarray) else None)
+                          for isd in range(TL.shape[1])]
+            fields = dict(per_source[0])
+            fields['transmission_loss'] = [field['transmission_loss'] for field in per_source]
+            fields['propagation_pressure'] = [field['propagation_pressure'] for field in per_source]
+            fields['source_depth'] = [round_to_2_decimals(d) for d in np.atleast_1d(pos.s.depth).tolist()]
+            fields['is_multi_source'] = True
+            return fields
+        return format_fields(TL, pressure)
+
+    if fan is not None:
+        # 方位扇面：transmission_loss 和 propagation_pressure 的第一维为方位
+        per_bearing = [format_sources(TL[ib], pressure[ib] if isinstance(pressure, np.ndarray) else None)
+                       for ib in range(TL.shape[0])]
+        result.update(per_bearing[0])
+        result['transmission_loss'] = [field['transmission_loss'] for field in per_bearing]
+        result['propagation_pressure'] = [field['propagation_pressure'] for field in per_bearing]
+        result['bearings'] = [round_to_2_decimals(b) for b in np.asarray(fan['bearings']).tolist()]
+        result['is_radial'] = True
+        if fan.get('cartesian'):
+            cartesian = fan['cartesian']
+            result['cartesian_tl'] = {
+                'x': [round_to_2_decimals(v) for v in cartesian['x'].tolist()],
+                'y': [round_to_2_decimals(v) for v in cartesian['y'].tolist()],
+                'depth': round_to_2_decimals(cartesian['depth']),
+                'transmission_loss': cartesian['transmission_loss']
+            }
     else:
-        result['propagation_pressure'] = []
-    
+        result.update(format_sources(TL, pressure))
+
     # 可选输出：射线轨迹
     if options and options.get('is_ray_output', False) and rays is not None:
         ray_trace_data = []
@@ -507,9 +905,9 @@ def format_output_data(pos, TL, freq, pressure=None, rays=None, options=None, er
                     ray_range_m_data = ray_xy[0, :]  # 距离（米）
                     ray_depth_m = ray_xy[1, :]       # 深度（米）
                     
-                    # 转换为整数
-                    ray_range_m = [int(round(r)) for r in ray_range_m_data]  # 距离转为整数（不需要乘1000）
-                    ray_depth_m_int = [int(round(d)) for d in ray_depth_m]   # 深度转为整数
+                    # 转换为整数（整列一次转换，舍入规则与 round 相同）
+                    ray_range_m = np.rint(ray_range_m_data).astype(np.int64).tolist()  # 距离转为整数（不需要乘1000）
+                    ray_depth_m_int = np.rint(ray_depth_m).astype(np.int64).tolist()   # 深度转为整数
                     
                     ray_info = {
                         'alpha': round_to_2_decimals(launch_angle),
@@ -523,11 +921,52 @@ def format_output_data(pos, TL, freq, pressure=None, rays=None, options=None, er
     else:
         result['ray_trace'] = []
     
-    # 时域波形（暂不实现）
-    result['time_wave'] = {}
+    # 可选输出：时域波形
+    if options and options.get('is_time_wave_output', False) and time_wave is not None:
+        result['time_wave'] = format_time_wave(time_wave)
+    else:
+        result['time_wave'] = {}
     
     return json.dumps(result, cls=NoScientificJSONEncoder)
 
+def _import_bellhop_module(project_root):
+    """导入 bellhop 计算模块，优先使用 Nuitka 编译好的模块"""
+    try:
+        # 直接导入 Nuitka 编译的 bellhop 模块
+        import bellhop as bellhop_module
+        print("✓ 使用 Nuitka 编译的 bellhop 模块")
+    except ImportError:
+        try:
+            # 尝试从 lib 目录导入编译模块
+            lib_path = os.path.join(project_root, 'lib')
+            if lib_path not in sys.path:
+                sys.path.insert(0, lib_path)
+            import bellhop as bellhop_module
+            print("✓ 使用 lib 目录中的 bellhop 模块")
+        except ImportError:
+            try:
+                # 回退到原始 python_core 包
+                if project_root not in sys.path:
+                    sys.path.insert(0, project_root)
+                from python_core import bellhop as bellhop_module
+                print("✓ 使用原始 python_core.bellhop 模块")
+            except ImportError as e:
+                print(f"✗ 无法导入 bellhop 模块: {e}")
+                raise ImportError(f"无法找到 bellhop 模块: {e}")
+    return bellhop_module
+
+def _log_error(input_json, error_msg):
+    """将错误信息追加到 data/error_log.txt"""
+    try:
+        log_file = os.path.join(os.path.dirname(__file__), '..', 'data', 'error_log.txt')
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        with open(log_file, 'a', encoding='utf-8') as f:
+            f.write(f"\n=== {datetime.datetime.now()} ===\n")
+            f.write(f"Input data: {str(input_json)[:500]}...\n")
+            f.write(f"Error message: {error_msg}\n")
+    except:
+        pass  # 如果日志记录失败，不影响主流程
+
 def solve_bellhop_propagation(input_json):
     """
     Bellhop声传播计算的主要接口函数 - 符合完整接口规范
@@ -546,29 +985,7 @@ def solve_bellhop_propagation(input_json):
             os.makedirs(dir_path, exist_ok=True)
         
         # 动态导入，优先使用 Nuitka 编译好的模块
-        try:
-            # 直接导入 Nuitka 编译的 bellhop 模块
-            import bellhop as bellhop_module
-            print("✓ 使用 Nuitka 编译的 bellhop 模块")
-        except ImportError:
-            try:
-                # 尝试从 lib 目录导入编译模块
-                lib_path = os.path.join(project_root, 'lib')
-                if lib_path not in sys.path:
-                    sys.path.insert(0, lib_path)
-                import bellhop as bellhop_module
-                print("✓ 使用 lib 目录中的 bellhop 模块")
-            except ImportError:
-                try:
-                    # 回退到原始 python_core 模块
-                    python_core_path = os.path.join(project_root, 'python_core')
-                    if python_core_path not in sys.path:
-                        sys.path.insert(0, python_core_path)
-                    import bellhop as bellhop_module
-                    print("✓ 使用原始 python_core.bellhop 模块")
-                except ImportError as e:
-                    print(f"✗ 无法导入 bellhop 模块: {e}")
-                    raise ImportError(f"无法找到 bellhop 模块: {e}")
+        bellhop_module = _import_bellhop_module(project_root)
         
         # 获取关键函数
         call_Bellhop = bellhop_module.call_Bellhop
@@ -583,6 +1000,7 @@ def solve_bellhop_propagation(input_json):
         beam_number = options.get('beam_number')
         grazing_high = options.get('grazing_high')
         grazing_low = options.get('grazing_low')
+        dense_grid = options.get('dense_grid', False)
         
         pressure = None
         rays = None
@@ -593,32 +1011,41 @@ def solve_bellhop_propagation(input_json):
         
         # 检测是否为多频率输入（用于输出格式判断）
         is_multi_freq = len(freq) > 1
+
+        # 宽带模式只运行一次到达结构计算，由到达结构合成所有频率
+        if options.get('broadband', False):
+            call_field = bellhop_module.call_Bellhop_broadband
+            field_kwargs = {}
+        else:
+            call_field = call_Bellhop_multi_freq
+            field_kwargs = {'dense_grid': dense_grid}
+        
+        # 散点接收：只计算指定的接收位置
+        if options.get('receiver_points') is not None:
+            points = solve_points(bellhop_module, freq, sd, bathm, ssp, base, options)
+            return format_output_data(None, None, freq, options=options, points=points)
+        
+        # 互易计算：大量声源位置到少量水听器
+        if options.get('source_positions') is not None:
+            reciprocal = solve_reciprocal(bellhop_module, freq, bathm, ssp, base, options)
+            return format_output_data(None, None, freq, options=options, reciprocal=reciprocal)
+        
+        # 方位扇面：所有方位一起计算，结果按方位堆叠（射线和时域波形只对单个二维剖面输出）
+        if options.get('radials'):
+            pos, TL, pressure, fan = solve_radials(bellhop_module, freq, sd, rd, options)
+            return format_output_data(pos, TL, freq, pressure, None, options, fan=fan)
         
         # 根据选项决定计算类型
         if options.get('is_ray_output', False):
-            # 射线追踪计算 - 目前射线追踪不支持多频率，使用第一个频率
+            # 射线追踪计算 - 目前射线追踪不支持多频率和多声源深度，使用第一个频率和第一个声源深度
             ray_freq = freq[0]
             try:
                 # 计算射线轨迹 - 传递射线参数
-                rays_total = call_Bellhop_Rays(ray_freq, sd, rd, receiver_range, bathm, ssp, sed, base,
+                rays_total = call_Bellhop_Rays(ray_freq, sd[:1], rd, receiver_range, bathm, ssp, sed, base,
                                              beam_number=beam_number, grazing_high=grazing_high, grazing_low=grazing_low)
                 
-                # 导入射线筛选函数
-                try:
-                    from bellhop import find_cvgcRays
-                    print("✓ 使用编译的 find_cvgcRays 函数")
-                except ImportError:
-                    # 回退到原始模块
-                    try:
-                        from python_core.bellhop import find_cvgcRays
-                        print("✓ 使用原始 find_cvgcRays 函数")
-                    except ImportError:
-                        # 使用已导入的模块
-                        find_cvgcRays = bellhop_module.find_cvgcRays
-                        print("✓ 使用模块中的 find_cvgcRays 函数")
-                
-                # 筛选收敛射线，传递海底深度信息
-                rays = find_cvgcRays(rays_total, bathm)
+                # 筛选收敛射线，传递海底深度信息（使用已导入的计算模块，避免重复导入出第二份模块实例）
+                rays = bellhop_module.find_cvgcRays(rays_total, bathm, **ray_filter_options(options))
                 
                 # Ray tracing completed (静默模式)
             except Exception as e:
@@ -627,26 +1054,40 @@ def solve_bellhop_propagation(input_json):
             
             # 同时计算传输损失 - 统一使用 multi_freq 函数
             if options.get('is_propagation_pressure_output', False):
-                pos, TL, pressure = call_Bellhop_multi_freq(freq, sd, rd, receiver_range, bathm, ssp, sed, base, 
+                pos, TL, pressure = call_field(freq, sd, rd, receiver_range, bathm, ssp, sed, base, 
                                                            return_pressure=True, performance_mode=False,
-                                                           beam_number=beam_number, grazing_high=grazing_high, grazing_low=grazing_low)
+                                                           beam_number=beam_number, grazing_high=grazing_high, grazing_low=grazing_low,
+                                                           **field_kwargs)
             else:
-                pos, TL = call_Bellhop_multi_freq(freq, sd, rd, receiver_range, bathm, ssp, sed, base, 
+                pos, TL = call_field(freq, sd, rd, receiver_range, bathm, ssp, sed, base, 
                                                  return_pressure=False, performance_mode=False,
-                                                 beam_number=beam_number, grazing_high=grazing_high, grazing_low=grazing_low)
+                                                 beam_number=beam_number, grazing_high=grazing_high, grazing_low=grazing_low,
+                                                 **field_kwargs)
         else:
             # 只计算传输损失 - 统一使用 multi_freq 函数
             if options.get('is_propagation_pressure_output', False):
-                pos, TL, pressure = call_Bellhop_multi_freq(freq, sd, rd, receiver_range, bathm, ssp, sed, base, 
+                pos, TL, pressure = call_field(freq, sd, rd, receiver_range, bathm, ssp, sed, base, 
                                                            return_pressure=True, performance_mode=False,
-                                                           beam_number=beam_number, grazing_high=grazing_high, grazing_low=grazing_low)
+                                                           beam_number=beam_number, grazing_high=grazing_high, grazing_low=grazing_low,
+                                                           **field_kwargs)
             else:
-                pos, TL = call_Bellhop_multi_freq(freq, sd, rd, receiver_range, bathm, ssp, sed, base, 
+                pos, TL = call_field(freq, sd, rd, receiver_range, bathm, ssp, sed, base, 
                                                  return_pressure=False, performance_mode=False,
-                                                 beam_number=beam_number, grazing_high=grazing_high, grazing_low=grazing_low)
+                                                 beam_number=beam_number, grazing_high=grazing_high, grazing_low=grazing_low,
+                                                 **field_kwargs)
+        
+        # 时域波形：一次到达结构计算，按声源信号合成选定接收点的波形
+        time_wave = None
+        if options.get('is_time_wave_output', False):
+            try:
+                time_wave = bellhop_module.call_Bellhop_time_wave(
+                    source_depth=sd[:1], receiver_depths=rd, receiver_ranges=receiver_range, bathymetry=bathm,
+                    sound_speed_profile=ssp, sediment=sed, bottom_params=base, **time_wave_arguments(options, freq))
+            except Exception as e:
+                print(f"Time wave calculation failed: {str(e)}")
         
         # 格式化输出
-        return format_output_data(pos, TL, freq, pressure, rays, options)
+        return format_output_data(pos, TL, freq, pressure, rays, options, time_wave=time_wave)
         
     except Exception as e:
         import traceback
@@ -655,16 +1096,213 @@ def solve_bellhop_propagation(input_json):
         error_msg = f"Bellhop calculation failed: {str(e)}\nDetailed error info:\n{error_detail}"
         
         # 记录到文件以便调试
-        try:
-            import os
-            log_file = os.path.join(os.path.dirname(__file__), '..', 'data', 'error_log.txt')
-            os.makedirs(os.path.dirname(log_file), exist_ok=True)
-            with open(log_file, 'a', encoding='utf-8') as f:
-                import datetime
-                f.write(f"\n=== {datetime.datetime.now()} ===\n")
-                f.write(f"Input data: {input_json[:500]}...\n")
-                f.write(f"Error message: {error_msg}\n")
-        except:
-            pass  # 如果日志记录失败，不影响主流程
+        _log_error(input_json, error_msg)
             
-        return format_output_data(None, None, 0, error_code=500, error_message=error_msg)
\ No newline at end of file
+        return format_output_data(None, None, 0, error_code=500, error_message=error_msg)
+
+async def solve_bellhop_propagation_async(input_json):
+    """
+    solve_bellhop_propagation 的 asyncio 版本，输入输出格式相同
+
+    bellhop 子进程通过 asyncio 驱动，射线追踪与声场计算并发进行，
+    输入解析和结果格式化在线程中执行，不阻塞事件循环
+    """
+    try:
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ensure_data_dirs()
+        bellhop_module = _import_bellhop_module(project_root)
+        loop = asyncio.get_running_loop()
+
+        freq, sd, rd, bathm, ssp, sed, base, options = await loop.run_in_executor(
+            None, parse_input_data, input_json)
+
+        receiver_range = options.get('receiver_range', [])
+        beam_number = options.get('beam_number')
+        grazing_high = options.get('grazing_high')
+        grazing_low = options.get('grazing_low')
+        return_pressure = options.get('is_propagation_pressure_output', False)
+
+        if not isinstance(freq, list):
+            freq = [freq]
+
+        if options.get('receiver_points') is not None:
+            # 散点接收的作业已经在共享执行器上并发，整体放到线程中等待
+            points = await loop.run_in_executor(
+                None, solve_points, bellhop_module, freq, sd, bathm, ssp, base, options)
+            return await loop.run_in_executor(None, functools.partial(
+                format_output_data, None, None, freq, options=options, points=points))
+
+        if options.get('source_positions') is not None:
+            # 互易计算的作业已经在共享执行器上并发，整体放到线程中等待
+            reciprocal = await loop.run_in_executor(
+                None, solve_reciprocal, bellhop_module, freq, bathm, ssp, base, options)
+            return await loop.run_in_executor(None, functools.partial(
+                format_output_data, None, None, freq, options=options, reciprocal=reciprocal))
+
+        if options.get('radials'):
+            # 方位扇面的作业已经在共享执行器上并发，整体放到线程中等待
+            pos, TL, pressure, fan = await loop.run_in_executor(
+                None, solve_radials, bellhop_module, freq, sd, rd, options)
+            return await loop.run_in_executor(None, functools.partial(
+                format_output_data, pos, TL, freq, pressure, None, options, fan=fan))
+
+        async def trace_rays():
+            if not options.get('is_ray_output', False):
+                return None
+            try:
+                # 射线追踪不支持多频率和多声源深度，使用第一个频率和第一个声源深度
+                rays_total = await bellhop_module.call_Bellhop_Rays_async(
+                    freq[0], sd[:1], rd, receiver_range, bathm, ssp, sed, base,
+                    beam_number=beam_number, grazing_high=grazing_high, grazing_low=grazing_low)
+                return await loop.run_in_executor(None, lambda: bellhop_module.find_cvgcRays(
+                    rays_total, bathm, **ray_filter_options(options)))
+            except Exception as e:
+                print(f"Ray tracing calculation failed: {str(e)}")
+                return []
+
+        if options.get('broadband', False):
+            field_call = bellhop_module.call_Bellhop_broadband_async(
+                freq, sd, rd, receiver_range, bathm, ssp, sed, base,
+                return_pressure=return_pressure, performance_mode=False,
+                beam_number=beam_number, grazing_high=grazing_high, grazing_low=grazing_low)
+        else:
+            field_call = bellhop_module.call_Bellhop_multi_freq_async(
+                freq, sd, rd, receiver_range, bathm, ssp, sed, base,
+                return_pressure=return_pressure, performance_mode=False,
+                beam_number=beam_number, grazing_high=grazing_high, grazing_low=grazing_low,
+                dense_grid=options.get('dense_grid', False))
+
+        async def synthesize_time_wave():
+            if not options.get('is_time_wave_output', False):
+                return None
+            try:
+                return await loop.run_in_executor(None, functools.partial(
+                    bellhop_module.call_Bellhop_time_wave,
+                    source_depth=sd[:1], receiver_depths=rd, receiver_ranges=receiver_range, bathymetry=bathm,
+                    sound_speed_profile=ssp, sediment=sed, bottom_params=base, **time_wave_arguments(options, freq)))
+            except Exception as e:
+                print(f"Time wave calculation failed: {str(e)}")
+                return None
+
+        field_result, rays, time_wave = await asyncio.gather(field_call, trace_rays(), synthesize_time_wave())
+
+        pressure = None
+        if return_pressure:
+            pos, TL, pressure = field_result
+        else:
+            pos, TL = field_result
+
+        return await loop.run_in_executor(None, functools.partial(
+            format_output_data, pos, TL, freq, pressure, rays, options, time_wave=time_wave))
+
+    except Exception as e:
+        import traceback
+        error_detail = traceback.format_exc()
+        error_msg = f"Bellhop calculation failed: {str(e)}\nDetailed error info:\n{error_detail}"
+        _log_error(input_json, error_msg)
+        return format_output_data(None, None, 0, error_code=500, error_message=error_msg)
+
+def solve_bellhop_propagation_batch(input_jsons):
+    """
+    批量求解多个场景，返回与输入顺序一致的输出 JSON 字符串列表
+
+    所有场景的 bellhop 作业（频率 × 角度分段、方位扇面/互易计算/散点接收的各个运行、
+    宽带和时域波形的到达结构计算、射线追踪）在共享执行器上统一调度，长作业先运行；
+    单个场景失败（包括时域波形参数无效或计算失败，射线追踪失败时只输出空的射线）只影响该场景的输出（error_code=500）
+    """
+    import traceback
+    outputs = [None] * len(input_jsons)
+    try:
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ensure_data_dirs()
+        bellhop_module = _import_bellhop_module(project_root)
+    except Exception as e:
+        error_msg = f"Bellhop calculation failed: {str(e)}\nDetailed error info:\n{traceback.format_exc()}"
+        return [format_output_data(None, None, 0, error_code=500, error_message=error_msg)
+                for _ in input_jsons]
+
+    def fail(i, e):
+        error_detail = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
+        error_msg = f"Bellhop calculation failed: {str(e)}\nDetailed error info:\n{error_detail}"
+        _log_error(input_jsons[i], error_msg)
+        outputs[i] = format_output_data(None, None, 0, error_code=500, error_message=error_msg)
+
+    # 解析所有输入，展开为场景；与单个求解相同，散点接收、互易计算、方位扇面依次优先，
+    # 这三种模式不输出射线和时域波形
+    indices, parsed, scenarios = [], [], []
+    for i, input_json in enumerate(input_jsons):
+        try:
+            freq, sd, rd, bathm, ssp, sed, base, options = parse_input_data(input_json)
+            if not isinstance(freq, list):
+                freq = [freq]
+            if options.get('receiver_points') is not None:
+                scenario = {'points': points_arguments(freq, sd, bathm, ssp, base, options)}
+            elif options.get('source_positions') is not None:
+                scenario = {'reciprocal': reciprocal_arguments(freq, bathm, ssp, base, options)}
+            elif options.get('radials'):
+                scenario = {'radials': radials_arguments(freq, sd, rd, options)}
+            else:
+                common = dict(source_depth=sd, receiver_depths=rd,
+                              receiver_ranges=options.get('receiver_range', []),
+                              bathymetry=bathm, sound_speed_profile=ssp, sediment=sed, bottom_params=base,
+                              beam_number=options.get('beam_number'),
+                              grazing_high=options.get('grazing_high'),
+                              grazing_low=options.get('grazing_low'))
+                field = dict(common, frequencies=freq, performance_mode=False,
+                             dense_grid=options.get('dense_grid', False),
+                             broadband=options.get('broadband', False),
+                             return_pressure=options.get('is_propagation_pressure_output', False))
+                # 射线追踪不支持多频率和多声源深度，使用第一个频率和第一个声源深度
+                rays = dict(common, frequency=freq[0], source_depth=sd[:1]) if options.get('is_ray_output', False) else None
+                scenario = {'field': field, 'rays': rays}
+                if options.get('is_time_wave_output', False):
+                    # 时域波形参数无效时该场景失败，与其他计算的错误相同
+                    scenario['time_wave'] = dict(common, source_depth=sd[:1], **time_wave_arguments(options, freq))
+            indices.append(i)
+            parsed.append((freq, sd, rd, bathm, options))
+            scenarios.append(scenario)
+        except Exception as e:
+            fail(i, e)
+
+    results = bellhop_module.call_Bellhop_batch(scenarios) if scenarios else []
+
+    # 按场景组装输出
+    for i, (freq, sd, rd, bathm, options), result in zip(indices, parsed, results):
+        try:
+            for name in ('points', 'reciprocal', 'radials', 'field', 'time_wave'):
+                if isinstance(result.get(name), Exception):
+                    raise result[name]
+
+            if 'points' in result:
+                points = points_output(result['points'], sd, options)
+                outputs[i] = format_output_data(None, None, freq, options=options, points=points)
+                continue
+            if 'reciprocal' in result:
+                reciprocal = reciprocal_output(result['reciprocal'], options)
+                outputs[i] = format_output_data(None, None, freq, options=options, reciprocal=reciprocal)
+                continue
+            if 'radials' in result:
+                pos, TL, pressure, fan = radials_output(bellhop_module, result['radials'], freq, rd, options)
+                outputs[i] = format_output_data(pos, TL, freq, pressure, None, options, fan=fan)
+                continue
+
+            pressure = None
+            if options.get('is_propagation_pressure_output', False):
+                pos, TL, pressure = result['field']
+            else:
+                pos, TL = result['field']
+
+            rays = None
+            if options.get('is_ray_output', False):
+                try:
+                    if isinstance(result['rays'], Exception):
+                        raise result['rays']
+                    rays = bellhop_module.find_cvgcRays(result['rays'], bathm, **ray_filter_options(options))
+                except Exception as e:
+                    print(f"Ray tracing calculation failed: {str(e)}")
+                    rays = []
+
+            outputs[i] = format_output_data(pos, TL, freq, pressure, rays, options, time_wave=result.get('time_wave'))
+        except Exception as e:
+            fail(i, e)
+    return outputs
@@ -221,7 +221,7 @@ def compile_all_modules(project_root, force=False):
     
     # 编译 python_core 模块
     print("\n--- Compiling Core Modules ---")
-    core_modules = ["bellhop.py", "readwrite.py", "env.py", "project.py"]
+    core_modules = ["bellhop.py", "readwrite.py", "env.py", "project.py", "workspace.py", "executor.py", "runner.py", "cache.py", "synthesis.py"]
     
     for module in core_modules:
         module_path = python_core_dir / module
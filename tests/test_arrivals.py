@@ -0,0 +1,88 @@
+"""
+read_arrivals 测试：手工构造的 ASCII 和二进制 .arr 文件（与 bellhop 的写出格式相同）
+"""
+import os
+import struct
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from python_core.readwrite import read_arrivals
+
+FREQ = 250.0
+SD = [10.0]
+RD = [20.0, 30.0]
+RR = [1000.0]
+# 每个接收点的到达：幅度、相位（度）、时延实部、虚部、出射角、接收角、海面反射、海底反射
+ARRIVALS = [
+    [(0.01, 180.0, 0.70, 0.001, -12.5, 12.0, 3, 2),
+     (0.02, -90.0, 0.68, 0.0, 5.25, -5.0, 0, 1)],
+    [(0.005, 45.0, 0.71, 0.0, 20.0, -19.5, 1, 0)],
+]
+
+
+def _record(payload):
+    """Fortran 无格式顺序记录：前后各一个 4 字节的记录长度"""
+    return struct.pack('<i', len(payload)) + payload + struct.pack('<i', len(payload))
+
+
+def write_binary(path):
+    out = _record(b"'2D'")
+    out += _record(struct.pack('<f', FREQ))
+    for values in (SD, RD, RR):
+        out += _record(struct.pack('<i', len(values)) + struct.pack(f'<{len(values)}f', *values))
+    out += _record(struct.pack('<i', max(len(a) for a in ARRIVALS)))
+    for arrivals in ARRIVALS:
+        out += _record(struct.pack('<i', len(arrivals)))
+        for arr in arrivals:
+            out += _record(struct.pack('<6f2i', *arr))
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def write_ascii(path):
+    lines = ["'2D'", f'{FREQ}']
+    for values in (SD, RD, RR):
+        lines.append(f'{len(values)} ' + ' '.join(str(v) for v in values))
+    lines.append(str(max(len(a) for a in ARRIVALS)))
+    for arrivals in ARRIVALS:
+        lines.append(str(len(arrivals)))
+        lines.extend(' '.join(str(v) for v in arr) for arr in arrivals)
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+@pytest.mark.parametrize('writer', [write_ascii, write_binary])
+def test_read_arrivals(writer, tmp_path):
+    path = str(tmp_path / 'case.arr')
+    writer(path)
+    store = read_arrivals(path)
+
+    assert store.shape == (1, 2, 1)
+    assert store.freq == FREQ
+    np.testing.assert_allclose(store.pos.r.depth, RD)
+    np.testing.assert_allclose(store.pos.r.range, RR)
+    np.testing.assert_array_equal(store.counts.ravel(), [2, 1])
+
+    expected = np.array([arr for arrivals in ARRIVALS for arr in arrivals])
+    np.testing.assert_allclose(store.data['amp'], expected[:, 0], rtol=1e-6)
+    np.testing.assert_allclose(store.data['phase'], expected[:, 1], rtol=1e-6)
+    np.testing.assert_allclose(store.data['delay'], expected[:, 2] + 1j * expected[:, 3], rtol=1e-6)
+    np.testing.assert_allclose(store.data['src_ang'], expected[:, 4], rtol=1e-6)
+    np.testing.assert_allclose(store.data['rec_ang'], expected[:, 5], rtol=1e-6)
+    np.testing.assert_array_equal(store.data['num_top_bnc'], [3, 0, 1])
+    np.testing.assert_array_equal(store.data['num_bot_bnc'], [2, 1, 0])
+
+
+def test_read_arrivals_truncated(tmp_path):
+    path = str(tmp_path / 'case.arr')
+    write_binary(path)
+    with open(path, 'rb') as f:
+        buf = f.read()
+    with open(path, 'wb') as f:
+        f.write(buf[:-20])
+    with pytest.raises(ValueError, match='truncated'):
+        read_arrivals(path)
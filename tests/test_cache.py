@@ -0,0 +1,119 @@
+"""
+结果缓存测试：缓存键、按接收网格取回声场（精确切片、解调插值、欠采样时拒绝插值）和 LRU 淘汰
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from python_core.cache import ResultCache, make_key, sample_field, CARRIER_SIGN
+from python_core.env import Pos, Source, Dom
+
+C = 1500.0
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def synthetic_field(freq, depths, ranges, sd=10.0):
+    """点源声场 exp(-i·k·R)/R（bellhop 的相位约定），形状 (1, 1, Nrd, Nrr)"""
+    k = 2.0 * np.pi * freq / C
+    z, r = np.meshgrid(depths, ranges, indexing='ij')
+    distance = np.sqrt(r ** 2 + (z - sd) ** 2)
+    pressure = np.exp(CARRIER_SIGN * 1j * k * distance) / distance
+    pos = Pos(Source(np.array([sd])), Dom(np.asarray(ranges, dtype=float), np.asarray(depths, dtype=float)))
+    return pos, pressure[None, None], k
+
+
+def test_exact_subset_is_sliced():
+    pos, pressure, k = synthetic_field(100.0, np.linspace(0, 100, 11), np.linspace(100, 1000, 10))
+    new_pos, sampled = sample_field(pos, pressure, [20.0, 50.0], [300.0, 700.0])
+    np.testing.assert_array_equal(new_pos.r.depth, [20.0, 50.0])
+    np.testing.assert_array_equal(new_pos.r.range, [300.0, 700.0])
+    np.testing.assert_array_equal(sampled, pressure[..., [2, 5], :][..., [2, 6]])
+
+
+def test_no_interpolation_without_wavenumber():
+    pos, pressure, k = synthetic_field(100.0, np.linspace(0, 100, 11), np.linspace(100, 1000, 10))
+    assert sample_field(pos, pressure, [25.0], [350.0]) is None
+
+
+def test_demodulated_interpolation_matches_field():
+    freq = 200.0
+    wavelength = C / freq
+    depths = np.arange(0.0, 100.0 + 1e-9, 0.4 * wavelength)
+    ranges = np.arange(500.0, 5000.0, 0.4 * wavelength)
+    pos, pressure, k = synthetic_field(freq, depths, ranges)
+    rd, rr = np.array([33.3, 71.7]), np.array([1234.5, 3333.3])
+    new_pos, sampled = sample_field(pos, pressure, rd, rr, k)
+    expected = synthetic_field(freq, rd, rr)[1]
+    np.testing.assert_allclose(np.abs(sampled), np.abs(expected), rtol=0.02)
+    np.testing.assert_allclose(np.angle(sampled / expected), 0.0, atol=0.05)
+
+
+@pytest.mark.parametrize('coarse', ['depth', 'range'])
+def test_undersampled_grid_is_refused(coarse):
+    freq = 100.0
+    wavelength = C / freq
+    depth_step = 20.0 if coarse == 'depth' else 0.4 * wavelength
+    range_step = 10.0 if coarse == 'range' else 0.4 * wavelength
+    depths = np.arange(0.0, 200.0 + 1e-9, depth_step)
+    ranges = np.arange(500.0, 2000.0, range_step)
+    pos, pressure, k = synthetic_field(freq, depths, ranges)
+    assert sample_field(pos, pressure, [33.3], [1234.5], k) is None
+
+
+def test_key_depends_on_inputs():
+    key = make_key('field_grid', sys.executable, 100.0, [10.0], 'env', 5.0)
+    assert key == make_key('field_grid', sys.executable, 100.0, [10.0], 'env', 5.0)
+    # 最大接收距离决定声线数和角度分段，不同时不能共用
+    assert key != make_key('field_grid', sys.executable, 100.0, [10.0], 'env', 4.0)
+    assert key != make_key('field_grid', sys.executable, 200.0, [10.0], 'env', 5.0)
+    assert make_key('field_grid', os.path.join(DATA_DIR, 'missing-binary'), 100.0) is None
+
+
+def test_grid_field_lookup(tmp_path):
+    cache = ResultCache(root=str(tmp_path), max_bytes=1 << 30, enabled=True)
+    key = make_key('field_grid', sys.executable, 100.0)
+    other = make_key('field_grid', sys.executable, 200.0)
+    pos, pressure, k = synthetic_field(100.0, np.linspace(0, 100, 11), np.linspace(100, 1000, 10))
+    cache.put_grid_field(key, pos, pressure)
+
+    # 超集网格精确切片；其他键和网格外的请求不命中
+    hit = cache.find_field(key, [20.0, 50.0], [300.0, 700.0])
+    np.testing.assert_array_equal(hit[1], pressure[..., [2, 5], :][..., [2, 6]])
+    assert cache.find_field(other, [20.0], [300.0]) is None
+    assert cache.find_field(key, [25.0], [300.0], k) is None  # 非加密网格条目不插值
+    assert cache.stats()['hits'] == 1
+
+
+def test_dense_field_interpolation(tmp_path):
+    cache = ResultCache(root=str(tmp_path), max_bytes=1 << 30, enabled=True)
+    key = make_key('field_grid', sys.executable, 200.0)
+    wavelength = C / 200.0
+    pos, pressure, k = synthetic_field(200.0, np.arange(0.0, 100.0, 0.4 * wavelength),
+                                       np.arange(500.0, 3000.0, 0.4 * wavelength))
+    cache.put_grid_field(key, pos, pressure, dense=True)
+    assert cache.find_field(key, [33.3], [1234.5]) is None  # 没有波数时只精确复用
+    new_pos, sampled = cache.find_field(key, [33.3], [1234.5], k)
+    np.testing.assert_allclose(np.abs(sampled), np.abs(synthetic_field(200.0, [33.3], [1234.5])[1]), rtol=0.02)
+
+
+def test_eviction_keeps_size_below_limit(tmp_path):
+    pos, pressure, k = synthetic_field(100.0, np.linspace(0, 100, 11), np.linspace(100, 1000, 10))
+    cache = ResultCache(root=str(tmp_path), max_bytes=1 << 30, enabled=True)
+    cache.put_field(make_key('field', sys.executable, 0), pos, pressure)
+    entry = cache.stats()['bytes']
+    cache.clear()
+
+    cache = ResultCache(root=str(tmp_path), max_bytes=5 * entry, enabled=True)
+    keys = [make_key('field', sys.executable, i) for i in range(12)]
+    for key in keys:
+        cache.put_field(key, pos, pressure)
+    stats = cache.stats()
+    assert stats['evictions'] > 0
+    assert stats['bytes'] <= cache.max_bytes
+    # 最近写入的条目保留，最早的被淘汰
+    assert cache.get_field(keys[-1]) is not None
+    assert cache.get_field(keys[0]) is None
@@ -0,0 +1,100 @@
+"""
+EnvTemplate 往返测试：模板生成的 .env 与原 write_env 的输出（tests/data/*.env）逐字相同，
+并且用 read_env_core 解析回来的环境、收发位置与原输出一致
+
+（readvector 只能解析等间距的向量，测试环境的接收深度和距离都取等间距）
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from python_core.env import (Pos, Source, Dom, cInt, SSPraw, SSP, HS, BotBndry, TopBndry, Bndry, Box,
+                             Beam)
+from python_core.readwrite import EnvTemplate, read_env_core, readsdrd, readvector
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def make_case(name):
+    """
+    生成测试环境，返回 write_env / EnvTemplate 的参数
+    (title, freq, ssp, bdry, pos, beam, cint, rmax)
+
+    与 Scenario 相同的构造方式：单一介质、'SVW' 海面、'A~' 海底半空间
+    """
+    z = np.array([0.0, 50.0, 100.0, 110.0, 120.0])
+    cp = np.array([1500.0, 1490.0, 1495.0, 1495.0, 1495.0])
+    raw = [SSPraw(z, cp, np.zeros(len(z)), np.ones(len(z)), np.zeros(len(z)), np.zeros(len(z)))]
+    ssp = SSP(raw, [0, z[-1]], 1, 'SVW', np.zeros(1, np.int8), np.zeros(2))
+    bdry = Bndry(TopBndry('SVW'), BotBndry('A~', HS(1800.0, 200.0, 1.8, 0.1, 0.5)))
+    cint = cInt(1400, 15000)
+
+    if name == 'grid':
+        # 均匀接收网格，只写出首尾距离
+        pos = Pos(Source([10.0]), Dom(np.linspace(0.1, 5.0, 50), np.linspace(0.0, 100.0, 21)))
+        beam = Beam(RunType='C', Nbeams=120, alpha=np.array([-20.0, 20.0]), box=Box(120.0, 5.0), deltas=0)
+        return 'Pekeris profile', 250.0, ssp, bdry, pos, beam, cint, 5.0
+    if name == 'sources':
+        # 多个声源深度，非整数的深度、距离和角度
+        pos = Pos(Source([10.0, 40.5]), Dom(np.linspace(0.25, 2.75, 11), np.linspace(5.5, 35.5, 4)))
+        beam = Beam(RunType='CG', Nbeams=37, alpha=np.array([-7.5, 12.25]), box=Box(120.0, 3.0), deltas=0)
+        return 'Pekeris profile', 1234.5, ssp, bdry, pos, beam, cint, 2.75
+    if name == 'single':
+        # 单个接收距离和深度
+        pos = Pos(Source([25.0]), Dom(np.array([1.5]), np.array([60.0])))
+        beam = Beam(RunType='C', Nbeams=10, alpha=np.array([-90.0, 90.0]), box=Box(120.0, 2.0), deltas=0)
+        return 'Pekeris profile', 50.0, ssp, bdry, pos, beam, cint, 1.5
+    raise ValueError(name)
+
+
+CASES = ['grid', 'sources', 'single']
+
+
+def _parse(path):
+    """read_env_core 解析环境部分，再读出声源深度、接收深度和接收距离"""
+    title, freq, ssp, bdry, lines, line_ind = read_env_core(path)
+    pos, line_ind = readsdrd(lines, line_ind)
+    ranges, _, line_ind = readvector(lines, line_ind)
+    return title, freq, ssp, bdry, pos, np.atleast_1d(ranges), lines[line_ind:]
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_template_matches_baseline_writer(name):
+    title, freq, ssp, bdry, pos, beam, cint, rmax = make_case(name)
+    text = EnvTemplate('BELLHOP', title, ssp, bdry, pos, cint, rmax).render(freq, beam)
+    with open(os.path.join(DATA_DIR, name + '.env'), newline='') as f:
+        assert text == f.read()
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_template_round_trip(name, tmp_path):
+    title, freq, ssp, bdry, pos, beam, cint, rmax = make_case(name)
+    deck = str(tmp_path / (name + '.env'))
+    EnvTemplate('BELLHOP', title, ssp, bdry, pos, cint, rmax).write(deck, freq, beam)
+
+    parsed = _parse(deck)
+    baseline = _parse(os.path.join(DATA_DIR, name + '.env'))
+
+    assert parsed[0] == baseline[0] == title
+    assert parsed[1] == baseline[1] == freq
+    np.testing.assert_array_equal(parsed[2].depth, baseline[2].depth)
+    for attr in ('z', 'alphaR', 'betaR', 'rho', 'alphaI', 'betaI'):
+        np.testing.assert_array_equal(getattr(parsed[2].raw[0], attr), getattr(baseline[2].raw[0], attr))
+    np.testing.assert_allclose(parsed[2].raw[0].alphaR, ssp.raw[0].alphaR)
+    assert parsed[3].Top.Opt == baseline[3].Top.Opt
+    assert parsed[3].Bot.Opt == baseline[3].Bot.Opt
+    for attr in ('alphaR', 'betaR', 'rho', 'alphaI', 'betaI'):
+        assert getattr(parsed[3].Bot.hs, attr) == getattr(baseline[3].Bot.hs, attr)
+
+    np.testing.assert_array_equal(parsed[4].s.depth, baseline[4].s.depth)
+    np.testing.assert_array_equal(parsed[4].r.depth, baseline[4].r.depth)
+    np.testing.assert_array_equal(parsed[5], baseline[5])
+    np.testing.assert_allclose(parsed[4].s.depth, pos.s.depth)
+    np.testing.assert_allclose(parsed[4].r.depth, pos.r.depth)
+    np.testing.assert_allclose(parsed[5], pos.r.range, rtol=1e-6)
+    # 声线参数部分（Run Type、声线数、角度、计算范围）
+    assert parsed[6] == baseline[6]
@@ -0,0 +1,107 @@
+"""
+共享执行器测试：并发上限、调整上限时新旧线程池不叠加、同步任务和 asyncio 路径共用名额
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from python_core.executor import BellhopExecutor, ProcessSlots
+
+
+class Counter:
+    """记录同时运行的任务数的最大值"""
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def enter(self):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+
+    def leave(self):
+        with self.lock:
+            self.running -= 1
+
+    def task(self, seconds):
+        self.enter()
+        time.sleep(seconds)
+        self.leave()
+        return seconds
+
+
+def test_map_respects_limit():
+    executor = BellhopExecutor(max_workers=3)
+    counter = Counter()
+    try:
+        assert executor.map(counter.task, [0.05] * 10) == [0.05] * 10
+    finally:
+        executor.shutdown()
+    assert counter.peak == 3
+    assert executor.slots.active == 0
+
+
+def test_resize_does_not_overlap_pools():
+    executor = BellhopExecutor(max_workers=4)
+    counter = Counter()
+    try:
+        old = [executor.submit(counter.task, 0.3) for _ in range(4)]
+        time.sleep(0.1)
+        executor.resize(2)
+        new = [executor.submit(counter.task, 0.05) for _ in range(6)]
+        for future in old + new:
+            future.result()
+    finally:
+        executor.shutdown()
+    # 旧线程池的 4 个任务结束前，新线程池的任务不能开始
+    assert counter.peak == 4
+    assert executor.slots.limit == 2
+    assert executor.slots.active == 0
+
+
+def test_sync_and_async_share_slots():
+    executor = BellhopExecutor(max_workers=2)
+    counter = Counter()
+
+    async def run_async(seconds):
+        async with executor.slots:
+            counter.enter()
+            await asyncio.sleep(seconds)
+            counter.leave()
+
+    async def main():
+        futures = [executor.submit(counter.task, 0.1) for _ in range(3)]
+        await asyncio.gather(*(run_async(0.1) for _ in range(3)))
+        for future in futures:
+            future.result()
+
+    try:
+        asyncio.run(main())
+    finally:
+        executor.shutdown()
+    assert counter.peak == 2
+    assert executor.slots.active == 0
+
+
+def test_cancelled_waiter_returns_slot():
+    slots = ProcessSlots(1)
+
+    async def main():
+        await slots.acquire_async()
+        waiter = asyncio.ensure_future(slots.acquire_async())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        slots.release()
+        # 取消的等待者不占用名额
+        await asyncio.wait_for(slots.acquire_async(), 1.0)
+        slots.release()
+
+    asyncio.run(main())
+    assert slots.active == 0
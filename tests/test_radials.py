@@ -0,0 +1,63 @@
+"""
+radials_to_cartesian 测试：整圈方位首尾相接，扇面（跨过正北）以外和距离范围以外为 NaN，
+对方位和距离的线性场插值结果精确
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from python_core.bellhop import radials_to_cartesian
+
+RANGES = np.linspace(0.0, 5000.0, 51)
+
+
+def polar(x, y):
+    X, Y = np.meshgrid(x, y)
+    return np.hypot(X, Y), np.degrees(np.arctan2(X, Y)) % 360.0
+
+
+def test_full_circle():
+    bearings = np.arange(0.0, 360.0, 30.0)
+    # 与方位无关、随距离线性变化的场，中间一维为接收深度
+    field = np.empty((len(bearings), 2, len(RANGES)))
+    field[:, 0] = 60.0 + 0.01 * RANGES
+    field[:, 1] = 70.0 + 0.01 * RANGES
+    x = np.linspace(-4000.0, 4000.0, 17)
+    y = np.linspace(-3000.0, 3000.0, 13)
+    out = radials_to_cartesian(bearings, RANGES, field, x, y)
+    assert out.shape == (2, len(y), len(x))
+
+    r, _ = polar(x, y)
+    inside = r <= RANGES[-1]
+    np.testing.assert_allclose(out[0][inside], 60.0 + 0.01 * r[inside])
+    np.testing.assert_allclose(out[1][inside], 70.0 + 0.01 * r[inside])
+    assert np.all(np.isnan(out[:, ~inside]))
+
+
+def test_full_circle_wraps_between_last_and_first_bearing():
+    bearings = np.array([0.0, 90.0, 180.0, 270.0])
+    field = np.repeat(np.array([1.0, 2.0, 3.0, 4.0])[:, None], len(RANGES), axis=1)
+    # 方位 315° 位于 270° 和 360°（即 0°）中间
+    out = radials_to_cartesian(bearings, RANGES, field, [-1000.0], [1000.0])
+    np.testing.assert_allclose(out, [[2.5]])
+
+
+def test_sector_across_north():
+    bearings = np.array([350.0, 0.0, 10.0, 20.0, 30.0])
+    unwrapped = np.array([-10.0, 0.0, 10.0, 20.0, 30.0])
+    field = unwrapped[:, None] + 0.001 * RANGES[None, :]
+    # 输入方位顺序打乱不影响结果
+    order = [2, 0, 4, 1, 3]
+    x = np.linspace(-3000.0, 3000.0, 25)
+    y = np.linspace(-1000.0, 4500.0, 23)
+    out = radials_to_cartesian(bearings[order], RANGES, field[order], x, y)
+    assert out.shape == (len(y), len(x))
+
+    r, theta = polar(x, y)
+    angle = np.where(theta > 180.0, theta - 360.0, theta)
+    inside = (angle >= -10.0) & (angle <= 30.0) & (r <= RANGES[-1])
+    np.testing.assert_allclose(out[inside], angle[inside] + 0.001 * r[inside])
+    assert np.all(np.isnan(out[~inside & (r > 0)]))
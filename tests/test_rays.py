@@ -0,0 +1,107 @@
+"""
+射线测试：.ray 文件的整体读取和分块读取（tests/data/rays.ray，两个声源深度各三条射线），
+filter_rays 向量化筛选和 simplify_rays 轨迹抽稀
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from python_core.readwrite import read_rays, iter_rays
+from python_core.env import RayStore, Eigenray
+from python_core.bellhop import filter_rays, simplify_rays
+
+RAY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'rays.ray')
+
+
+def test_read_rays():
+    sources = read_rays(RAY_FILE)
+    assert len(sources) == 2
+    first, second = sources
+    np.testing.assert_array_equal(first.angles, [-10.0, 5.0, 20.0])
+    np.testing.assert_array_equal(first.lengths, [5, 5, 3])
+    np.testing.assert_array_equal(first.num_top_bnc, [0, 2, 1])
+    np.testing.assert_array_equal(first.num_bot_bnc, [1, 0, 3])
+    np.testing.assert_array_equal(second.lengths, [4, 2, 3])
+
+    ray = first[1]
+    assert isinstance(ray, Eigenray)
+    np.testing.assert_array_equal(ray.xy, [[0, 100, 200, 300, 400], [10, 5, 0, 5, 10]])
+    np.testing.assert_array_equal(second[-1].xy, [[0, 80, 160], [40, 20, 45]])
+
+
+def test_iter_rays_matches_read_rays():
+    sources = read_rays(RAY_FILE)
+    chunks = list(iter_rays(RAY_FILE, chunk_size=2))
+    # 每块最多 2 条射线，不跨越声源
+    assert [(isz, len(rays)) for isz, rays in chunks] == [(0, 2), (0, 1), (1, 2), (1, 1)]
+    for isz in range(2):
+        merged = RayStore.from_rays(ray for i, rays in chunks if i == isz for ray in rays)
+        np.testing.assert_array_equal(merged.xy, sources[isz].xy)
+        np.testing.assert_array_equal(merged.offsets, sources[isz].offsets)
+        np.testing.assert_array_equal(merged.angles, sources[isz].angles)
+
+
+def test_truncated_file_keeps_complete_rays(tmp_path):
+    with open(RAY_FILE) as f:
+        lines = f.read().splitlines()
+    path = str(tmp_path / 'cut.ray')
+    # 截断在第一个声源的第三条射线中间
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines[:7 + 7 + 7 + 3]) + '\n')
+    sources = read_rays(path)
+    assert len(sources[0]) == 2
+    assert all(len(rays) == 0 for rays in sources[1:])
+    assert sum(len(rays) for _, rays in iter_rays(path)) == 2
+
+
+def test_filter_rays():
+    rays = read_rays(RAY_FILE)[0]
+    kept, stats = filter_rays(rays, min_depth=20.0, max_depth=100.0)
+    # 第二条射线最大深度 10 m（过浅），第三条 120 m（过深）
+    np.testing.assert_array_equal(kept.angles, [-10.0])
+    assert stats['shallow'] == 1 and stats['deep'] == 1
+    assert stats['valid'] == 1 and stats['total'] == 3
+
+    kept, stats = filter_rays(rays, max_top_bnc=1, max_bot_bnc=2)
+    np.testing.assert_array_equal(kept.angles, [-10.0])
+    assert stats['top_bounce'] == 1 and stats['bottom_bounce'] == 1
+
+    kept, stats = filter_rays(list(rays), angle_range=(0.0, 30.0))
+    np.testing.assert_array_equal(kept.angles, [5.0, 20.0])
+    assert stats['angle'] == 1
+    np.testing.assert_array_equal(kept[1].xy, rays[2].xy)
+
+
+def test_filter_rays_counts_empty_rays():
+    rays = RayStore.from_rays([Eigenray(1.0, 0, 0, np.zeros((2, 0))), Eigenray(2.0, 0, 0, [[0, 10], [5, 50]])])
+    kept, stats = filter_rays(rays, min_depth=20.0)
+    assert stats['empty'] == 1
+    np.testing.assert_array_equal(kept.angles, [2.0])
+
+
+def test_simplify_rays_keeps_endpoints_and_turning_points():
+    rays = simplify_rays(read_rays(RAY_FILE)[0], tolerance=1.0)
+    # 直线射线只保留端点；第二条射线保留海面转折点
+    np.testing.assert_array_equal(rays[0].xy, [[0, 400], [10, 90]])
+    np.testing.assert_array_equal(rays[1].xy, [[0, 200, 400], [10, 0, 10]])
+    np.testing.assert_array_equal(rays.angles, [-10.0, 5.0, 20.0])
+
+
+@pytest.mark.parametrize('tolerance', [0.5, 5.0])
+def test_simplify_rays_within_tolerance(tolerance):
+    r = np.linspace(0, 5000, 400)
+    xy = [np.vstack([r, 50 + 40 * np.sin(r / (300 + 50 * i))]) for i in range(3)]
+    rays = RayStore.from_rays(Eigenray(float(i), 0, 0, xy[i]) for i in range(3))
+    simplified = simplify_rays(rays, tolerance)
+    assert simplified.npoints < rays.npoints
+    for original, ray in zip(rays, simplified):
+        # 删除的点到保留折线的距离不超过 tolerance（这里比较深度差，折线坡度小于 0.15，放宽 10%）
+        depth = np.interp(original.xy[0], ray.xy[0], ray.xy[1])
+        assert np.max(np.abs(depth - original.xy[1])) <= tolerance * 1.1
+        np.testing.assert_array_equal(ray.xy[:, [0, -1]], original.xy[:, [0, -1]])
+
+    assert simplify_rays(rays, None).npoints == rays.npoints
@@ -0,0 +1,130 @@
+"""
+runner 测试：用假的 bellhop 脚本检查退出码、超时、CPU 时间上限、重试和旧输出文件的清理
+"""
+import os
+import stat
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from python_core import runner
+from python_core.runner import run_bellhop, BellhopRunError
+
+# 假的 bellhop：按 FAKE_MODE 文件中的一行决定本次运行的行为，每次运行消耗一行
+FAKE_BELLHOP = '''#!{python}
+import os, sys, time
+name = sys.argv[1]
+with open('FAKE_MODE') as f:
+    modes = f.read().split()
+mode, rest = (modes[0], modes[1:]) if modes else ('ok', [])
+with open('FAKE_MODE', 'w') as f:
+    f.write(' '.join(rest))
+with open('attempts', 'a') as f:
+    f.write(mode + '\\n')
+if mode == 'fail':
+    sys.exit(3)
+if mode == 'sleep':
+    time.sleep(30)
+if mode == 'spin':
+    while True:
+        pass
+with open(name + '.prt', 'w') as f:
+    f.write('ERROR: bad input\\n' if mode == 'error' else 'done\\n')
+if mode == 'ok':
+    with open(name + '.shd', 'wb') as f:
+        f.write(b'shd')
+'''
+
+
+@pytest.fixture
+def fake(tmp_path):
+    """在 tmp_path/bin 写出假的 bellhop，返回 (bin 目录, 环境文件名, 设置运行行为的函数)"""
+    bin_path = tmp_path / 'bin'
+    bin_path.mkdir()
+    exe = bin_path / 'bellhop'
+    exe.write_text(FAKE_BELLHOP.format(python=sys.executable))
+    exe.chmod(exe.stat().st_mode | stat.S_IXUSR)
+
+    def modes(*values):
+        (tmp_path / 'FAKE_MODE').write_text(' '.join(values))
+
+    modes()
+    return str(bin_path), str(tmp_path / 'case'), modes
+
+
+def attempts(filename):
+    with open(os.path.join(os.path.dirname(filename), 'attempts')) as f:
+        return f.read().split()
+
+
+def test_success(fake):
+    bin_path, filename, modes = fake
+    run_bellhop(filename, bin_path=bin_path, retries=0, output_ext='.shd')
+    assert os.path.exists(filename + '.shd')
+
+
+def test_retry_after_failure(fake):
+    bin_path, filename, modes = fake
+    modes('fail', 'ok')
+    run_bellhop(filename, bin_path=bin_path, retries=2, backoff=0, output_ext='.shd')
+    assert attempts(filename) == ['fail', 'ok']
+
+
+def test_retries_exhausted(fake):
+    bin_path, filename, modes = fake
+    modes('fail', 'fail', 'ok')
+    with pytest.raises(BellhopRunError) as info:
+        run_bellhop(filename, bin_path=bin_path, retries=1, backoff=0, output_ext='.shd')
+    assert info.value.reason == 'exit_code'
+    assert info.value.returncode == 3
+    assert info.value.attempts == 2
+
+
+def test_fatal_error_is_not_retried(fake):
+    bin_path, filename, modes = fake
+    modes('error', 'ok')
+    with pytest.raises(BellhopRunError) as info:
+        run_bellhop(filename, bin_path=bin_path, retries=2, backoff=0, output_ext='.shd')
+    assert info.value.reason == 'fatal_error'
+    assert 'bad input' in info.value.detail
+    assert attempts(filename) == ['error']
+
+
+def test_stale_output_is_removed(fake):
+    # 上一次运行留下的 .shd 不能让没有写出结果的运行被判为成功
+    bin_path, filename, modes = fake
+    with open(filename + '.shd', 'wb') as f:
+        f.write(b'stale')
+    modes('quiet')
+    with pytest.raises(BellhopRunError) as info:
+        run_bellhop(filename, bin_path=bin_path, retries=0, output_ext='.shd')
+    assert info.value.reason == 'no_output'
+
+
+def test_timeout_kills_process(fake):
+    bin_path, filename, modes = fake
+    modes('sleep')
+    start = time.monotonic()
+    with pytest.raises(BellhopRunError) as info:
+        run_bellhop(filename, bin_path=bin_path, timeout=0.5, retries=0, output_ext='.shd')
+    assert info.value.reason == 'timeout'
+    assert time.monotonic() - start < 10
+
+
+@pytest.mark.skipif(runner.resource is None or not hasattr(runner.resource, 'prlimit'),
+                    reason='CPU time limit needs resource.prlimit')
+def test_cpu_limit(fake):
+    bin_path, filename, modes = fake
+    modes('spin')
+    with pytest.raises(BellhopRunError) as info:
+        run_bellhop(filename, bin_path=bin_path, timeout=30, cpu_limit=1, retries=0, output_ext='.shd')
+    assert info.value.reason == 'cpu_limit'
+
+
+def test_missing_binary(tmp_path):
+    with pytest.raises(BellhopRunError) as info:
+        run_bellhop(str(tmp_path / 'case'), bin_path=str(tmp_path), retries=3, backoff=0)
+    assert info.value.reason == 'binary_missing'
@@ -0,0 +1,94 @@
+"""
+read_shd 测试：手工构造的二进制 .shd 文件（与 bellhop 的直接存取记录格式相同），
+整体读取、按频率读取、惰性读取和截断文件
+"""
+import os
+import struct
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from python_core.readwrite import read_shd, ShdField
+
+FREQS = [100.0, 200.0]
+SD = [10.0]
+RD = [0.0, 50.0, 100.0]
+RR = np.linspace(100.0, 1600.0, 16)
+RECL = 40  # 每条记录的字数，大于 2*Nrr，记录尾部不使用
+
+
+def expected_pressure():
+    """声压 (Nfreq, Ntheta, Nsd, Nrd, Nrr)，每个点取不同的值"""
+    shape = (len(FREQS), 1, len(SD), len(RD), len(RR))
+    values = np.arange(np.prod(shape), dtype=np.float32).reshape(shape)
+    return (values + 1j * (values + 0.5)).astype(np.complex64)
+
+
+def write_shd(path, short_last_record=False):
+    """写出 10 条文件头记录和每个 (freq, sd, rd) 一条声压记录"""
+    def record(payload):
+        assert len(payload) <= 4 * RECL
+        return payload + b'\0' * (4 * RECL - len(payload))
+
+    out = record(struct.pack('<i', RECL) + b'Synthetic field'.ljust(80))
+    out += record(b'rectilin  ')
+    out += record(struct.pack('<8i', len(FREQS), 1, 1, 1, len(SD), len(RD), len(RR), 0))
+    out += record(struct.pack(f'<{len(FREQS)}d', *FREQS))
+    out += record(struct.pack('<f', 0.0))
+    out += record(struct.pack('<f', 0.0))
+    out += record(struct.pack('<f', 0.0))
+    for values in (SD, RD, RR):
+        out += record(struct.pack(f'<{len(values)}f', *values))
+    for row in expected_pressure().reshape(-1, len(RR)):
+        out += record(row.view('<f4').tobytes())
+    if short_last_record:
+        # 最后一条记录只写出 2*Nrr 个数
+        out = out[:len(out) - 4 * (RECL - 2 * len(RR))]
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+@pytest.mark.parametrize('short_last_record', [False, True])
+def test_read_shd(short_last_record, tmp_path):
+    path = str(tmp_path / 'case.shd')
+    write_shd(path, short_last_record)
+    title, plot_type, freq_vec, atten, pos, pressure = read_shd(path)
+
+    assert plot_type == 'rectilin  '
+    np.testing.assert_array_equal(freq_vec, FREQS)
+    np.testing.assert_allclose(pos.s.depth, SD)
+    np.testing.assert_allclose(pos.r.depth, RD)
+    np.testing.assert_allclose(pos.r.range, RR)
+    np.testing.assert_array_equal(pressure, expected_pressure())
+
+    # 指定频率时去掉频率维
+    pressure = read_shd(path, 190.0)[-1]
+    np.testing.assert_array_equal(pressure, expected_pressure()[1])
+
+
+def test_lazy_selection(tmp_path):
+    path = str(tmp_path / 'case.shd')
+    write_shd(path)
+    with read_shd(path, lazy=True) as field:
+        assert isinstance(field, ShdField)
+        assert field.shape == expected_pressure().shape
+        pressure = field.pressure(freq=100.0, sd=0, rd=[0, 2], range_window=(300.0, 700.0))
+        window = (RR >= 300.0) & (RR <= 700.0)
+        np.testing.assert_array_equal(pressure, expected_pressure()[0, 0, 0][[0, 2]][:, window])
+        assert field.depth_index(48.0) == 1
+
+
+def test_read_shd_truncated(tmp_path):
+    path = str(tmp_path / 'case.shd')
+    write_shd(path, short_last_record=True)
+    with open(path, 'rb') as f:
+        buf = f.read()
+    with open(path, 'wb') as f:
+        f.write(buf[:-8])
+    with pytest.raises(ValueError, match='truncated'):
+        read_shd(path)
+    with pytest.raises(ValueError, match='truncated'):
+        ShdField(path)
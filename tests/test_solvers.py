@@ -0,0 +1,188 @@
+"""
+求解入口测试：用假的 bellhop（点源自由场 exp(-ikR)/R，c = 1500 m/s）检查任意接收点、互易计算、
+宽带合成和时域波形与解析解一致
+"""
+import os
+import stat
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from python_core import bellhop
+from python_core.cache import get_result_cache
+
+C = 1500.0
+
+# 假的 bellhop：按 .env 写出声场 .shd（规则或不规则网格）或 ASCII 到达结构 .arr；
+# 声场只由包含 0° 的角度分段写出，各分段之和即为完整的点源场
+FAKE_BELLHOP = '''#!{python}
+import re, struct, sys
+import numpy as np
+
+name = sys.argv[1]
+lines = open(name + '.env').read().splitlines()
+freq = float(lines[1].split()[0])
+
+
+def vector(i):
+    n = int(lines[i].split()[0])
+    values = [float(v) for v in lines[i + 1].split('/')[0].split()]
+    if len(values) < n:
+        values = np.linspace(values[0], values[-1], n) if len(values) > 1 else values * n
+    return np.array(values[:n])
+
+
+for i, line in enumerate(lines):
+    if '! NSD' in line:
+        sd = vector(i)
+    if '! NRD' in line:
+        rd = vector(i)
+    if '! NRR' in line:
+        rr = vector(i) * 1000.0
+    if '! Run Type' in line:
+        run_type = re.findall("'(.*)'", line)[0]
+    if '! angles' in line:
+        a0, a1 = (float(v) for v in line.split('/')[0].split()[:2])
+open(name + '.prt', 'w').write('fake bellhop\\n')
+
+
+def distance(z, zs):
+    return np.sqrt(np.maximum(rr, 1.0) ** 2 + (z - zs) ** 2)
+
+
+if run_type[0] == 'A':
+    with open(name + '.arr', 'w') as f:
+        f.write("'2D'\\n%f\\n" % freq)
+        for values in (sd, rd, rr):
+            f.write('%d %s\\n' % (len(values), ' '.join('%.10g' % v for v in values)))
+        for zs in sd:
+            f.write('1\\n')
+            for z in rd:
+                for R in distance(z, zs):
+                    f.write('1\\n%.10g 0.0 %.10g 0.0 5.0 -5.0 0 0\\n' % (1.0 / R, R / {c}))
+else:
+    irregular = len(run_type) > 4 and run_type[4] == 'I'
+    recl = max(2 * len(rr), 32, len(rd), len(sd))
+
+    def record(payload):
+        return payload + b'\\0' * (4 * recl - len(payload))
+
+    out = record(struct.pack('<i', recl) + b'fake'.ljust(80))
+    out += record(b'irregular ' if irregular else b'rectilin  ')
+    out += record(struct.pack('<8i', 1, 1, 1, 1, len(sd), len(rd), len(rr), 0))
+    out += record(struct.pack('<d', freq))
+    out += record(struct.pack('<f', 0.0)) * 3
+    for values in (sd, rd, rr):
+        out += record(np.asarray(values, '<f4').tobytes())
+    k = 2 * np.pi * freq / {c}
+    weight = 1.0 if a0 <= 0.0 < a1 else 0.0
+    for zs in sd:
+        for z in ([rd] if irregular else rd):
+            R = distance(z, zs)
+            p = weight * np.exp(-1j * k * R) / R
+            out += record(np.column_stack([p.real, p.imag]).astype('<f4').tobytes())
+    open(name + '.shd', 'wb').write(out)
+'''
+
+SSP = [SimpleNamespace(z=np.array([0.0, 50.0, 200.0]), c=np.full(3, C))]
+BATHYMETRY = SimpleNamespace(r=np.array([0.0, 10.0]), d=np.array([200.0, 200.0]))
+BOTTOM = [SimpleNamespace(cp=1800.0, cs=0.0, rho=1.8, a_p=0.1, a_s=0.0)]
+
+
+@pytest.fixture(autouse=True)
+def fake_bellhop(tmp_path, monkeypatch):
+    """把 bellhop 指向 tmp_path/bin 中的假程序，并关闭结果缓存"""
+    bin_path = tmp_path / 'bin'
+    bin_path.mkdir()
+    exe = bin_path / 'bellhop'
+    exe.write_text(FAKE_BELLHOP.format(python=sys.executable, c=C))
+    exe.chmod(exe.stat().st_mode | stat.S_IXUSR)
+    monkeypatch.setattr(bellhop, 'AtBinPath', str(bin_path))
+    cache = get_result_cache()
+    enabled = cache.enabled
+    cache.configure(enabled=False)
+    yield
+    cache.configure(enabled=enabled)
+
+
+def point_source(frequencies, source_depth, depths, ranges):
+    """解析声压 [频率, 声源深度, 接收点]"""
+    f = np.asarray(frequencies, dtype=float)[:, None, None]
+    zs = np.asarray(source_depth, dtype=float)[None, :, None]
+    R = np.sqrt(np.maximum(np.asarray(ranges, dtype=float), 1.0) ** 2 + (np.asarray(depths) - zs) ** 2)
+    return np.exp(-2j * np.pi * f * R / C) / R
+
+
+RNG = np.random.default_rng(7)
+POINTS = np.column_stack([RNG.uniform(5.0, 180.0, 40), RNG.uniform(100.0, 3000.0, 40)])
+
+
+def test_points_irregular():
+    frequencies = [100.0, 250.0]
+    pos, tl, pressure = bellhop.call_Bellhop_points(frequencies, np.array([10.0, 60.0]), POINTS, BATHYMETRY,
+                                                    SSP, None, BOTTOM, return_pressure=True)
+    assert pressure.shape == tl.shape == (2, 2, len(POINTS))
+    expected = point_source(frequencies, [10.0, 60.0], POINTS[:, 0], POINTS[:, 1])
+    np.testing.assert_allclose(pressure, expected, rtol=2e-3)
+    np.testing.assert_allclose(tl, -20 * np.log10(np.abs(expected)), atol=1e-3)
+
+
+def test_points_covering_grid():
+    frequencies = [100.0]
+    pos, tl, pressure = bellhop.call_Bellhop_points(frequencies, np.array([10.0]), POINTS, BATHYMETRY,
+                                                    SSP, None, BOTTOM, return_pressure=True, irregular=False)
+    assert pressure.shape == (1, 1, len(POINTS))
+    expected = point_source(frequencies, [10.0], POINTS[:, 0], POINTS[:, 1])
+    # 覆盖网格上插值，靠近声源处 1/R 变化快，误差较大
+    np.testing.assert_allclose(tl, -20 * np.log10(np.abs(expected)), atol=0.5)
+
+
+@pytest.mark.parametrize('n_ranges, atol', [(None, 1.0), (2, 1e-3)])
+def test_reciprocal(n_ranges, atol):
+    # 默认在加密网格上插值；n_ranges=2 时间距不足以插值，直接在各声源位置上计算
+    frequencies = [100.0, 200.0]
+    sources = POINTS[:12]
+    hydrophones = np.array([[20.0, 0.0], [80.0, 1500.0]])
+    tl = bellhop.call_Bellhop_reciprocal(frequencies, sources, hydrophones, BATHYMETRY, SSP, None, BOTTOM,
+                                         n_ranges=n_ranges)
+    assert tl.shape == (2, len(hydrophones), len(sources))
+    for h, (zh, rh) in enumerate(hydrophones):
+        expected = point_source(frequencies, [zh], sources[:, 0], np.abs(sources[:, 1] - rh))[:, 0]
+        np.testing.assert_allclose(tl[:, h], -20 * np.log10(np.abs(expected)), atol=atol)
+
+
+def test_broadband_matches_field():
+    frequencies = np.linspace(100.0, 200.0, 6)
+    depths = [10.0, 50.0, 120.0]
+    ranges = [200.0, 700.0, 1500.0, 2500.0]
+    pos, tl, pressure = bellhop.call_Bellhop_broadband(frequencies, np.array([30.0]), depths, ranges,
+                                                       BATHYMETRY, SSP, None, BOTTOM, return_pressure=True)
+    assert pressure.shape == (len(frequencies), 1, len(depths), len(ranges))
+    D, R = np.meshgrid(depths, ranges, indexing='ij')
+    expected = point_source(frequencies, [30.0], D.ravel(), R.ravel()).reshape(pressure.shape)
+    np.testing.assert_allclose(pressure, expected, rtol=1e-4)
+
+    # 与逐频率的声场计算一致
+    field = bellhop.call_Bellhop_multi_freq(frequencies, np.array([30.0]), depths, ranges, BATHYMETRY,
+                                            SSP, None, BOTTOM, return_pressure=True)[2]
+    np.testing.assert_allclose(pressure, field, rtol=1e-3)
+
+
+def test_time_wave():
+    frequency, fs = 200.0, 4000.0
+    result = bellhop.call_Bellhop_time_wave(frequency, np.array([30.0]), [30.0, 90.0], [750.0, 1500.0],
+                                            BATHYMETRY, SSP, None, BOTTOM,
+                                            receivers=[(30.0, 1500.0), (90.0, 750.0)], sample_rate=fs)
+    waveforms = result['waveforms']
+    assert result['sample_rate'] == fs
+    assert waveforms.shape[0] == 2
+    t = result['time_start'] + np.arange(waveforms.shape[1]) / fs
+    for i, (z, r) in enumerate([(30.0, 1500.0), (90.0, 750.0)]):
+        R = np.hypot(r, z - 30.0)
+        # Ricker 子波峰值在 1.5/f，幅度 1/R
+        assert t[np.argmax(waveforms[i])] == pytest.approx(R / C + 1.5 / frequency, abs=1.0 / fs)
+        assert waveforms[i].max() == pytest.approx(1.0 / R, rel=0.02)
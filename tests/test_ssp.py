@@ -0,0 +1,56 @@
+"""
+距离相关声速剖面写出测试：向量化的 write_ssp_matrix 与原逐值写出的结果（tests/data/*.ssp）逐字相同
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from python_core import bellhop
+from python_core.readwrite import write_ssp, write_ssp_matrix
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+class Profile:
+    def __init__(self, z, c):
+        self.z = np.array(z, dtype=float)
+        self.c = np.array(c, dtype=float)
+
+
+class Bathymetry:
+    def __init__(self, r, d):
+        self.r = np.array(r)
+        self.d = np.array(d)
+
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_profiles_padded_with_1800(tmp_path):
+    # 剖面点数不同，较短的剖面用 1800 m/s 补齐到最长剖面的点数
+    ssp = [Profile([0, 50, 100, 150], [1500.25, 1490.5, 1495.125, 1496.0]),
+           Profile([0, 60, 130], [1501, 1489.75, 1497.5]),
+           Profile([0, 150], [1502.0625, 1498])]
+    bathymetry = Bathymetry([0.0, 2.5, 7.25], [100, 120, 140])
+    path = str(tmp_path / 'profiles')
+    bellhop.write_ssp(path, ssp, bathymetry, 4)
+    assert read_bytes(path + '.ssp') == read_bytes(os.path.join(DATA_DIR, 'profiles.ssp'))
+
+
+def test_matrix_writer(tmp_path):
+    cw = np.array([[1500.0, 1501.5, 1502.25], [1490.125, 1489.0, 1491.75], [1495.5, 1496.0, 1497.0625]])
+    path = str(tmp_path / 'matrix')
+    write_ssp(path, cw, np.array([0.0, 1.5, 3.0]))
+    assert read_bytes(path + '.ssp') == read_bytes(os.path.join(DATA_DIR, 'matrix.ssp'))
+
+
+def test_matrix_writer_format(tmp_path):
+    path = str(tmp_path / 'fmt.ssp')
+    write_ssp_matrix(path, [0.0, 2.0], np.array([[1500.0, 1501.0], [1490.5, 1800.0]]), fmt='%6f', nprof=2)
+    assert read_bytes(path) == (b'2\r\n0.0\t2.0\t\r\n'
+                                b'1500.000000\t1501.000000\t\r\n1490.500000\t1800.000000\t\r\n')
@@ -0,0 +1,110 @@
+"""
+到达结构合成测试：多频率复声压与逐频率直接求和一致（等间隔递推、分块、无到达的接收点），
+声源脉冲，以及时域波形的分数时延
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from python_core.env import ArrivalStore, ARRIVAL_DTYPE
+from python_core.synthesis import arrivals_to_pressure, arrivals_to_waveform, source_pulse
+
+
+def make_store(counts, shape, seed=0):
+    """每个接收点 counts[i] 个随机到达"""
+    rng = np.random.default_rng(seed)
+    n = int(np.sum(counts))
+    data = np.zeros(n, dtype=ARRIVAL_DTYPE)
+    data['amp'] = rng.uniform(0.001, 0.02, n)
+    data['phase'] = rng.uniform(-180.0, 180.0, n)
+    data['delay'] = rng.uniform(0.5, 0.8, n) + 1j * rng.uniform(0.0, 1e-3, n)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    return ArrivalStore(data, offsets, shape)
+
+
+def direct_pressure(store, frequencies):
+    """逐频率、逐接收点直接求和"""
+    result = np.zeros((len(frequencies), len(store.offsets) - 1), dtype=complex)
+    for k, f in enumerate(frequencies):
+        for i in range(len(store.offsets) - 1):
+            d = store.data[store.offsets[i]:store.offsets[i + 1]]
+            result[k, i] = np.sum(d['amp'] * np.exp(1j * np.deg2rad(d['phase']))
+                                  * np.exp(-2j * np.pi * f * d['delay']))
+    return result.reshape((len(frequencies),) + store.shape)
+
+
+@pytest.mark.parametrize('frequencies', [np.linspace(100.0, 500.0, 41), [120.0, 250.0, 255.5, 900.0], [300.0]])
+@pytest.mark.parametrize('max_elements', [None, 64])
+def test_arrivals_to_pressure(frequencies, max_elements):
+    # 第二、五个接收点没有到达
+    store = make_store([3, 0, 5, 1, 0, 2], (1, 2, 3))
+    kwargs = {} if max_elements is None else {'max_elements': max_elements}
+    pressure = arrivals_to_pressure(store, frequencies, **kwargs)
+    assert pressure.shape == (len(frequencies), 1, 2, 3)
+    np.testing.assert_allclose(pressure, direct_pressure(store, frequencies), rtol=1e-9, atol=1e-14)
+    assert np.all(pressure[:, 0, 0, 1] == 0) and np.all(pressure[:, 0, 1, 1] == 0)
+
+
+def test_arrivals_to_pressure_without_arrivals():
+    store = make_store([0, 0], (1, 1, 2))
+    np.testing.assert_array_equal(arrivals_to_pressure(store, [100.0, 200.0]), np.zeros((2, 1, 1, 2)))
+
+
+def test_source_pulse():
+    f, fs = 100.0, 4000.0
+    ricker = source_pulse(f, fs)
+    # 峰值在 1.5/f
+    assert np.argmax(ricker) == int(round(1.5 / f * fs))
+    assert ricker.max() == pytest.approx(1.0)
+    assert abs(ricker[0]) < 1e-3 and abs(ricker[-1]) < 1e-3
+
+    tone = source_pulse(f, fs, kind='tone', cycles=3)
+    assert len(tone) == int(np.ceil(3 * fs / f)) + 1
+    assert tone[0] == 0.0 and abs(tone[-1]) < 1e-12
+
+    with pytest.raises(ValueError):
+        source_pulse(f, fs, kind='chirp')
+
+
+def test_waveform_fractional_delay():
+    f, fs = 100.0, 4000.0
+    # 接收点 0：一个相位 180° 的到达，时延不在采样点上；接收点 1 没有到达；接收点 2：两个到达
+    data = np.zeros(3, dtype=ARRIVAL_DTYPE)
+    data['amp'] = [0.5, 1.0, 0.25]
+    data['phase'] = [180.0, 0.0, 0.0]
+    data['delay'] = [0.10013, 0.1201, 0.1502]
+    store = ArrivalStore(data, [0, 1, 1, 3], (1, 1, 3))
+
+    source = source_pulse(f, fs)
+    t_start, waveforms = arrivals_to_waveform(store, [0, 1, 2], source, fs)
+    assert waveforms.shape[0] == 3
+    assert t_start <= 0.10013 and t_start * fs == pytest.approx(round(t_start * fs))
+
+    def ricker(t):
+        a = (np.pi * f * (t - 1.5 / f)) ** 2
+        return (1.0 - 2.0 * a) * np.exp(-a)
+
+    t = t_start + np.arange(waveforms.shape[1]) / fs
+    np.testing.assert_allclose(waveforms[0], -0.5 * ricker(t - 0.10013), atol=2e-3)
+    np.testing.assert_array_equal(waveforms[1], 0.0)
+    np.testing.assert_allclose(waveforms[2], ricker(t - 0.1201) + 0.25 * ricker(t - 0.1502), atol=2e-3)
+
+
+def test_waveform_integer_delay_matches_convolution():
+    fs = 1000.0
+    data = np.zeros(2, dtype=ARRIVAL_DTYPE)
+    data['amp'] = [1.0, 0.5]
+    data['delay'] = [0.020, 0.035]
+    store = ArrivalStore(data, [0, 2], (1, 1, 1))
+    source = np.array([1.0, -2.0, 0.5, 0.25])
+
+    t_start, waveforms = arrivals_to_waveform(store, [0], source, fs, t_start=0.0, n_samples=50)
+    assert t_start == 0.0 and waveforms.shape == (1, 50)
+    impulse = np.zeros(50)
+    impulse[20] = 1.0
+    impulse[35] = 0.5
+    np.testing.assert_allclose(waveforms[0], np.convolve(impulse, source)[:50], atol=1e-12)